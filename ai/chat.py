@@ -2,12 +2,19 @@
 Conversational chat with memory integration.
 Handles the full loop: retrieve → generate → extract → store.
 """
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from loguru import logger
 
 from core.brain import Brain
 from ai.llm import LLMClient
+from ai.history import ConversationHistory
+from ai.turn_classifier import BaseTurnClassifier, TurnDecision, get_turn_classifier
 from memory.extractor import MemoryExtractor
+from memory.extraction_pipeline import extract_and_store_streaming
+from memory.extraction_queue import ExtractionQueue, ExtractionWindow, extraction_queue_from_settings
+from models.memory import Memory, MemoryContext, MemoryDraft
+from config.settings import settings
+from core.scheduler import CallPriority, model_priority
 
 class ChatManager:
     """
@@ -21,11 +28,47 @@ class ChatManager:
     5. Extract new memories from conversation
     6. Store new memories
     7. Return response
+
+    Memory context is sent incrementally: each user turn keeps the context
+    it was answered with in the history, so later turns only add memories
+    that are new or whose content changed, plus a short reference to the
+    rest. Every `context_refresh_turns` turns the full context is sent again.
+
+    The history itself is token-bounded (see ConversationHistory): old
+    turns are summarized in the background, and memories shown only in
+    turns that left the prompt are sent again.
+
+    Steps 5-6 run on a background ExtractionQueue by default, so the user
+    only waits for the response. The next turn waits (bounded by
+    settings.extraction_wait_timeout_seconds) for the user's pending
+    writes before recalling, so it sees what the previous turn stored.
+
+    With `extraction_window_turns` > 1, turns are extracted in batches (one
+    LLM call per window, or after `extraction_idle_seconds` without a new
+    turn); recall only sees a window's memories once it has been flushed.
+
+    A local turn classifier runs first: small talk ("thanks!", "bye") skips
+    both the memory context and extraction, impersonal questions skip
+    extraction, and bare replies ("yes") skip the memory context but are
+    extracted together with the assistant message they answer.
+
+    `chat_stream` yields the response as it is generated; the turn is only
+    recorded (history, extraction) once the stream completes.
     """
     def __init__(
             self,
             user_id: str,
-            system_instruction: Optional[str] = None
+            system_instruction: Optional[str] = None,
+            brain: Optional[Brain] = None,
+            llm_client: Optional[LLMClient] = None,
+            memory_extractor: Optional[MemoryExtractor] = None,
+            context_deltas: Optional[bool] = None,
+            context_refresh_turns: Optional[int] = None,
+            history: Optional[ConversationHistory] = None,
+            extraction_queue: Optional[ExtractionQueue] = None,
+            background_extraction: Optional[bool] = None,
+            extraction_window_turns: Optional[int] = None,
+            turn_classifier: Optional[BaseTurnClassifier] = None,
     ):
         """
         Initialize chat for a user.
@@ -33,20 +76,66 @@ class ChatManager:
         Args:
             user_id: User identifier
             system_instruction: System-level instructions for the LLM
+            brain: Shared Brain for this user (default: a new one)
+            llm_client: Shared LLM client (default: a new one)
+            memory_extractor: Shared extractor (default: a new one)
+            context_deltas: Send only unseen memories (default from settings)
+            context_refresh_turns: Turns between full context refreshes (default from settings)
+            history: Conversation history (default: bounded by the chat_history_* settings)
+            extraction_queue: Shared background extraction queue
+            background_extraction: Extract memories off the response path (default from settings)
+            extraction_window_turns: Turns per extraction call (default from settings)
+            turn_classifier: Decides per turn if retrieval/extraction run (default from settings)
         """
         self.user_id = user_id
         self.system_instruction = system_instruction or self._default_system_instruction()
-        self.brain = Brain(user_id=user_id)
-        self.llm_client = LLMClient() 
-        self.memory_extractor = MemoryExtractor()
+        self.brain = brain or Brain(user_id=user_id)
+        self.llm_client = llm_client or LLMClient()
+        self.memory_extractor = memory_extractor or MemoryExtractor()
+
+        self.context_deltas = (
+            settings.chat_context_deltas if context_deltas is None else context_deltas
+        )
+        self.context_refresh_turns = (
+            settings.chat_context_refresh_turns
+            if context_refresh_turns is None
+            else context_refresh_turns
+        )
+
+        self.history = history or ConversationHistory(
+            summarizer=self.llm_client.summarize_conversation if settings.chat_history_summarize else None,
+            max_tokens=settings.chat_history_max_tokens,
+            keep_turns=settings.chat_history_keep_turns,
+            tokenizer=self.brain.context_packer.tokenizer,
+        )
+        if background_extraction is None:
+            background_extraction = settings.chat_background_extraction
+        self.extraction_queue = extraction_queue
+        if self.extraction_queue is None and background_extraction:
+            self.extraction_queue = extraction_queue_from_settings(self.memory_extractor)
+
+        self.turn_classifier = turn_classifier or get_turn_classifier()
+        self.extraction_window = ExtractionWindow(
+            self._extract_turns,
+            max_turns=extraction_window_turns or settings.extraction_window_turns,
+            idle_seconds=settings.extraction_idle_seconds,
+        )
 
-        self.conversation_history: List[dict] = []
+        # memory id -> (content, number of the turn whose context showed it)
+        self._shown_memories: Dict[str, Tuple[str, int]] = {}
+        self._turns_since_refresh = 0
         logger.info(f"MemoryChat initialized for user: {user_id}")
 
+    @property
+    def conversation_history(self) -> List[dict]:
+        """Turns kept verbatim (older ones live in `history.summary`)."""
+        return self.history.all_messages()
+
     def chat(self,
             user_message: str,
             auto_extract: bool = True, 
-            max_context_memories: int = 10
+            max_context_memories: int = 10,
+            max_context_tokens: Optional[int] = None
             ) -> str:
         """
         Send a message and get a response.
@@ -55,83 +144,288 @@ class ChatManager:
             user_message: User's message
             auto_extract: Automatically extract and store memories
             max_context_memories: Max memories to include in context
+            max_context_tokens: Token budget of the context (default from settings)
             
         Returns:
             Assistant's response
         """
         try:
-             
-            logger.info(f"User message: {user_message}")
-
-            context = self.brain.get_context(
-                query=user_message,
-                max_memories=max_context_memories
+            decision, memory_context, refresh = self._prepare_turn(
+                user_message, max_context_memories, max_context_tokens
             )
             response = self.llm_client.generate_response(
                 prompt=user_message,
-                context=context,
-                conversation_history=self.conversation_history,
+                context=memory_context.text,
+                conversation_history=self.history.messages(),
                 system_instruction=self.system_instruction
             )
             logger.info(f"Assistant response: {response[:100]}...")
 
-            if auto_extract:
-                    self._extract_and_store(user_message, response)
-            
-            self.conversation_history.append({
-                    "role": "user",
-                    "content": user_message
-                })
-            self.conversation_history.append({
-                    "role": "assistant",
-                    "content": response
-                })
+            self._finish_turn(user_message, response, decision, memory_context, refresh, auto_extract)
             return response
         except Exception as e:
             logger.error(f"Error during chat: {e}")
             return "Sorry, something went wrong."
-        
+
+    def chat_stream(self,
+            user_message: str,
+            auto_extract: bool = True,
+            max_context_memories: int = 10,
+            max_context_tokens: Optional[int] = None
+            ) -> Iterator[str]:
+        """
+        Send a message and stream the response as it is generated.
+
+        Same arguments as `chat`. The turn is added to the history and
+        handed to memory extraction only once the stream has completed; a
+        stream that fails midway or is closed by the caller leaves the
+        conversation untouched.
+
+        Example:
+            for chunk in chat_manager.chat_stream("What's my sister's name?"):
+                print(chunk, end="", flush=True)
+
+        Yields:
+            Response text chunks
+        """
+        try:
+            decision, memory_context, refresh = self._prepare_turn(
+                user_message, max_context_memories, max_context_tokens
+            )
+            stream = self.llm_client.generate_response_stream(
+                prompt=user_message,
+                context=memory_context.text,
+                conversation_history=self.history.messages(),
+                system_instruction=self.system_instruction
+            )
+        except Exception as e:
+            logger.error(f"Error during chat: {e}")
+            yield "Sorry, something went wrong."
+            return
+
+        chunks: List[str] = []
+        try:
+            for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error(f"Chat response stream failed, turn not recorded: {e}")
+            return
+        response = "".join(chunks)
+        logger.info(f"Assistant response: {response[:100]}...")
+
+        try:
+            self._finish_turn(user_message, response, decision, memory_context, refresh, auto_extract)
+        except Exception as e:
+            logger.error(f"Error recording streamed chat turn: {e}")
+
+    def _prepare_turn(
+            self,
+            user_message: str,
+            max_context_memories: int,
+            max_context_tokens: Optional[int]
+            ) -> Tuple[TurnDecision, MemoryContext, bool]:
+        """Classify the turn and build its memory context (empty when retrieval is skipped)."""
+        logger.info(f"User message: {user_message}")
+
+        decision = self.turn_classifier.classify(user_message)
+        logger.info(
+            f"Turn needs retrieval={decision.needs_retrieval}, "
+            f"extraction={decision.needs_extraction} ({decision.reason})"
+        )
+        if not decision.needs_retrieval:
+            return decision, MemoryContext(text="", token_count=0), False
+        self._wait_for_pending_writes()
+        memory_context, refresh = self._build_context(
+            user_message, max_context_memories, max_context_tokens
+        )
+        return decision, memory_context, refresh
+
+    def _finish_turn(
+            self,
+            user_message: str,
+            response: str,
+            decision: TurnDecision,
+            memory_context: MemoryContext,
+            refresh: bool,
+            auto_extract: bool
+            ):
+        """Queue extraction and record a completed turn in the history."""
+        if auto_extract and decision.needs_extraction:
+            extracted_message = user_message
+            if decision.replies_to_assistant:
+                # "yes" means nothing without the question it answers
+                previous = self._previous_assistant_message()
+                if previous:
+                    extracted_message = f'(replying to the assistant: "{previous}") {user_message}'
+            self.extraction_window.add(extracted_message, response)
+
+        turn = self.history.next_turn
+        self.history.append_turn(user_message, response, context=memory_context.text)
+        self._record_shown(memory_context, refresh, turn)
+
+    def _previous_assistant_message(self, max_chars: int = 500) -> str:
+        for message in reversed(self.history.all_messages()):
+            if message.get("role") == "assistant":
+                return message.get("content", "")[-max_chars:]
+        return ""
+
+    def _build_context(
+            self,
+            user_message: str,
+            max_memories: int,
+            max_tokens: Optional[int]
+            ) -> Tuple[MemoryContext, bool]:
+        """
+        Memory context for this turn: a delta against what the history already shows.
+
+        Returns:
+            (context, whether it is a full refresh)
+        """
+        shown = self._visible_shown_memories()
+        refresh = (
+            not self.context_deltas
+            or not shown
+            or (self.context_refresh_turns > 0 and self._turns_since_refresh >= self.context_refresh_turns)
+        )
+        memory_context = self.brain.build_context(
+            query=user_message,
+            max_memories=max_memories,
+            max_tokens=max_tokens,
+            shown=None if refresh else shown
+        )
+        logger.debug(
+            f"Context {'refresh' if refresh else 'delta'}: {len(memory_context.memory_ids)} new, "
+            f"{len(memory_context.referenced_ids)} referenced, {memory_context.token_count} tokens"
+        )
+        return memory_context, refresh
+
+    def _visible_shown_memories(self) -> Dict[str, str]:
+        """Shown memories whose turn is still part of the prompt history."""
+        first_visible = self.history.first_visible_turn()
+        return {
+            memory_id: content
+            for memory_id, (content, turn) in self._shown_memories.items()
+            if turn >= first_visible
+        }
+
+    def _record_shown(self, memory_context: MemoryContext, refresh: bool, turn: int):
+        """Remember which memories the history now contains (once the turn is stored)."""
+        if not self.context_deltas:
+            return
+        if refresh:
+            self._shown_memories = {}
+            self._turns_since_refresh = 0
+        self._turns_since_refresh += 1
+        for memory_id, content in zip(memory_context.memory_ids, memory_context.contents):
+            self._shown_memories[memory_id] = (content, turn)
+
+    def _extract_turns(self, turns: List[Tuple[str, str]]):
+        """Extract one window of turns, in the background when a queue is configured."""
+        if self.extraction_queue is not None:
+            self.extraction_queue.submit_turns(
+                self.user_id, turns, store_draft=self._store_draft, store_batch=self._store_drafts
+            )
+        else:
+            self._extract_and_store(turns)
+
     def _extract_and_store(
               
             self,
-            user_message: str,
-            assistant_message: str
+            turns: List[Tuple[str, str]]
             ):
         """
         Extract memories from conversation and store them.
         """
         try:
-            drafts = self.memory_extractor.extract_memories(user_message, assistant_message)
-            if not drafts:
-                logger.info("No memories extracted from conversation.")
-                return
-            for draft in drafts:
-                memory = draft.to_memory(user_id=self.user_id)
-                self.brain.remember(
-                    content=memory.content,
-                    memory_type=memory.memory_type,
-                    importance_score=memory.importance_score,
-                    tags=memory.tags
-                )
-                logger.debug(f"Stored memory: {draft.content[:50]}...")
+            # Same model call class as the background queue, even when inline
+            with model_priority(CallPriority.EXTRACTION):
+                if settings.extraction_streaming:
+                    extracted, stored = extract_and_store_streaming(
+                        self.memory_extractor,
+                        turns,
+                        self._store_drafts,
+                        batch_size=settings.extraction_store_batch_size,
+                        max_wait_seconds=settings.extraction_store_batch_wait_ms / 1000,
+                    )
+                    logger.info(f"Extracted {extracted} and stored {stored} memories from conversation.")
+                    return
+                drafts = self.memory_extractor.extract_memories_from_turns(turns)
+                if not drafts:
+                    logger.info("No memories extracted from conversation.")
+                    return
+                for draft in drafts:
+                    self._store_draft(draft)
 
             logger.info(f"Extracted and stored {len(drafts)} memories from conversation.")
         except Exception as e:
             logger.error(f"Error extracting/storing memories: {e}")
 
+    def _store_draft(self, draft: MemoryDraft):
+        """Store one extracted memory (deduplicated by Brain.remember)."""
+        memory = draft.to_memory(user_id=self.user_id)
+        self.brain.remember(
+            content=memory.content,
+            memory_type=memory.memory_type,
+            importance_score=memory.importance_score,
+            tags=memory.tags
+        )
+        logger.debug(f"Stored memory: {draft.content[:50]}...")
+
+    def _store_drafts(self, drafts: List[MemoryDraft]) -> List[Memory]:
+        """Store extracted memories with one embedding call and one bulk upsert."""
+        return self.brain.remember_batch(
+            [
+                {
+                    "content": draft.content,
+                    "memory_type": draft.memory_type,
+                    "importance_score": draft.importance_score,
+                    "tags": draft.tags,
+                }
+                for draft in drafts
+            ],
+            deduplication_threshold=0.70,
+        )
+
+    def _wait_for_pending_writes(self):
+        """Let this turn's recall see memories extracted from earlier turns."""
+        if self.extraction_queue is None:
+            return
+        if not self.extraction_queue.wait_for_user(self.user_id, timeout=settings.extraction_wait_timeout_seconds):
+            logger.warning(f"Recalling before pending memory writes for user {self.user_id} finished")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Extract any turns still in the window and wait for this user's
+        background extraction to finish.
+
+        Returns:
+            False if writes were still pending after `timeout` seconds
+        """
+        self.extraction_window.flush()
+        if self.extraction_queue is None:
+            return True
+        return self.extraction_queue.wait_for_user(self.user_id, timeout=timeout)
+
 
     def reset_conversation(self):
         """Clear conversation history (but keep stored memories)."""
-        self.conversation_history = []
+        self.extraction_window.flush()
+        self.history.clear()
+        self._shown_memories = {}
+        self._turns_since_refresh = 0
         logger.info("Conversation history reset")
     
     def get_conversation_summary(self) -> str:
         """Get a summary of the conversation history."""
-        if not self.conversation_history:
+        messages = self.conversation_history
+        if not messages and not self.history.summary:
             return "No conversation yet."
         
         lines = []
-        for msg in self.conversation_history:
+        if self.history.summary:
+            lines.append(f"Earlier: {self.history.summary}")
+        for msg in messages:
             role = "You" if msg["role"] == "user" else "Assistant"
             lines.append(f"{role}: {msg['content']}")
         
@@ -0,0 +1,190 @@
+"""
+Bounded conversation history.
+Keeps recent turns verbatim and folds older ones into a rolling summary.
+"""
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from memory.context import Tokenizer, approx_token_count
+
+# (previous summary, messages to fold) -> new summary
+Summarizer = Callable[[str, List[dict]], str]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _summary_executor() -> ThreadPoolExecutor:
+    """Shared background pool for history summarization."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+    return _executor
+
+
+class ConversationHistory:
+    """
+    Token-bounded chat history with a rolling summary.
+
+    Turns are stored as [user, assistant] message pairs numbered from 0.
+    Once the history exceeds `max_tokens`, every turn except the last
+    `keep_turns` is handed to `summarizer` on a background thread together
+    with the current summary; when it returns, those turns are replaced by
+    the new summary. The response path never waits for it.
+
+    `messages()` always fits the budget: it returns the summary plus the
+    newest turns that fit (at least the last one), so turns waiting to be
+    summarized are simply left out of the prompt until the summary lands.
+
+    Example:
+        history = ConversationHistory(summarizer=llm.summarize_conversation, max_tokens=2000)
+        history.append_turn("Hi, I'm Aziz", "Hello Aziz!")
+        llm.generate_response(prompt, conversation_history=history.messages())
+    """
+
+    def __init__(
+        self,
+        summarizer: Optional[Summarizer] = None,
+        max_tokens: int = 2000,
+        keep_turns: int = 4,
+        tokenizer: Optional[Tokenizer] = None,
+    ):
+        """
+        Args:
+            summarizer: Folds old messages into the summary; None only truncates
+            max_tokens: Token budget of the rendered history
+            keep_turns: Most recent turns never folded into the summary
+            tokenizer: Callable returning the token count of a string
+        """
+        self.summarizer = summarizer
+        self.max_tokens = max_tokens
+        self.keep_turns = max(1, keep_turns)
+        self.tokenizer = tokenizer or approx_token_count
+        self._turns: List[Tuple[int, List[dict], int]] = []  # (number, messages, tokens)
+        self._next_turn = 0
+        self._summary = ""
+        self._summary_tokens = 0
+        self._pending: Optional[Future] = None
+        self._idle = threading.Event()
+        self._idle.set()
+        self._lock = threading.Lock()
+
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @property
+    def next_turn(self) -> int:
+        """Number the next appended turn will get."""
+        return self._next_turn
+
+    def append_turn(self, user_message: str, assistant_message: str, context: Optional[str] = None):
+        """Add a completed turn; `context` is the memory context it was answered with."""
+        user = {"role": "user", "content": user_message}
+        if context:
+            user["context"] = context
+        messages = [user, {"role": "assistant", "content": assistant_message}]
+        tokens = sum(self._message_tokens(message) for message in messages)
+        with self._lock:
+            self._turns.append((self._next_turn, messages, tokens))
+            self._next_turn += 1
+        self._maybe_summarize()
+
+    def messages(self) -> List[dict]:
+        """History to send to the LLM: summary first, then the newest turns within budget."""
+        with self._lock:
+            summary, turns = self._summary, self._visible_turns()
+        rendered = []
+        if summary:
+            rendered.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        for _, messages, _ in turns:
+            rendered.extend(dict(message) for message in messages)
+        return rendered
+
+    def first_visible_turn(self) -> int:
+        """Number of the oldest turn `messages()` currently includes."""
+        with self._lock:
+            turns = self._visible_turns()
+        return turns[0][0] if turns else self._next_turn
+
+    def all_messages(self) -> List[dict]:
+        """Every turn still kept verbatim (not yet folded into the summary)."""
+        with self._lock:
+            return [dict(message) for _, messages, _ in self._turns for message in messages]
+
+    def token_count(self) -> int:
+        with self._lock:
+            return self._summary_tokens + sum(tokens for _, _, tokens in self._turns)
+
+    def clear(self):
+        with self._lock:
+            self._turns = []
+            self._summary = ""
+            self._summary_tokens = 0
+            self._pending = None  # a running summarization is discarded when it lands
+            self._idle.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until no summarization is running (for shutdown and tests)."""
+        return self._idle.wait(timeout)
+
+    def _message_tokens(self, message: dict) -> int:
+        return self.tokenizer(message.get("content", "")) + self.tokenizer(message.get("context", ""))
+
+    def _visible_turns(self) -> List[Tuple[int, List[dict], int]]:
+        """Newest contiguous turns that fit next to the summary (lock held)."""
+        budget = self.max_tokens - self._summary_tokens
+        visible = []
+        for turn in reversed(self._turns):
+            if visible and turn[2] > budget:
+                break
+            visible.append(turn)
+            budget -= turn[2]
+        visible.reverse()
+        return visible
+
+    def _maybe_summarize(self):
+        with self._lock:
+            if (
+                self.summarizer is None
+                or self._pending is not None
+                or len(self._turns) <= self.keep_turns
+                or self._summary_tokens + sum(tokens for _, _, tokens in self._turns) <= self.max_tokens
+            ):
+                return
+            folding = self._turns[:-self.keep_turns]
+            previous = self._summary
+            pending = _summary_executor().submit(
+                self.summarizer,
+                previous,
+                [message for _, messages, _ in folding for message in messages],
+            )
+            self._pending = pending
+            self._idle.clear()
+        pending.add_done_callback(lambda future: self._fold(future, folding[-1][0]))
+
+    def _fold(self, future: Future, last_turn: int):
+        """Replace turns up to `last_turn` with the new summary."""
+        with self._lock:
+            if self._pending is not future:
+                return  # cleared meanwhile
+            self._pending = None
+            try:
+                summary = future.result()
+                self._summary = summary.strip()
+                self._summary_tokens = self.tokenizer(self._summary)
+                self._turns = [turn for turn in self._turns if turn[0] > last_turn]
+                logger.debug(f"Folded conversation turns up to #{last_turn} into the summary")
+            except Exception as e:
+                logger.error(f"Failed to summarize conversation history: {e}")
+                return
+            finally:
+                self._idle.set()
+        # Turns added while summarizing may already need another pass
+        self._maybe_summarize()
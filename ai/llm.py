@@ -4,13 +4,16 @@ Uses Google Gemini API.
 """
 
 import os
-from typing import List, Optional, Dict
+from typing import Dict, Iterator, List, Optional
 
 from loguru import logger
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
 
 from config.settings import settings
+from core.scheduler import CallPriority, current_priority, get_model_scheduler
+
+FALLBACK_RESPONSE = "Sorry, I couldn't generate a response at this time."
 
 class LLMClient:
     """
@@ -38,6 +41,7 @@ class LLMClient:
         )
         self.model_name = settings.ollama_model
         self.client_type = "langchain"
+        self.scheduler = get_model_scheduler()
     def generate_response(
         self,
         prompt: str,
@@ -49,38 +53,133 @@ class LLMClient:
     ) -> str:
         """Generate a response from Ollama using LangChain."""
         try: 
-            full_prompt = self._build_prompt(prompt, context)
-            logger.debug(f"Sending prompt to LLM (length: {len(full_prompt)} chars)")
-            
-            messages = []
-            if system_instruction:
-                messages.append(SystemMessage(content=system_instruction))
-            if conversation_history:
-                for msg in conversation_history:
-                    role = msg.get("role")
-                    content = msg.get("content", "")
-                    if not content:
-                        continue
-                    if role == "assistant":
-                        messages.append(AIMessage(content=content))
-                    elif role == "user":
-                        messages.append(HumanMessage(content=content))
-            messages.append(HumanMessage(content=full_prompt))
+            messages = self._build_messages(prompt, context, conversation_history, system_instruction)
             
             # Use LangChain's invoke method (automatically traced by LangSmith)
-            response = self.client.invoke(
-                messages,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            with self.scheduler.slot(current_priority(CallPriority.CHAT)):
+                response = self.client.invoke(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
             
             result = response.content
             logger.debug(f"LLM response: {result[:100]}...")
             return result
         except Exception as e:
             logger.error(f"Error generating LLM response: {e}")
-            return "Sorry, I couldn't generate a response at this time."
-        
+            return FALLBACK_RESPONSE
+
+    def generate_response_stream(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1000
+    ) -> Iterator[str]:
+        """
+        Generate a response token by token.
+
+        Same inputs as `generate_response`; yields text chunks as the model
+        produces them. If the call fails before the first chunk, the
+        fallback apology is yielded instead; a failure mid-stream is
+        re-raised so callers can tell a truncated answer from a full one.
+        """
+        messages = self._build_messages(prompt, context, conversation_history, system_instruction)
+        produced = 0
+        try:
+            # The slot is held until the stream ends or the caller closes it
+            with self.scheduler.slot(current_priority(CallPriority.CHAT)):
+                for chunk in self.client.stream(
+                    messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                ):
+                    text = chunk.content
+                    if text:
+                        produced += len(text)
+                        yield text
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+            if produced:
+                raise
+            yield FALLBACK_RESPONSE
+            return
+        logger.debug(f"LLM streamed response: {produced} chars")
+
+    def summarize_conversation(
+        self,
+        previous_summary: str,
+        messages: List[Dict[str, str]],
+        max_tokens: int = 300
+    ) -> str:
+        """
+        Fold conversation messages into a running summary.
+
+        Args:
+            previous_summary: Summary of everything before `messages` ("" if none)
+            messages: Turns to fold in, as {"role", "content"} dicts
+            max_tokens: Length limit of the new summary
+
+        Returns:
+            The updated summary
+        """
+        transcript = "\n".join(
+            f"{'User' if msg.get('role') == 'user' else 'Assistant'}: {msg.get('content', '')}"
+            for msg in messages
+            if msg.get("content")
+        )
+        prompt = (
+            "Update the running summary of a conversation between a user and an assistant.\n"
+            "Keep facts, decisions, open questions and anything the user asked to remember. "
+            "Be concise and write plain sentences.\n\n"
+            f"Current summary:\n{previous_summary or '(empty)'}\n\n"
+            f"New messages:\n{transcript}\n\n"
+            "Updated summary:"
+        )
+        # Background work: runs in the extraction class unless told otherwise
+        with self.scheduler.slot(current_priority(CallPriority.EXTRACTION)):
+            response = self.client.invoke(
+                [HumanMessage(content=prompt)],
+                temperature=0.2,
+                max_tokens=max_tokens
+            )
+        return response.content
+
+    def _build_messages(
+        self,
+        prompt: str,
+        context: Optional[str] = None,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        system_instruction: Optional[str] = None
+    ) -> List[BaseMessage]:
+        """Chat messages for a prompt: system instruction, history, then the prompt with its context."""
+        full_prompt = self._build_prompt(prompt, context)
+        logger.debug(f"Sending prompt to LLM (length: {len(full_prompt)} chars)")
+
+        messages: List[BaseMessage] = []
+        if system_instruction:
+            messages.append(SystemMessage(content=system_instruction))
+        if conversation_history:
+            for msg in conversation_history:
+                role = msg.get("role")
+                content = msg.get("content", "")
+                if not content:
+                    continue
+                if role == "assistant":
+                    messages.append(AIMessage(content=content))
+                elif role == "system":
+                    messages.append(SystemMessage(content=content))
+                elif role == "user":
+                    # Keep the memory context the turn was answered with,
+                    # so later turns can refer back to it
+                    if msg.get("context"):
+                        content = self._build_prompt(content, msg["context"])
+                    messages.append(HumanMessage(content=content))
+        messages.append(HumanMessage(content=full_prompt))
+        return messages
 
     def _build_prompt(
             self, 
@@ -0,0 +1,112 @@
+"""
+Local turn classification.
+Decides per chat turn whether memory retrieval and extraction are worth running.
+"""
+
+import importlib
+import re
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from config.settings import settings
+
+
+class TurnDecision(BaseModel):
+    """What a chat turn needs from the memory system."""
+    needs_retrieval: bool
+    needs_extraction: bool
+    reason: str = ""
+    replies_to_assistant: bool = False  # only meaningful next to the previous assistant message
+
+
+class BaseTurnClassifier(ABC):
+    """Abstract base class for turn classifiers (must be local and cheap)."""
+
+    @abstractmethod
+    def classify(self, user_message: str) -> TurnDecision:
+        pass
+
+
+class PassThroughTurnClassifier(BaseTurnClassifier):
+    """Always retrieve and extract (classification disabled)."""
+
+    def classify(self, user_message: str) -> TurnDecision:
+        return TurnDecision(needs_retrieval=True, needs_extraction=True, reason="classifier disabled")
+
+
+_SMALL_TALK = re.compile(
+    r"^(?:"
+    r"h(?:i|ello|ey|owdy)(?: there)?|yo|good (?:morning|afternoon|evening|night)"
+    r"|thanks?(?: you)?(?: (?:so|very) much)?(?: a lot)?|thx|ty|cheers|much appreciated"
+    r"|bye|goodbye|see (?:you|ya)(?: later)?|good ?night|take care|later"
+    r")(?: (?:and )?(?:thanks?(?: you)?|bye))*$"
+)
+# Answers to the assistant ("yes", "nope"): nothing to recall, but the
+# turn may confirm a fact the assistant asked about
+_SHORT_REPLY = re.compile(
+    r"^(?:"
+    r"ok(?:ay)?|k|kk|cool|great|nice|awesome|perfect|got it|i see|understood|makes sense|sounds good"
+    r"|yes|yeah|yep|yup|no|nope|nah|sure|of course|alright|right|fine|exactly|correct"
+    r"|lol|haha+|hmm+|wow|oh|ah"
+    r")(?: (?:and )?(?:thanks?(?: you)?|ok(?:ay)?|bye|cool|great))*$"
+)
+_QUESTION_START = re.compile(
+    r"^(?:what|who|whom|whose|where|when|why|how|which|do|does|did|is|are|was|were|can|could|"
+    r"should|would|will|have|has|tell me|remind me)\b"
+)
+_FIRST_PERSON = re.compile(r"\b(?:i|i'm|im|i've|i'd|i'll|me|my|mine|myself|we|we're|our|us)\b")
+_NON_WORDS = re.compile(r"[^\w\s']+")
+
+
+class HeuristicTurnClassifier(BaseTurnClassifier):
+    """
+    Regex heuristics, no model and no network.
+
+    - Pure small talk (greetings, thanks, goodbyes) and messages without
+      any word need neither retrieval nor extraction.
+    - Bare replies (yes/no, acknowledgements) skip retrieval but are still
+      extracted, since they may answer a question the assistant asked.
+    - Anything else retrieves.
+    - Questions that say nothing about the user ("what time is it?") skip
+      extraction; statements, and questions with first-person content
+      ("can you remind me my sister's name, she just moved"), extract.
+    """
+
+    def classify(self, user_message: str) -> TurnDecision:
+        text = " ".join(_NON_WORDS.sub(" ", user_message.lower()).split())
+        if not text:
+            return TurnDecision(needs_retrieval=False, needs_extraction=False, reason="no words")
+        if _SMALL_TALK.match(text):
+            return TurnDecision(needs_retrieval=False, needs_extraction=False, reason="small talk")
+        if _SHORT_REPLY.match(text):
+            return TurnDecision(
+                needs_retrieval=False, needs_extraction=True, reason="short reply", replies_to_assistant=True
+            )
+        is_question = user_message.rstrip().endswith("?") or bool(_QUESTION_START.match(text))
+        if is_question and not _FIRST_PERSON.search(text):
+            return TurnDecision(needs_retrieval=True, needs_extraction=False, reason="impersonal question")
+        return TurnDecision(needs_retrieval=True, needs_extraction=True, reason="informative")
+
+
+def get_turn_classifier(name: Optional[str] = None) -> BaseTurnClassifier:
+    """
+    Turn classifier selected by settings.chat_turn_classifier.
+
+    "heuristic" (default), "none" (always retrieve and extract), or a
+    "package.module:ClassName" path to a custom BaseTurnClassifier (e.g. a
+    small local model), instantiated without arguments.
+    """
+    name = (name or settings.chat_turn_classifier).strip()
+    if name == "heuristic":
+        return HeuristicTurnClassifier()
+    if name == "none":
+        return PassThroughTurnClassifier()
+    module_name, _, class_name = name.partition(":")
+    if not class_name:
+        raise ValueError(f"Unknown chat_turn_classifier: {name}")
+    classifier = getattr(importlib.import_module(module_name), class_name)()
+    logger.info(f"Using turn classifier {name}")
+    return classifier
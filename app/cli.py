@@ -9,7 +9,7 @@ import click
 from loguru import logger
 from datetime import datetime
 
-from core.brain import Brain
+from core.brain import Brain, get_embedder
 from models.memory import MemoryType
 
 
@@ -156,7 +156,9 @@ def forget(memory_id: str, user_id: str):
 @click.argument('query')
 @click.option('--user-id', '-u', default='default_user', help='User ID')
 @click.option('--max-memories', '-m', default=10, help='Max memories to include')
-def context(query: str, user_id: str, max_memories: int):
+@click.option('--max-tokens', '-t', type=int, default=None, help='Token budget (default from settings)')
+@click.option('--compact', is_flag=True, default=None, help='Omit score annotations')
+def context(query: str, user_id: str, max_memories: int, max_tokens: int, compact: bool):
     """
     Get formatted context for LLM.
     
@@ -166,10 +168,16 @@ def context(query: str, user_id: str, max_memories: int):
     try:
         brain = Brain(user_id=user_id)
         
-        context_str = brain.get_context(query, max_memories=max_memories)
+        memory_context = brain.build_context(
+            query, max_memories=max_memories, max_tokens=max_tokens, compact=compact
+        )
         
         click.echo(click.style("\n=== LLM Context ===", fg='cyan', bold=True))
-        click.echo(context_str)
+        click.echo(memory_context.text)
+        click.echo(click.style(
+            f"({memory_context.token_count} tokens, {len(memory_context.memory_ids)} memories)",
+            fg='cyan'
+        ))
         click.echo(click.style("==================\n", fg='cyan', bold=True))
         
     except Exception as e:
@@ -201,7 +209,8 @@ def stats(user_id: str):
 @cli.command()
 @click.option('--user-id', '-u', default='default_user', help='User ID')
 @click.option('--system', '-s', default=None, help='System instruction')
-def chat(user_id: str, system: str):
+@click.option('--stream/--no-stream', default=True, help='Print the response as it is generated')
+def chat(user_id: str, system: str, stream: bool):
     """
     Interactive chat with memory.
     
@@ -227,13 +236,21 @@ def chat(user_id: str, system: str):
             
             # Check for exit
             if user_message.lower() in ['quit', 'exit', 'bye']:
+                if not memory_chat.flush(timeout=30):
+                    click.echo(click.style("Some memories were still being saved.", fg='yellow'))
                 click.echo(click.style("\n👋 Goodbye!", fg='cyan', bold=True))
                 break
             
             # Get response
             try:
-                response = memory_chat.chat(user_message)
-                click.echo(click.style("Assistant: ", fg='blue', bold=True) + response)
+                if stream:
+                    click.echo(click.style("Assistant: ", fg='blue', bold=True), nl=False)
+                    for chunk in memory_chat.chat_stream(user_message):
+                        click.echo(chunk, nl=False)
+                    click.echo()
+                else:
+                    response = memory_chat.chat(user_message)
+                    click.echo(click.style("Assistant: ", fg='blue', bold=True) + response)
                 click.echo()
                 
             except Exception as e:
@@ -245,6 +262,40 @@ def chat(user_id: str, system: str):
         sys.exit(1)
 
 
+@cli.command()
+@click.option('--batch-size', '-b', default=256, help='Points per scroll page')
+@click.option('--reembed', is_flag=True, default=False,
+              help='Re-embed all memories, e.g. after changing the embedding model or dimension')
+def migrate(batch_size: int, reembed: bool):
+    """
+    Backfill payload fields and indexes on an existing collection.
+    
+    Example:
+        python -m app.cli migrate
+        python -m app.cli migrate --reembed
+    """
+    try:
+        from db.vectore_store import VectorStore
+        from intelligence.scorer import MemoryScorer
+
+        # Opening the store creates any missing payload indexes
+        vector_store = VectorStore(check_dimension=not reembed)
+        if reembed:
+            from core.scheduler import CallPriority, model_priority
+
+            with model_priority(CallPriority.BACKFILL):
+                count = vector_store.reembed_collection(get_embedder().embed_batch, batch_size=batch_size)
+            click.echo(click.style(f"✓ Re-embedded {count} memories", fg='green', bold=True))
+        updated = vector_store.backfill_timestamp_epochs(batch_size=batch_size)
+        click.echo(click.style(f"✓ Backfilled timestamp_epoch on {updated} memories", fg='green', bold=True))
+        updated = vector_store.backfill_static_scores(MemoryScorer().calculate_importance, batch_size=batch_size)
+        click.echo(click.style(f"✓ Backfilled static_score on {updated} memories", fg='green', bold=True))
+        
+    except Exception as e:
+        click.echo(click.style(f"✗ Error: {e}", fg='red', bold=True))
+        sys.exit(1)
+
+
 @cli.command()
 @click.option('--debug', is_flag=True, default=False, help='Enable debug logging')
 @click.option('--transport', type=click.Choice(['stdio', 'streamable-http'], case_sensitive=False), default='stdio', help='MCP transport')
@@ -6,6 +6,10 @@ class Settings(BaseSettings):
     gemini_api_key: str = ""
     embedding_model: str = "models/gemini-embedding-001"
     llm_model: str = "gemini-2.5-flash"  
+    gemini_embed_batch_size: int = 100  # texts per embed_content request
+    gemini_embed_max_workers: int = 4  # concurrent batch requests
+    gemini_embed_rpm: int = 100  # requests-per-minute quota
+    gemini_embed_tpm: int = 30_000  # tokens-per-minute quota
 
     # MCP
     mcp_enabled: bool = True
@@ -19,6 +23,16 @@ class Settings(BaseSettings):
     qdrant_port: int = 6333
     qdrant_api_key: Optional[str] = None
     qdrant_collection_name: str = "ai_brain_memories"
+    # Vector storage footprint
+    embedding_truncate_dimension: Optional[int] = None  # Matryoshka prefix length; None = full vectors
+    qdrant_quantization: str = "none"  # "none", "scalar" (int8) or "binary"
+    qdrant_quantization_always_ram: bool = True
+    qdrant_vectors_on_disk: bool = False  # keep full-precision originals on disk
+    qdrant_search_rescore: bool = True  # rescore quantized candidates with full vectors
+    qdrant_search_oversampling: float = 2.0
+    qdrant_upsert_batch_size: int = 256  # points per bulk upsert request
+    qdrant_upsert_parallel: int = 1  # concurrent bulk upsert requests
+    qdrant_pool_size: int = 16  # keep-alive HTTP connections per client
 
     # Ollama
     llm_provider: str = "ollama"  # or "gemini"
@@ -28,12 +42,81 @@ class Settings(BaseSettings):
     # Embedding provider
     embedding_provider: str = "ollama"  # "ollama" or "gemini"
     ollama_embedding_model: str = "mxbai-embed-large"
+    ollama_embed_batch_size: int = 64  # texts per /api/embed request
+    ollama_http_pool_size: int = 10  # keep-alive connections to Ollama
+
+    # Model call scheduler (one per process, shared by LLM and embedding calls)
+    # Class limits below model_max_concurrency keep slots free for interactive calls
+    model_scheduler_enabled: bool = True
+    model_max_concurrency: int = 4  # model calls in flight across all classes
+    model_concurrency_interactive_recall: int = 4
+    model_concurrency_chat: int = 3
+    model_concurrency_extraction_write: int = 1  # writes of streamed drafts, apart from extraction
+    model_concurrency_extraction: int = 2
+    model_concurrency_backfill: int = 1
+    model_queue_depth_interactive_recall: int = 64  # queued calls before new ones are rejected
+    model_queue_depth_chat: int = 32
+    model_queue_depth_extraction_write: int = 32
+    model_queue_depth_extraction: int = 32
+    model_queue_depth_backfill: int = 64
+
+    # Embedding cache
+    embedding_cache_enabled: bool = False
+    embedding_cache_path: str = ".neuromem/embedding_cache.sqlite3"
+    embedding_cache_max_entries: int = 100_000
+
+    # Embedding micro-batching (coalesces concurrent single-text calls)
+    embedding_coalesce_enabled: bool = False
+    embedding_coalesce_max_batch_size: int = 32
+    embedding_coalesce_max_wait_ms: float = 5.0
+    embedding_coalesce_max_in_flight: int = 4  # batches being embedded at once
     
     # Memory settings
     max_working_memory: int = 10
     importance_threshold: float = 0.3
     similarity_threshold: float = 0.7
     decay_rate: float = 0.01  
+    access_stats_buffer_enabled: bool = True  # write-behind access_count/last_accessed
+    access_stats_flush_interval_seconds: float = 5.0
+    access_stats_flush_max_pending: int = 500
+    recall_cache_enabled: bool = True  # reuse results of repeated recalls
+    recall_cache_max_entries: int = 2048
+    recall_cache_ttl_seconds: float = 30.0  # bounds staleness of decay/recency scores
+    semantic_cache_enabled: bool = True  # reuse candidates of paraphrased queries
+    semantic_cache_threshold: float = 0.98  # min query-to-query cosine similarity
+    semantic_cache_max_queries_per_user: int = 64
+    semantic_cache_ttl_seconds: float = 300.0
+
+    # Retrieval candidate over-fetch (ranker trims k*m candidates to top_k)
+    retrieval_candidate_multiplier: float = 3.0
+    retrieval_latency_budget_ms: Optional[float] = None  # adapt the multiplier to this search latency
+    retrieval_max_candidate_multiplier: float = 10.0
+    retrieval_max_candidates: int = 200
+    retrieval_mode: str = "auto"  # "python", "server" (Qdrant formula fusion) or "auto"
+
+    # LLM context packing
+    context_max_tokens: Optional[int] = 1000  # token budget of the memory context (None = unbounded)
+    context_tokenizer: str = "approx"  # "approx" or "tiktoken[:encoding]"
+    context_redundancy_threshold: float = 0.92  # drop memories this similar to a packed one
+    context_compact: bool = False  # omit type/importance/relevance annotations
+    chat_context_deltas: bool = True  # only send memories not yet shown in the conversation
+    chat_context_refresh_turns: int = 8  # resend the full context every N turns (0 = never)
+    chat_history_max_tokens: int = 2000  # token budget of the conversation history sent to the LLM
+    chat_history_keep_turns: int = 4  # recent turns never folded into the rolling summary
+    chat_history_summarize: bool = True  # summarize old turns in the background (else just drop them)
+    chat_background_extraction: bool = True  # extract/store memories after the response is returned
+    extraction_workers: int = 2  # concurrent background extraction jobs
+    extraction_max_attempts: int = 3  # tries per extraction LLM call and per stored memory
+    extraction_wait_timeout_seconds: float = 10.0  # max wait for pending writes before the next recall
+    extraction_window_turns: int = 1  # chat turns per extraction LLM call (e.g. 5 to batch)
+    extraction_idle_seconds: float = 60.0  # extract a partial window after this long without a turn
+    extraction_streaming: bool = True  # parse drafts as the LLM streams and store them in micro-batches
+    extraction_store_batch_size: int = 8  # drafts per embedding call + bulk upsert
+    extraction_store_batch_wait_ms: float = 250.0  # max age of a partial storage batch
+    chat_turn_classifier: str = "heuristic"  # "heuristic", "none" or "package.module:ClassName"
+
+    # Service container (shared clients per process)
+    brain_cache_max_users: int = 1024  # per-user Brain facades kept in the LRU
     
     # LangSmith settings
     langsmith_tracing: bool = False
@@ -60,4 +143,11 @@ class Settings(BaseSettings):
         else:  # gemini
             return 3072
 
+    @property
+    def vector_dimension(self) -> int:
+        """Dimension actually stored in Qdrant (after optional truncation)."""
+        if self.embedding_truncate_dimension:
+            return min(self.embedding_truncate_dimension, self.embedding_dimension)
+        return self.embedding_dimension
+
 settings = Settings()
\ No newline at end of file
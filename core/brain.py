@@ -3,28 +3,131 @@ Brain - Main orchestrator for the AI memory system.
 Provides high-level interface for storing, retrieving, and managing memories.
 """
 
-from datetime import datetime, timezone
-from typing import List, Optional
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional
 from loguru import logger
 
-from models.memory import Memory, MemoryType, MemoryQuery, MemorySearchResult
-from memory.store import MemoryStore
-from memory.retrieve import MemoryRetriever
-from memory.encoding.gemini import GeminiEmbedder
-from memory.encoding.ollama import OllamaEmbedder
-from db.vectore_store import VectorStore
+from models.memory import Memory, MemoryContext, MemoryType, MemoryQuery, MemorySearchResult
+from memory.store import AsyncMemoryStore, MemoryStore
+from memory.retrieve import AsyncMemoryRetriever, MemoryRetriever
+from memory.encoding.gemini import AsyncGeminiEmbedder, GeminiEmbedder
+from memory.encoding.ollama import AsyncOllamaEmbedder, OllamaEmbedder
+from memory.encoding.cache import AsyncCachedEmbedder, CachedEmbedder, EmbeddingCache
+from memory.encoding.batching import AsyncCoalescingEmbedder, CoalescingEmbedder
+from memory.encoding.scheduled import AsyncScheduledEmbedder, ScheduledEmbedder
+from memory.access_stats import AccessStatsBuffer, build_access_updates
+from memory.recall_cache import RecallCache, UserGenerations
+from memory.semantic_cache import SemanticQueryCache
+from memory.context import ContextPacker, context_packer_from_settings
+from db.vectore_store import AsyncVectorStore, VectorStore
+from core.scheduler import get_model_scheduler
 from config.settings import settings
 
+if TYPE_CHECKING:
+    from core.container import ServiceContainer
+
+# Similarity floor of the recall behind get_context / build_context
+CONTEXT_MIN_SIMILARITY = 0.5
+
+
+def _embedding_model_name() -> str:
+    """Model name of the configured embedding provider."""
+    if settings.embedding_provider == "ollama":
+        return settings.ollama_embedding_model
+    return settings.embedding_model
+
+
+def _build_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(
+        path=settings.embedding_cache_path,
+        max_entries=settings.embedding_cache_max_entries,
+    )
+
+
+def _coalescing_enabled(provider) -> bool:
+    """Whether to micro-batch calls to `provider` (only batch-capable providers)."""
+    if not settings.embedding_coalesce_enabled:
+        return False
+    if not provider.supports_coalescing:
+        logger.warning(f"Embedding provider {settings.embedding_provider} cannot coalesce calls, ignoring")
+        return False
+    return True
+
 
 def get_embedder():
     """Factory function to get the configured embedder."""
     if settings.embedding_provider == "ollama":
-        return OllamaEmbedder()
+        embedder = OllamaEmbedder()
     elif settings.embedding_provider == "gemini":
-        return GeminiEmbedder()
+        embedder = GeminiEmbedder()
     else:
         raise ValueError(f"Unknown embedding provider: {settings.embedding_provider}")
 
+    coalesce = _coalescing_enabled(embedder)
+    # Scheduler innermost: one slot per provider request
+    if settings.model_scheduler_enabled:
+        embedder = ScheduledEmbedder(embedder, get_model_scheduler())
+    if coalesce:
+        embedder = CoalescingEmbedder(
+            embedder,
+            max_batch_size=settings.embedding_coalesce_max_batch_size,
+            max_wait_ms=settings.embedding_coalesce_max_wait_ms,
+            max_in_flight=settings.embedding_coalesce_max_in_flight,
+        )
+    # Cache outermost: hits never wait in a coalescing window
+    if settings.embedding_cache_enabled:
+        embedder = CachedEmbedder(
+            embedder,
+            cache=_build_embedding_cache(),
+            provider=settings.embedding_provider,
+            model=_embedding_model_name(),
+        )
+    return embedder
+
+
+def get_async_embedder():
+    """Factory function to get the configured asyncio embedder."""
+    if settings.embedding_provider == "ollama":
+        embedder = AsyncOllamaEmbedder()
+    elif settings.embedding_provider == "gemini":
+        embedder = AsyncGeminiEmbedder()
+    else:
+        raise ValueError(f"Unknown embedding provider: {settings.embedding_provider}")
+
+    coalesce = _coalescing_enabled(embedder)
+    if settings.model_scheduler_enabled:
+        embedder = AsyncScheduledEmbedder(embedder, get_model_scheduler())
+    if coalesce:
+        embedder = AsyncCoalescingEmbedder(
+            embedder,
+            max_batch_size=settings.embedding_coalesce_max_batch_size,
+            max_wait_ms=settings.embedding_coalesce_max_wait_ms,
+            max_in_flight=settings.embedding_coalesce_max_in_flight,
+        )
+    if settings.embedding_cache_enabled:
+        embedder = AsyncCachedEmbedder(
+            embedder,
+            cache=_build_embedding_cache(),
+            provider=settings.embedding_provider,
+            model=_embedding_model_name(),
+        )
+    return embedder
+
+
+def _result_vectors(results: List[MemorySearchResult]) -> Optional[Dict[str, List[float]]]:
+    """Stored vectors returned with the search, or None if any result lacks one."""
+    if any(r.memory.embedding is None for r in results):
+        return None
+    return {str(r.memory.id): r.memory.embedding for r in results}
+
+
+def build_semantic_cache() -> SemanticQueryCache:
+    return SemanticQueryCache(
+        threshold=settings.semantic_cache_threshold,
+        max_queries_per_user=settings.semantic_cache_max_queries_per_user,
+        ttl_seconds=settings.semantic_cache_ttl_seconds,
+    )
+
 
 class Brain:
     """
@@ -34,23 +137,161 @@ class Brain:
         brain = Brain(user_id="aziz")
         brain.remember("I love spicy food")
         results = brain.recall("What food do I like?")
+
+        # From async code (e.g. the MCP server)
+        await brain.aremember("I love spicy food")
+        results = await brain.arecall("What food do I like?")
+
+    Sync and async components are created lazily on first use, so a Brain
+    driven only through the async API never opens blocking connections.
+    When `services` is given, components come from that shared container
+    instead and the Brain is only a cheap per-user view.
     """
-    def __init__(self, user_id):
+    def __init__(
+            self,
+            user_id,
+            buffer_access_stats: Optional[bool] = None,
+            services: Optional["ServiceContainer"] = None,
+            recall_cache_enabled: Optional[bool] = None,
+            semantic_cache_enabled: Optional[bool] = None,
+            ):
         """
         Initialize the brain for a specific user.
         
         Args:
             user_id: Unique identifier for the user
+            buffer_access_stats: Write access stats behind the recall path
+                (default from settings.access_stats_buffer_enabled)
+            services: Shared ServiceContainer to take components from
+            recall_cache_enabled: Reuse recent recall results
+                (default from settings.recall_cache_enabled)
+            semantic_cache_enabled: Reuse candidates of similar queries
+                (default from settings.semantic_cache_enabled)
         """
         self.user_id = user_id
+        self.services = services
+        self.buffer_access_stats = (
+            settings.access_stats_buffer_enabled
+            if buffer_access_stats is None
+            else buffer_access_stats
+        )
+        self.recall_cache_enabled = (
+            settings.recall_cache_enabled
+            if recall_cache_enabled is None
+            else recall_cache_enabled
+        )
+        self.semantic_cache_enabled = (
+            settings.semantic_cache_enabled
+            if semantic_cache_enabled is None
+            else semantic_cache_enabled
+        )
 
+        logger.info(f"Brain initialized for user: {user_id}")
 
-        self.embedder = get_embedder()
-        self.vector_store = VectorStore()
-        self.memory_store = MemoryStore(self.embedder, self.vector_store)
-        self.memory_retriever = MemoryRetriever(self.embedder, self.vector_store)
+    @cached_property
+    def embedder(self):
+        if self.services is not None:
+            return self.services.embedder
+        return get_embedder()
 
-        logger.info(f"Brain initialized for user: {user_id}")
+    @cached_property
+    def vector_store(self) -> VectorStore:
+        if self.services is not None:
+            return self.services.vector_store
+        return VectorStore()
+
+    @cached_property
+    def memory_store(self) -> MemoryStore:
+        if self.services is not None:
+            return self.services.memory_store
+        return MemoryStore(self.embedder, self.vector_store, on_delete=self._discard_access_stats)
+
+    @cached_property
+    def memory_retriever(self) -> MemoryRetriever:
+        # The shared retriever carries the container's semantic cache setting
+        if self.services is not None and self.semantic_cache_enabled == settings.semantic_cache_enabled:
+            return self.services.memory_retriever
+        return MemoryRetriever(
+            self.embedder,
+            self.vector_store,
+            semantic_cache=self.semantic_cache,
+            generations=self.generations,
+        )
+
+    @cached_property
+    def access_stats(self) -> AccessStatsBuffer:
+        if self.services is not None:
+            return self.services.access_stats
+        # The writer resolves the sync store lazily on the flusher thread,
+        # so async-only callers never build it on the event loop.
+        return AccessStatsBuffer(
+            writer=lambda updates: self.vector_store.update_access_stats(updates),
+            flush_interval=settings.access_stats_flush_interval_seconds,
+            max_pending=settings.access_stats_flush_max_pending,
+        )
+
+    @cached_property
+    def recall_cache(self) -> Optional[RecallCache]:
+        if not self.recall_cache_enabled:
+            return None
+        if self.services is not None:
+            return self.services.recall_cache
+        return RecallCache(
+            max_entries=settings.recall_cache_max_entries,
+            ttl_seconds=settings.recall_cache_ttl_seconds,
+        )
+
+    @cached_property
+    def semantic_cache(self) -> Optional[SemanticQueryCache]:
+        if not self.semantic_cache_enabled:
+            return None
+        if self.services is not None:
+            return self.services.semantic_cache
+        return build_semantic_cache()
+
+    @cached_property
+    def generations(self) -> UserGenerations:
+        if self.services is not None:
+            return self.services.user_generations
+        return UserGenerations()
+
+    @cached_property
+    def context_packer(self) -> ContextPacker:
+        if self.services is not None:
+            return self.services.context_packer
+        return context_packer_from_settings()
+
+    @cached_property
+    def async_embedder(self):
+        if self.services is not None:
+            return self.services.async_embedder
+        return get_async_embedder()
+
+    @cached_property
+    def async_vector_store(self) -> AsyncVectorStore:
+        if self.services is not None:
+            return self.services.async_vector_store
+        return AsyncVectorStore()
+
+    @cached_property
+    def async_memory_store(self) -> AsyncMemoryStore:
+        if self.services is not None:
+            return self.services.async_memory_store
+        return AsyncMemoryStore(
+            self.async_embedder, self.async_vector_store, on_delete=self._discard_access_stats
+        )
+
+    @cached_property
+    def async_memory_retriever(self) -> AsyncMemoryRetriever:
+        # The shared retriever carries the container's semantic cache setting
+        if self.services is not None and self.semantic_cache_enabled == settings.semantic_cache_enabled:
+            return self.services.async_memory_retriever
+        return AsyncMemoryRetriever(
+            self.async_embedder,
+            self.async_vector_store,
+            semantic_cache=self.semantic_cache,
+            generations=self.generations,
+        )
 
     def remember(
             self,
@@ -93,6 +334,7 @@ class Brain:
                 tags = tags or [],
                 deduplication_threshold = deduplication_threshold,
             )
+            self.invalidate_recall_cache()
             logger.info(f"Stored memory {memory.id[:8]} for user {self.user_id}")
             return memory
         
@@ -101,6 +343,54 @@ class Brain:
             logger.error(f"Failed to store memory: {e}")
             raise
 
+    def remember_batch(
+            self,
+            memories_data: List[dict],
+            deduplication_threshold: Optional[float] = None,
+            ) -> List[Memory]:
+        """
+        Store many memories at once (bulk ingest).
+
+        Embeddings are generated in batched provider calls. Unlike
+        `remember`, no per-item deduplication search is performed unless
+        `deduplication_threshold` is given.
+
+        Args:
+            memories_data: List of dicts with keys: content, and optionally
+                memory_type, importance_score, tags
+            deduplication_threshold: Merge items into similar stored memories
+
+        Returns:
+            List of stored Memory objects, in input order
+
+        Example:
+            brain.remember_batch([
+                {"content": "User lives in Tunis", "memory_type": MemoryType.SEMANTIC},
+                {"content": "User started a new job in March"},
+            ])
+        """
+        try:
+            prepared = []
+            for data in memories_data:
+                memory_type = data.get("memory_type", MemoryType.EPISODIC)
+                importance_score = data.get("importance_score")
+                if importance_score is None:
+                    importance_score = self._calculate_importance(data["content"], memory_type)
+                prepared.append({
+                    "content": data["content"],
+                    "user_id": self.user_id,
+                    "memory_type": memory_type,
+                    "importance_score": importance_score,
+                    "tags": data.get("tags") or [],
+                })
+            memories = self.memory_store.store_memory_batch(prepared, deduplication_threshold)
+            self.invalidate_recall_cache()
+            logger.info(f"Stored {len(memories)} memories in batch for user {self.user_id}")
+            return memories
+        except Exception as e:
+            logger.error(f"Failed to store memory batch: {e}")
+            raise
+
     def recall(
             
             self,
@@ -108,7 +398,8 @@ class Brain:
             memory_types: Optional[List[MemoryType]] = None,
             top_k: int = 5,
             min_similarity: float = 0.5,
-            tags: Optional[List[str]] = None
+            tags: Optional[List[str]] = None,
+            with_vectors: bool = False
 
             )-> List[MemorySearchResult]:
             
@@ -121,6 +412,7 @@ class Brain:
             top_k: Maximum number of results
             min_similarity: Minimum similarity threshold (0.0-1.0)
             tags: Filter by tags
+            with_vectors: Also return each memory's stored vector (memory.embedding)
                 
         Returns:
             List of MemorySearchResult sorted by relevance
@@ -133,16 +425,27 @@ class Brain:
             )
         """
         try: 
+            cache_key = RecallCache.make_key(
+                self.user_id, query, memory_types, tags, top_k, min_similarity, with_vectors
+            )
+            generation = self.generations.get(self.user_id)
+            cached = self._get_cached_recall(cache_key, generation)
+            if cached is not None:
+                return cached
+
             memory_query = MemoryQuery(
                 query_text=query,
                 user_id=self.user_id,
                 memory_types=memory_types,
                 top_k=top_k,
                 min_similarity=min_similarity,
-                tags=tags
+                tags=tags,
+                with_vectors=with_vectors
             )
             results = self.memory_retriever.retrieve_memories(memory_query)
             self._update_access_stats(results)
+            if self.recall_cache is not None:
+                self.recall_cache.put(cache_key, generation, results)
             logger.info(f"Retrieved {len(results)} memories for query: '{query}'")
             return results
         except Exception as e:
@@ -166,6 +469,8 @@ class Brain:
             success = self.vector_store.delete_memory(memory_id)
             
             if success:
+                self.invalidate_recall_cache()
+                self._discard_access_stats([memory_id])
                 logger.info(f"Deleted memory {memory_id}")
             else:
                 logger.warning(f"Failed to delete memory {memory_id}")
@@ -175,13 +480,21 @@ class Brain:
         except Exception as e:
             logger.error(f"Failed to delete memory: {e}")
             raise
-    def get_context(self, query:str, max_memories: int = 10) -> str:
+    def get_context(
+            self,
+            query: str,
+            max_memories: int = 10,
+            max_tokens: Optional[int] = None,
+            compact: Optional[bool] = None,
+            ) -> str:
         """
         Build context string from relevant memories for LLM.
         
         Args:
             query: Query to find relevant memories
             max_memories: Maximum number of memories to include
+            max_tokens: Token budget (default from settings.context_max_tokens)
+            compact: Omit score annotations (default from settings.context_compact)
             
         Returns:
             Formatted context string
@@ -190,25 +503,195 @@ class Brain:
             context = brain.get_context("What are my preferences?")
             # Use this context with your LLM
         """
+        return self.build_context(query, max_memories, max_tokens, compact).text
+
+    def build_context(
+            self,
+            query: str,
+            max_memories: int = 10,
+            max_tokens: Optional[int] = None,
+            compact: Optional[bool] = None,
+            shown: Optional[Dict[str, str]] = None,
+            ) -> MemoryContext:
+        """
+        Like `get_context`, but also reports the tokens used and the memories included.
+
+        The highest-value memories are packed greedily under the token
+        budget; near-duplicates of an already packed memory are skipped.
+        Memories in `shown` ({memory_id: content} already sent in this
+        conversation) are only referenced unless their content changed.
+        """
+        try:
+            check_redundancy = self.context_packer.redundancy_threshold < 1.0
+            results = self.recall(
+                query = query,
+                top_k = max_memories,
+                min_similarity = CONTEXT_MIN_SIMILARITY,
+                with_vectors = check_redundancy,
+            )
+            vectors = None
+            if check_redundancy and len(results) > 1:
+                vectors = _result_vectors(results)
+                if vectors is None:
+                    try:
+                        vectors = self.vector_store.get_vectors([r.memory.id for r in results])
+                    except Exception as e:
+                        logger.warning(f"Skipping redundancy check, could not load vectors: {e}")
+            context = self._pack_context(results, max_memories, max_tokens, compact, vectors, shown)
+            logger.debug(
+                f"Built context with {len(context.memory_ids)}/{len(results)} memories "
+                f"({context.token_count} tokens) for query: '{query}'"
+            )
+            return context
+        except Exception as e:
+            logger.error(f"Failed to build context: {e}")
+            raise
+
+    async def aremember(
+            self,
+            content: str,
+            memory_type: MemoryType = MemoryType.EPISODIC,
+            importance_score: Optional[float] = None,
+            tags: Optional[List[str]] = None,
+            deduplication_threshold: float = 0.70,
+            ) -> Memory:
+        """Async version of `remember`."""
+        try:
+            if importance_score is None:
+                importance_score = self._calculate_importance(content, memory_type)
+            memory = await self.async_memory_store.store_memory(
+                content = content,
+                user_id = self.user_id,
+                memory_type = memory_type,
+                importance_score = importance_score,
+                tags = tags or [],
+                deduplication_threshold = deduplication_threshold,
+            )
+            self.invalidate_recall_cache()
+            logger.info(f"Stored memory {memory.id[:8]} for user {self.user_id}")
+            return memory
+        except Exception as e:
+            logger.error(f"Failed to store memory: {e}")
+            raise
+
+    async def arecall(
+            self,
+            query: str,
+            memory_types: Optional[List[MemoryType]] = None,
+            top_k: int = 5,
+            min_similarity: float = 0.5,
+            tags: Optional[List[str]] = None,
+            with_vectors: bool = False
+            ) -> List[MemorySearchResult]:
+        """Async version of `recall`."""
+        try:
+            cache_key = RecallCache.make_key(
+                self.user_id, query, memory_types, tags, top_k, min_similarity, with_vectors
+            )
+            generation = self.generations.get(self.user_id)
+            cached = self._get_cached_recall(cache_key, generation)
+            if cached is not None:
+                return cached
+
+            memory_query = MemoryQuery(
+                query_text=query,
+                user_id=self.user_id,
+                memory_types=memory_types,
+                top_k=top_k,
+                min_similarity=min_similarity,
+                tags=tags,
+                with_vectors=with_vectors
+            )
+            results = await self.async_memory_retriever.retrieve_memories(memory_query)
+            await self._aupdate_access_stats(results)
+            if self.recall_cache is not None:
+                self.recall_cache.put(cache_key, generation, results)
+            logger.info(f"Retrieved {len(results)} memories for query: '{query}'")
+            return results
+        except Exception as e:
+            logger.error(f"Failed to retrieve memories: {e}")
+            raise
+
+    async def aforget(self, memory_id: str) -> bool:
+        """Async version of `forget`."""
+        try:
+            success = await self.async_vector_store.delete_memory(memory_id)
+            if success:
+                self.invalidate_recall_cache()
+                self._discard_access_stats([memory_id])
+                logger.info(f"Deleted memory {memory_id}")
+            else:
+                logger.warning(f"Failed to delete memory {memory_id}")
+            return success
+        except Exception as e:
+            logger.error(f"Failed to delete memory: {e}")
+            raise
+
+    async def aget_context(
+            self,
+            query: str,
+            max_memories: int = 10,
+            max_tokens: Optional[int] = None,
+            compact: Optional[bool] = None,
+            ) -> str:
+        """Async version of `get_context`."""
+        context = await self.abuild_context(query, max_memories, max_tokens, compact)
+        return context.text
+
+    async def abuild_context(
+            self,
+            query: str,
+            max_memories: int = 10,
+            max_tokens: Optional[int] = None,
+            compact: Optional[bool] = None,
+            shown: Optional[Dict[str, str]] = None,
+            ) -> MemoryContext:
+        """Async version of `build_context`."""
         try:
-            results = self.recall(query = query, top_k = max_memories)
-            if not results:
-                return "no relevent memories found."
-            context_parts = ["relevant memories about the user:\n"]
-            for i, result in enumerate(results, 1):
-                memory = result.memory
-                context_parts.append(
-                    f"{i}. {memory.content} "
-                    f"(type: {memory.memory_type.value}, "
-                    f"importance: {memory.importance_score:.2f}, "
-                    f"relevance: {result.final_score:.2f})"
-                )
-            context = "\n".join(context_parts)
-            logger.debug(f"Built context with {len(results)} memories for query: '{query}'")
+            check_redundancy = self.context_packer.redundancy_threshold < 1.0
+            results = await self.arecall(
+                query=query,
+                top_k=max_memories,
+                min_similarity=CONTEXT_MIN_SIMILARITY,
+                with_vectors=check_redundancy,
+            )
+            vectors = None
+            if check_redundancy and len(results) > 1:
+                vectors = _result_vectors(results)
+                if vectors is None:
+                    try:
+                        vectors = await self.async_vector_store.get_vectors([r.memory.id for r in results])
+                    except Exception as e:
+                        logger.warning(f"Skipping redundancy check, could not load vectors: {e}")
+            context = self._pack_context(results, max_memories, max_tokens, compact, vectors, shown)
+            logger.debug(
+                f"Built context with {len(context.memory_ids)}/{len(results)} memories "
+                f"({context.token_count} tokens) for query: '{query}'"
+            )
             return context
         except Exception as e:
             logger.error(f"Failed to build context: {e}")
             raise
+
+    def _pack_context(
+        self,
+        results: List[MemorySearchResult],
+        max_memories: int,
+        max_tokens: Optional[int],
+        compact: Optional[bool],
+        vectors: Optional[dict],
+        shown: Optional[Dict[str, str]] = None,
+    ) -> MemoryContext:
+        """Render recalled memories as an LLM context block within the token budget."""
+        return self.context_packer.pack(
+            results,
+            max_tokens=settings.context_max_tokens if max_tokens is None else max_tokens,
+            max_memories=max_memories,
+            vectors=vectors,
+            compact=compact,
+            shown=shown,
+        )
+
     def _calculate_importance(
         self,
         content: str,
@@ -234,17 +717,68 @@ class Brain:
         """
         Update access_count and last_accessed for retrieved memories.
         
-        Note: This is a simplified version. In production, you'd want to
-        batch update these in the database.
+        Buffered mode only records the increments in-process; they are
+        written later in one batched payload update. Unbuffered mode
+        writes them now, still as a single batched request.
+        """
+        memories = [result.memory for result in results]
+        if self.buffer_access_stats:
+            self.access_stats.record(memories)
+        elif memories:
+            self.vector_store.update_access_stats(build_access_updates(memories))
+    
+    async def _aupdate_access_stats(self, results: List[MemorySearchResult]):
+        """Async version of `_update_access_stats`."""
+        memories = [result.memory for result in results]
+        if self.buffer_access_stats:
+            self.access_stats.record(memories)
+        elif memories:
+            await self.async_vector_store.update_access_stats(build_access_updates(memories))
+
+    def invalidate_recall_cache(self):
+        """Mark this user's cached recall results as stale (call after any write)."""
+        self.generations.bump(self.user_id)
+
+    def recall_cache_stats(self) -> dict:
+        """Hit/miss counters of the recall cache (empty when disabled)."""
+        if self.recall_cache is None:
+            return {}
+        return self.recall_cache.stats()
+
+    def _get_cached_recall(self, cache_key, generation: int) -> Optional[List[MemorySearchResult]]:
+        """
+        Cached results for a recall, or None.
+        
+        A hit never touches the embedder or Qdrant; the access is still
+        counted when access stats are buffered in memory.
+        """
+        if self.recall_cache is None:
+            return None
+        results = self.recall_cache.get(cache_key, generation)
+        if results is None:
+            return None
+        if self.buffer_access_stats:
+            self.access_stats.record([result.memory for result in results])
+        logger.debug(f"Recall cache hit for user {self.user_id}")
+        return results
+
+    def _discard_access_stats(self, memory_ids: List[str]):
+        """Drop buffered access stats of deleted memories."""
+        if self.services is not None:
+            self.services.discard_access_stats(memory_ids)
+        elif "access_stats" in self.__dict__:
+            self.access_stats.discard(memory_ids)
+
+    def flush_access_stats(self) -> int:
+        """
+        Write buffered access stats now (e.g. before shutdown or in tests).
+        
+        Returns:
+            Number of memories flushed
         """
-        for result in results:
-            memory = result.memory
-            count = memory.access_count + 1
-            last_accessed = datetime.now(timezone.utc)
-            self.vector_store.update_memory_metadata(memory, {
-                "access_count": count,
-                "last_accessed": last_accessed
-            })
+        if "access_stats" not in self.__dict__:
+            return 0
+        return self.access_stats.flush()
     
     def count_memories(self) -> int:
         """
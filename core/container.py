@@ -0,0 +1,241 @@
+"""
+Process-wide service container.
+Owns the expensive clients (Qdrant, embedders, LLM) so per-request code only
+builds cheap per-user views over them.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, TypeVar
+
+from loguru import logger
+
+from ai.llm import LLMClient
+from core.brain import Brain, build_semantic_cache, get_async_embedder, get_embedder
+from core.scheduler import ModelCallScheduler, get_model_scheduler
+from db.vectore_store import AsyncVectorStore, VectorStore
+from memory.access_stats import AccessStatsBuffer
+from memory.extractor import MemoryExtractor
+from memory.extraction_queue import ExtractionQueue, extraction_queue_from_settings
+from memory.recall_cache import RecallCache, UserGenerations
+from memory.semantic_cache import SemanticQueryCache
+from memory.context import ContextPacker, context_packer_from_settings
+from memory.retrieve import AsyncMemoryRetriever, MemoryRetriever
+from memory.store import AsyncMemoryStore, MemoryStore
+from config.settings import settings
+
+T = TypeVar("T")
+
+
+class ServiceContainer:
+    """
+    Thread-safe holder of shared services.
+
+    Every component is created once, on first use, and then reused by all
+    callers: one pooled Qdrant client (sync and async), one embedder, one
+    LLM client and one memory extractor per process, all sharing one
+    ModelCallScheduler. `get_brain` returns per-user Brain facades from a
+    bounded LRU; they hold no clients of their own.
+
+    Async components are bound to the event loop that first uses them.
+
+    Example:
+        container = get_container()
+        brain = container.get_brain("aziz")
+        results = await brain.arecall("What food do I like?")
+    """
+
+    def __init__(self, max_brains: Optional[int] = None):
+        """
+        Args:
+            max_brains: Max per-user Brain facades kept (default from settings)
+        """
+        self.max_brains = max(1, max_brains or settings.brain_cache_max_users)
+        self._services = {}
+        self._lock = threading.RLock()
+        self._brains: "OrderedDict[str, Brain]" = OrderedDict()
+        self._brains_lock = threading.Lock()
+
+    def _get(self, name: str, factory: Callable[[], T]) -> T:
+        """Return the named service, creating it exactly once."""
+        service = self._services.get(name)
+        if service is not None:
+            return service
+        with self._lock:
+            service = self._services.get(name)
+            if service is None:
+                logger.info(f"Creating shared service: {name}")
+                service = factory()
+                self._services[name] = service
+            return service
+
+    @property
+    def embedder(self):
+        return self._get("embedder", get_embedder)
+
+    @property
+    def vector_store(self) -> VectorStore:
+        return self._get("vector_store", VectorStore)
+
+    @property
+    def memory_store(self) -> MemoryStore:
+        return self._get(
+            "memory_store",
+            lambda: MemoryStore(self.embedder, self.vector_store, on_delete=self.discard_access_stats),
+        )
+
+    @property
+    def memory_retriever(self) -> MemoryRetriever:
+        return self._get(
+            "memory_retriever",
+            lambda: MemoryRetriever(
+                self.embedder,
+                self.vector_store,
+                semantic_cache=self.semantic_cache,
+                generations=self.user_generations,
+            ),
+        )
+
+    @property
+    def access_stats(self) -> AccessStatsBuffer:
+        return self._get(
+            "access_stats",
+            lambda: AccessStatsBuffer(
+                writer=lambda updates: self.vector_store.update_access_stats(updates),
+                flush_interval=settings.access_stats_flush_interval_seconds,
+                max_pending=settings.access_stats_flush_max_pending,
+            ),
+        )
+
+    @property
+    def recall_cache(self) -> RecallCache:
+        return self._get(
+            "recall_cache",
+            lambda: RecallCache(
+                max_entries=settings.recall_cache_max_entries,
+                ttl_seconds=settings.recall_cache_ttl_seconds,
+            ),
+        )
+
+    @property
+    def semantic_cache(self) -> Optional[SemanticQueryCache]:
+        if not settings.semantic_cache_enabled:
+            return None
+        return self._get("semantic_cache", build_semantic_cache)
+
+    @property
+    def user_generations(self) -> UserGenerations:
+        return self._get("user_generations", UserGenerations)
+
+    @property
+    def context_packer(self) -> ContextPacker:
+        return self._get("context_packer", context_packer_from_settings)
+
+    @property
+    def async_embedder(self):
+        return self._get("async_embedder", get_async_embedder)
+
+    @property
+    def async_vector_store(self) -> AsyncVectorStore:
+        return self._get("async_vector_store", AsyncVectorStore)
+
+    @property
+    def async_memory_store(self) -> AsyncMemoryStore:
+        return self._get(
+            "async_memory_store",
+            lambda: AsyncMemoryStore(
+                self.async_embedder, self.async_vector_store, on_delete=self.discard_access_stats
+            ),
+        )
+
+    @property
+    def async_memory_retriever(self) -> AsyncMemoryRetriever:
+        return self._get(
+            "async_memory_retriever",
+            lambda: AsyncMemoryRetriever(
+                self.async_embedder,
+                self.async_vector_store,
+                semantic_cache=self.semantic_cache,
+                generations=self.user_generations,
+            ),
+        )
+
+    @property
+    def model_scheduler(self) -> ModelCallScheduler:
+        """Process-wide scheduler every LLM and embedding call goes through."""
+        return get_model_scheduler()
+
+    @property
+    def llm_client(self) -> LLMClient:
+        return self._get("llm_client", LLMClient)
+
+    @property
+    def memory_extractor(self) -> MemoryExtractor:
+        return self._get("memory_extractor", MemoryExtractor)
+
+    @property
+    def extraction_queue(self) -> ExtractionQueue:
+        return self._get(
+            "extraction_queue",
+            lambda: extraction_queue_from_settings(self.memory_extractor),
+        )
+
+    def get_brain(self, user_id: str) -> Brain:
+        """
+        Get the Brain facade for a user, creating it if needed.
+
+        Least recently used facades are dropped once `max_brains` is exceeded.
+        """
+        with self._brains_lock:
+            brain = self._brains.get(user_id)
+            if brain is not None:
+                self._brains.move_to_end(user_id)
+                return brain
+            brain = Brain(user_id=user_id, services=self)
+            self._brains[user_id] = brain
+            if len(self._brains) > self.max_brains:
+                self._brains.popitem(last=False)
+            return brain
+
+    def flush(self, timeout: Optional[float] = None):
+        """Finish background memory extraction and write any buffered access stats."""
+        if "extraction_queue" in self._services:
+            self._services["extraction_queue"].flush(timeout=timeout)
+        if "access_stats" in self._services:
+            self._services["access_stats"].flush()
+
+    def discard_access_stats(self, memory_ids: List[str]):
+        """Drop buffered access stats of deleted memories."""
+        if "access_stats" in self._services:
+            self._services["access_stats"].discard(memory_ids)
+
+    async def aclose(self):
+        """Flush buffers and close pooled async connections."""
+        await asyncio.to_thread(self.flush)
+        with self._lock:
+            closing = {
+                name: self._services.pop(name)
+                for name in list(self._services)
+                if name.startswith("async_")
+            }
+        with self._brains_lock:
+            self._brains.clear()
+        for service in closing.values():
+            close = getattr(service, "close", None)
+            if close is not None:
+                await close()
+
+
+_container: Optional[ServiceContainer] = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> ServiceContainer:
+    """Process-wide ServiceContainer singleton."""
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                _container = ServiceContainer()
+    return _container
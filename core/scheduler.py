@@ -0,0 +1,274 @@
+"""
+Shared scheduler for model calls.
+Bounds and prioritizes the LLM and embedding requests a process sends to the model server.
+"""
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Callable, Deque, Dict, Iterator, Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+
+class CallPriority(IntEnum):
+    """Call classes, most urgent first."""
+    INTERACTIVE_RECALL = 0  # query embeddings a user is waiting on
+    CHAT = 1  # chat generation and interactive writes
+    EXTRACTION_WRITE = 2  # storing drafts while their extraction stream still holds a slot
+    EXTRACTION = 3  # background memory work: extraction, its writes, history summaries
+    BACKFILL = 4  # bulk jobs (imports, re-embedding)
+
+
+class ModelOverloadedError(RuntimeError):
+    """Raised when a call class already has its maximum number of queued calls."""
+
+
+_current_priority: ContextVar[Optional[CallPriority]] = ContextVar("model_call_priority", default=None)
+
+
+@contextmanager
+def model_priority(priority: CallPriority) -> Iterator[None]:
+    """
+    Run the enclosed model calls in `priority`'s class.
+
+    Example:
+        with model_priority(CallPriority.BACKFILL):
+            brain.remember_batch(rows)
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority(default: CallPriority) -> CallPriority:
+    """The priority set by an enclosing `model_priority`, else `default`."""
+    priority = _current_priority.get()
+    return default if priority is None else priority
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued", "grant")
+
+    def __init__(self, priority: CallPriority, grant: Callable[[], None]):
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.grant = grant
+
+
+class ModelCallScheduler:
+    """
+    Priority scheduler with per-class concurrency and queue limits.
+
+    At most `max_concurrency` calls run at once, and at most
+    `class_limits[c]` of them from class c. Keeping the limits of the lower
+    classes under `max_concurrency` reserves slots for interactive calls.
+    When a slot frees up it goes to the oldest waiting call of the most
+    urgent class that is under its own limit.
+
+    A call whose class already has `queue_limits[c]` calls waiting is
+    rejected at once with ModelOverloadedError instead of queueing behind
+    them. None means unlimited for any of the limits.
+
+    Sync callers block in `slot`, asyncio callers await `aslot`; both share
+    the same slots. `stats` reports per-class queue waits.
+
+    Example:
+        scheduler = ModelCallScheduler(
+            max_concurrency=4,
+            class_limits={CallPriority.EXTRACTION: 2, CallPriority.BACKFILL: 1},
+        )
+        with scheduler.slot(CallPriority.CHAT):
+            response = client.invoke(messages)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = 4,
+        class_limits: Optional[Dict[CallPriority, Optional[int]]] = None,
+        queue_limits: Optional[Dict[CallPriority, Optional[int]]] = None,
+        wait_samples: int = 512,
+    ):
+        """
+        Args:
+            max_concurrency: Calls running at once across all classes
+            class_limits: Calls running at once per class
+            queue_limits: Calls waiting per class before new ones are rejected
+            wait_samples: Recent queue waits kept per class for percentiles
+        """
+        self.max_concurrency = max(1, max_concurrency) if max_concurrency is not None else None
+        self.class_limits = {priority: (class_limits or {}).get(priority) for priority in CallPriority}
+        self.queue_limits = {priority: (queue_limits or {}).get(priority) for priority in CallPriority}
+        self._active = {priority: 0 for priority in CallPriority}
+        self._queues: Dict[CallPriority, Deque[_Waiter]] = {priority: deque() for priority in CallPriority}
+        self._started = {priority: 0 for priority in CallPriority}
+        self._rejected = {priority: 0 for priority in CallPriority}
+        self._wait_total = {priority: 0.0 for priority in CallPriority}
+        self._wait_max = {priority: 0.0 for priority in CallPriority}
+        self._waits: Dict[CallPriority, Deque[float]] = {
+            priority: deque(maxlen=wait_samples) for priority in CallPriority
+        }
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def slot(self, priority: CallPriority) -> Iterator[None]:
+        """Hold a slot for one model call, waiting for it if needed."""
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    @asynccontextmanager
+    async def aslot(self, priority: CallPriority):
+        """Asyncio variant of `slot` that yields to the event loop while waiting."""
+        await self.aacquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def acquire(self, priority: CallPriority):
+        with self._lock:
+            if self._try_start(priority):
+                return
+            granted = threading.Event()
+            self._enqueue(_Waiter(priority, granted.set))
+        granted.wait()
+
+    async def aacquire(self, priority: CallPriority):
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def grant():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        with self._lock:
+            if self._try_start(priority):
+                return
+            waiter = _Waiter(priority, grant)
+            self._enqueue(waiter)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._queues[priority]:
+                    self._queues[priority].remove(waiter)
+                    return_slot = False
+                else:
+                    return_slot = True  # granted while being cancelled
+            if return_slot:
+                self.release(priority)
+            raise
+
+    def release(self, priority: CallPriority):
+        with self._lock:
+            self._active[priority] -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-class running/queued/started/rejected counts and queue waits in ms."""
+        with self._lock:
+            stats = {}
+            for priority in CallPriority:
+                started = self._started[priority]
+                waits = sorted(self._waits[priority])
+                stats[priority.name.lower()] = {
+                    "active": self._active[priority],
+                    "queued": len(self._queues[priority]),
+                    "started": started,
+                    "rejected": self._rejected[priority],
+                    "wait_ms_avg": 1000 * self._wait_total[priority] / started if started else 0.0,
+                    "wait_ms_p95": 1000 * waits[math.ceil(0.95 * len(waits)) - 1] if waits else 0.0,
+                    "wait_ms_max": 1000 * self._wait_max[priority],
+                }
+            return stats
+
+    def _try_start(self, priority: CallPriority) -> bool:
+        """Start at once if a slot is free and no call of the class is waiting (lock held)."""
+        if self._queues[priority] or not self._has_slot(priority):
+            return False
+        self._start(priority, 0.0)
+        return True
+
+    def _enqueue(self, waiter: _Waiter):
+        """Queue a call or reject it when its class queue is full (lock held)."""
+        queue = self._queues[waiter.priority]
+        limit = self.queue_limits[waiter.priority]
+        if limit is not None and len(queue) >= limit:
+            self._rejected[waiter.priority] += 1
+            logger.warning(f"Rejecting {waiter.priority.name} model call: {len(queue)} already queued")
+            raise ModelOverloadedError(
+                f"Too many queued {waiter.priority.name.lower()} model calls ({len(queue)})"
+            )
+        queue.append(waiter)
+
+    def _has_slot(self, priority: CallPriority) -> bool:
+        limit = self.class_limits[priority]
+        return (
+            (self.max_concurrency is None or sum(self._active.values()) < self.max_concurrency)
+            and (limit is None or self._active[priority] < limit)
+        )
+
+    def _start(self, priority: CallPriority, waited: float):
+        self._active[priority] += 1
+        self._started[priority] += 1
+        self._wait_total[priority] += waited
+        self._wait_max[priority] = max(self._wait_max[priority], waited)
+        self._waits[priority].append(waited)
+
+    def _dispatch(self):
+        """Hand free slots to waiting calls, most urgent class first (lock held)."""
+        now = time.monotonic()
+        for priority in CallPriority:
+            queue = self._queues[priority]
+            while queue and self._has_slot(priority):
+                waiter = queue.popleft()
+                self._start(priority, now - waiter.enqueued)
+                waiter.grant()
+
+
+def model_scheduler_from_settings() -> ModelCallScheduler:
+    """ModelCallScheduler configured by the model_* settings (unbounded when disabled)."""
+    if not settings.model_scheduler_enabled:
+        return ModelCallScheduler(max_concurrency=None)
+    return ModelCallScheduler(
+        max_concurrency=settings.model_max_concurrency,
+        class_limits={
+            CallPriority.INTERACTIVE_RECALL: settings.model_concurrency_interactive_recall,
+            CallPriority.CHAT: settings.model_concurrency_chat,
+            CallPriority.EXTRACTION_WRITE: settings.model_concurrency_extraction_write,
+            CallPriority.EXTRACTION: settings.model_concurrency_extraction,
+            CallPriority.BACKFILL: settings.model_concurrency_backfill,
+        },
+        queue_limits={
+            CallPriority.INTERACTIVE_RECALL: settings.model_queue_depth_interactive_recall,
+            CallPriority.CHAT: settings.model_queue_depth_chat,
+            CallPriority.EXTRACTION_WRITE: settings.model_queue_depth_extraction_write,
+            CallPriority.EXTRACTION: settings.model_queue_depth_extraction,
+            CallPriority.BACKFILL: settings.model_queue_depth_backfill,
+        },
+    )
+
+
+_scheduler: Optional[ModelCallScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_model_scheduler() -> ModelCallScheduler:
+    """Process-wide ModelCallScheduler singleton shared by every model client."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = model_scheduler_from_settings()
+    return _scheduler
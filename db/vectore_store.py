@@ -1,29 +1,413 @@
-from datetime import datetime, timedelta
+import asyncio
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from xmlrpc import client
-from qdrant_client import QdrantClient
+import httpx
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
     Distance, 
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
     VectorParams,
     Filter,
     FieldCondition,
+    IntegerIndexParams,
+    IsEmptyCondition,
+    KeywordIndexParams,
+    MatchAny,
     MatchValue,
-    PointIdsList
+    PayloadField,
+    PointIdsList,
+    PointStruct,
+    Range,
+    SetPayload,
+    SetPayloadOperation,
 )
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 from loguru import logger
 
+if TYPE_CHECKING:
+    from qdrant_client.models import FormulaQuery
+
 from config.settings import settings
-from models.memory import Memory, MemoryQuery, MemorySearchResult, MemoryType
+from models.memory import Memory, MemoryQuery, MemorySearchResult, MemoryType, RankingWeights
+
+
+def _http_limits() -> httpx.Limits:
+    """
+    Connection pool for the Qdrant REST client.
+
+    Passed as httpx limits rather than `pool_size`, which only
+    qdrant-client 1.16+ accepts.
+    """
+    return httpx.Limits(
+        max_connections=settings.qdrant_pool_size,
+        max_keepalive_connections=settings.qdrant_pool_size,
+    )
+
+
+def _collection_config() -> dict:
+    """Keyword arguments for creating the memories collection."""
+    return {
+        "vectors_config": VectorParams(
+            size=settings.vector_dimension,
+            distance=Distance.COSINE,
+            on_disk=settings.qdrant_vectors_on_disk
+        ),
+        "quantization_config": _quantization_config(),
+    }
+
+
+class CollectionDimensionError(RuntimeError):
+    """Raised when the collection's vector size differs from settings.vector_dimension."""
+
+
+def _check_vector_size(info, collection_name: str):
+    """Fail fast when the stored vectors do not match the configured dimension."""
+    size = getattr(info.config.params.vectors, "size", None)
+    if size is None or size == settings.vector_dimension:
+        return
+    raise CollectionDimensionError(
+        f"Collection '{collection_name}' stores {size}-dim vectors but the configured "
+        f"embedding dimension is {settings.vector_dimension} (embedding model or "
+        f"EMBEDDING_TRUNCATE_DIMENSION changed). Run `python -m app.cli migrate --reembed` "
+        f"to re-embed the stored memories, or restore the previous embedding settings."
+    )
+
+
+def _payload_index_schemas() -> Dict[str, Any]:
+    """Payload indexes used by search filters (user_id is the tenant key)."""
+    return {
+        "user_id": KeywordIndexParams(type="keyword", is_tenant=True),
+        "memory_type": KeywordIndexParams(type="keyword"),
+        "tags": KeywordIndexParams(type="keyword"),
+        "timestamp_epoch": IntegerIndexParams(type="integer", lookup=False, range=True),
+    }
+
+
+def _to_epoch(value: datetime) -> int:
+    """Unix seconds for a datetime; naive values are treated as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _quantization_config():
+    """Qdrant quantization config selected by settings.qdrant_quantization."""
+    mode = settings.qdrant_quantization.lower()
+    if mode == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8,
+                always_ram=settings.qdrant_quantization_always_ram
+            )
+        )
+    if mode == "binary":
+        return BinaryQuantization(
+            binary=BinaryQuantizationConfig(
+                always_ram=settings.qdrant_quantization_always_ram
+            )
+        )
+    if mode != "none":
+        raise ValueError(f"Unknown qdrant_quantization: {settings.qdrant_quantization}")
+    return None
+
+
+def _search_params() -> Optional[SearchParams]:
+    """Oversampling/rescoring parameters for quantized collections."""
+    if settings.qdrant_quantization.lower() == "none":
+        return None
+    return SearchParams(
+        quantization=QuantizationSearchParams(
+            rescore=settings.qdrant_search_rescore,
+            oversampling=settings.qdrant_search_oversampling
+        )
+    )
+
+
+def _prepare_vector(vector: Optional[List[float]]) -> Optional[List[float]]:
+    """
+    Truncate an embedding to the stored prefix dimension and re-normalize it.
+
+    Only meaningful for Matryoshka-trained models, whose leading
+    dimensions carry most of the signal. A no-op when truncation is off.
+    """
+    if vector is None or len(vector) <= settings.vector_dimension:
+        return vector
+    prefix = np.asarray(vector[:settings.vector_dimension], dtype=np.float32)
+    norm = np.linalg.norm(prefix)
+    if norm > 0:
+        prefix = prefix / norm
+    return prefix.tolist()
+
+
+def _memory_to_point(memory: Memory) -> PointStruct:
+    """Build the Qdrant point for a memory."""
+    payload = {
+        "content": memory.content,
+        "timestamp": memory.timestamp.isoformat(),
+        "timestamp_epoch": _to_epoch(memory.timestamp),
+        "memory_type": memory.memory_type.value,
+        "importance_score": memory.importance_score,
+        "user_id": memory.user_id,
+        "tags": memory.tags,
+        "last_accessed": memory.last_accessed.isoformat() if memory.last_accessed else None,
+        "access_count": memory.access_count
+    }
+    # Left out when unknown so backfill_static_scores can find the point
+    if memory.static_score is not None:
+        payload["static_score"] = memory.static_score
+    return PointStruct(
+        id=str(memory.id),
+        vector=_prepare_vector(memory.embedding),
+        payload=payload
+    )
+
+
+# Payload fields read by _payload_to_memory; search requests project onto these
+_MEMORY_PAYLOAD_FIELDS = [
+    "content",
+    "timestamp",
+    "memory_type",
+    "importance_score",
+    "user_id",
+    "tags",
+    "last_accessed",
+    "access_count",
+    "static_score",
+]
+
+
+def _payload_to_memory(point_id, payload: Dict[str, Any], vector: Optional[List[float]] = None) -> Memory:
+    """Rebuild a Memory from a Qdrant payload (and its stored vector, if fetched)."""
+    return Memory(
+        id=point_id,
+        content=payload["content"],
+        embedding=vector,
+        timestamp=datetime.fromisoformat(payload["timestamp"]),
+        memory_type=MemoryType(payload["memory_type"]),
+        importance_score=payload["importance_score"],
+        user_id=payload["user_id"],
+        tags=payload["tags"],
+        last_accessed=datetime.fromisoformat(payload["last_accessed"]) if payload.get("last_accessed") else None,
+        access_count=payload["access_count"],
+        static_score=payload.get("static_score")
+    )
+
+
+def _build_search_filter(query: MemoryQuery) -> Optional[Filter]:
+    """Translate a MemoryQuery into a Qdrant filter."""
+    filter_conditions = []
+    
+    if not query.allow_cross_user:
+        filter_conditions.append(
+            FieldCondition(
+                key="user_id", 
+                match=MatchValue(value=query.user_id))
+        )
+    if query.memory_types:
+        filter_conditions.append(
+            FieldCondition(
+                key="memory_type",
+                match=MatchAny(any=[mt.value for mt in query.memory_types])
+            )
+        )
+    
+    if query.tags:
+        filter_conditions.append(
+            FieldCondition(
+                key="tags",
+                match=MatchAny(any=query.tags)
+            )
+        )
+    
+    if query.time_window_days is not None:
+        time_threshold = datetime.now(timezone.utc) - timedelta(days=query.time_window_days)
+        filter_conditions.append(
+            FieldCondition(
+                key="timestamp_epoch",
+                range=Range(gte=_to_epoch(time_threshold))
+            )
+        )
+    
+    return Filter(must=filter_conditions) if filter_conditions else None
+
+
+def _points_to_results(points, query: MemoryQuery) -> List[MemorySearchResult]:
+    """Convert scored points into search results, applying min_similarity."""
+    memories = []
+    for result in points:
+        # Filter by minimum similarity threshold
+        if result.score < query.min_similarity:
+            continue
+            
+        memory = MemorySearchResult(
+            similarity_score=result.score,
+            final_score=result.score,  # Placeholder; apply weighting as needed
+            memory=_payload_to_memory(result.id, result.payload, result.vector)
+        )
+        memories.append(memory)
+    return memories
+
+
+# static_score of points written before the field existed (run `cli migrate`)
+_DEFAULT_STATIC_SCORE = 0.5
+
+
+def _fusion_query(weights: RankingWeights, now: float) -> "FormulaQuery":
+    """
+    MemoryRanker's final score as a Qdrant formula over the prefetch score:
+
+        similarity * w_s + static_score * w_i
+        + exp(-decay_rate * age_days) * w_r + (1 + 0.1 * ln(1 + access_count)) * w_a
+
+    exp_decay with midpoint exp(-decay_rate) at a one-day scale is exactly
+    the per-day exponential decay. The Python ranker caps the access boost
+    at 2.0, which only matters beyond ~22k accesses.
+
+    Formula queries need qdrant-client >= 1.14; on the older supported
+    clients (1.11-1.13, see requirements.txt) this raises ImportError and
+    retrievers rank in Python instead.
+    """
+    from qdrant_client.models import (
+        DecayParamsExpression,
+        ExpDecayExpression,
+        FormulaQuery,
+        LnExpression,
+        MultExpression,
+        SumExpression,
+    )
+
+    return FormulaQuery(
+        formula=SumExpression(sum=[
+            MultExpression(mult=[weights.similarity, "$score"]),
+            MultExpression(mult=[weights.importance, "static_score"]),
+            MultExpression(mult=[
+                weights.recency,
+                ExpDecayExpression(exp_decay=DecayParamsExpression(
+                    x="timestamp_epoch",
+                    target=now,
+                    scale=86400,
+                    midpoint=math.exp(-weights.decay_rate)
+                ))
+            ]),
+            MultExpression(mult=[
+                weights.access,
+                SumExpression(sum=[
+                    1.0,
+                    MultExpression(mult=[0.1, LnExpression(ln=SumExpression(sum=[1.0, "access_count"]))])
+                ])
+            ]),
+        ]),
+        defaults={
+            "static_score": _DEFAULT_STATIC_SCORE,
+            "access_count": 0,
+            "timestamp_epoch": now,
+        }
+    )
+
+
+def _fused_points_to_results(points, weights: RankingWeights, now: float) -> List[MemorySearchResult]:
+    """
+    Convert fused points into ranked results.
+
+    The point score is the final score; the similarity term is recovered
+    by subtracting the payload-derived terms of the same formula.
+    """
+    results = []
+    for point in points:
+        payload = point.payload
+        static_score = payload.get("static_score", _DEFAULT_STATIC_SCORE)
+        age_days = abs(now - payload.get("timestamp_epoch", now)) / 86400
+        recency = math.exp(-weights.decay_rate * age_days)
+        access_boost = 1.0 + 0.1 * math.log1p(payload.get("access_count", 0))
+        similarity = (
+            point.score
+            - static_score * weights.importance
+            - recency * weights.recency
+            - access_boost * weights.access
+        ) / weights.similarity if weights.similarity else 0.0
+        results.append(MemorySearchResult(
+            similarity_score=similarity,
+            final_score=point.score,
+            memory=_payload_to_memory(point.id, payload, point.vector)
+        ))
+    return results
+
+
+def _fused_search_request(
+        query: MemoryQuery,
+        query_embedding: List[float],
+        limit: Optional[int],
+        weights: RankingWeights,
+        now: float
+        ) -> dict:
+    """query_points arguments for a prefetch + formula search."""
+    from qdrant_client.models import Prefetch
+
+    return {
+        "prefetch": Prefetch(
+            query=_prepare_vector(query_embedding),
+            filter=_build_search_filter(query),
+            limit=max(limit or query.top_k, query.top_k),
+            params=_search_params(),
+            score_threshold=query.min_similarity
+        ),
+        "query": _fusion_query(weights, now),
+        "limit": query.top_k,
+        "with_payload": _MEMORY_PAYLOAD_FIELDS + ["timestamp_epoch"],
+        "with_vectors": query.with_vectors,
+    }
+
+
+def _set_payload_operations(updates: Dict[str, dict]) -> List[SetPayloadOperation]:
+    """One SetPayload operation per memory, for batch_update_points."""
+    return [
+        SetPayloadOperation(
+            set_payload=SetPayload(
+                payload=_serialize_metadata(fields),
+                points=[str(memory_id)]
+            )
+        )
+        for memory_id, fields in updates.items()
+    ]
+
+
+def _serialize_metadata(new_metadata: dict) -> dict:
+    """Convert datetime objects to ISO format strings."""
+    processed_metadata = {}
+    for key, value in new_metadata.items():
+        if isinstance(value, datetime):
+            processed_metadata[key] = value.isoformat()
+        else:
+            processed_metadata[key] = value
+    return processed_metadata
 
 class VectorStore:
-    def __init__(self):
-        """Initialize connection to Qdrant."""
-        self.client = QdrantClient(
+    def __init__(self, client: Optional[QdrantClient] = None, check_dimension: bool = True):
+        """
+        Initialize connection to Qdrant.
+
+        Args:
+            client: Existing client to reuse (default: a new pooled client)
+            check_dimension: Raise CollectionDimensionError when the existing
+                collection's vector size differs from settings.vector_dimension
+        """
+        self.client = client or QdrantClient(
             host=settings.qdrant_host,
             port=settings.qdrant_port,
-            api_key=settings.qdrant_api_key
+            api_key=settings.qdrant_api_key,
+            limits=_http_limits()
         )
         self.collection_name = settings.qdrant_collection_name
+        self.check_dimension = check_dimension
         self._initialize_collection()
     
     def _initialize_collection(self):
@@ -35,31 +419,45 @@ class VectorStore:
             logger.info(f"Creating collection: {self.collection_name}")
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=settings.embedding_dimension,
-                    distance=Distance.COSINE
-                )
+                **_collection_config()
             )
             logger.info(f"Collection {self.collection_name} created successfully")
         else:
             logger.info(f"Collection {self.collection_name} already exists")
+            if self.check_dimension:
+                _check_vector_size(self.client.get_collection(self.collection_name), self.collection_name)
+            self._apply_quantization()
+        self._ensure_payload_indexes()
+
+    def _ensure_payload_indexes(self):
+        """Create missing keyword/integer payload indexes used by filters."""
+        existing = self.client.get_collection(self.collection_name).payload_schema or {}
+        for field_name, schema in _payload_index_schemas().items():
+            if field_name in existing:
+                continue
+            logger.info(f"Creating payload index on {field_name}")
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=schema
+            )
+
+    def _apply_quantization(self):
+        """Enable configured quantization on an existing, unquantized collection."""
+        quantization = _quantization_config()
+        if quantization is None:
+            return
+        info = self.client.get_collection(self.collection_name)
+        if info.config.quantization_config is None:
+            logger.info(f"Enabling {settings.qdrant_quantization} quantization on {self.collection_name}")
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                quantization_config=quantization
+            )
     
     def upsert_memory(self, memory: Memory) -> bool:
         """Store or update a memory in Qdrant."""
-        point = {
-            "id": str(memory.id),
-            "vector": memory.embedding,
-            "payload": {
-                "content": memory.content,
-                "timestamp": memory.timestamp.isoformat(),
-                "memory_type": memory.memory_type.value,
-                "importance_score": memory.importance_score,
-                "user_id": memory.user_id,
-                "tags": memory.tags,
-                "last_accessed": memory.last_accessed.isoformat() if memory.last_accessed else None,
-                "access_count": memory.access_count
-            }
-        }
+        point = _memory_to_point(memory)
         self.client.upsert(
             collection_name=self.collection_name,
             points=[point]
@@ -69,75 +467,106 @@ class VectorStore:
         
         
     
-    def search_memories(self, query: MemoryQuery, query_embedding: List[float]) -> List[MemorySearchResult]:
-        """Search for similar memories."""
-        filter_conditions = []
+    def upsert_memories(
+        self,
+        memories: List[Memory],
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        wait: bool = True,
+    ) -> List[bool]:
+        """
+        Store or update many memories with chunked bulk upserts.
         
-        if not query.allow_cross_user:
-            filter_conditions.append(
-                FieldCondition(
-                    key="user_id", 
-                    match=MatchValue(value=query.user_id))
-            )
-        if query.memory_types:
-            filter_conditions.append(
-                FieldCondition(
-                    key="memory_type",
-                    match=MatchValue(any=[mt.value for mt in query.memory_types])
-                )
-            )
-        
-        if query.tags:
-            filter_conditions.append(
-                FieldCondition(
-                    key="tags",
-                    match=MatchValue(any=query.tags)
-                )
-            )
-        
-        if query.time_window_days is not None:
-            time_threshold = (datetime.now() - timedelta(days=query.time_window_days)).isoformat()
-            filter_conditions.append(
-                FieldCondition(
-                    key="timestamp",
-                    range={"gte": time_threshold}
+        Args:
+            memories: Memories to write (embeddings required)
+            batch_size: Points per upsert request (default from settings)
+            parallel: Concurrent upsert requests (default from settings)
+            wait: If False, chunks are sent without waiting for indexing and
+                the last chunk is sent with wait=True afterwards as a
+                consistency barrier (Qdrant applies updates in order).
+            
+        Returns:
+            Per-item success flags, aligned with `memories`
+        """
+        if not memories:
+            return []
+        batch_size = max(1, batch_size or settings.qdrant_upsert_batch_size)
+        parallel = max(1, parallel or settings.qdrant_upsert_parallel)
+        points = [_memory_to_point(memory) for memory in memories]
+        chunks = [
+            (start, points[start:start + batch_size])
+            for start in range(0, len(points), batch_size)
+        ]
+        statuses = [False] * len(points)
+
+        def send(chunk, wait_flag: bool):
+            start, chunk_points = chunk
+            try:
+                self.client.upsert(
+                    collection_name=self.collection_name,
+                    points=chunk_points,
+                    wait=wait_flag
                 )
+                statuses[start:start + len(chunk_points)] = [True] * len(chunk_points)
+            except Exception as e:
+                logger.error(f"Bulk upsert of {len(chunk_points)} points at offset {start} failed: {e}")
+
+        # With wait=False the final chunk is held back as the barrier
+        head, barrier = (chunks, None) if wait else (chunks[:-1], chunks[-1])
+        if parallel > 1 and len(head) > 1:
+            with ThreadPoolExecutor(max_workers=min(parallel, len(head))) as pool:
+                list(pool.map(lambda chunk: send(chunk, wait), head))
+        else:
+            for chunk in head:
+                send(chunk, wait)
+        if barrier is not None:
+            send(barrier, True)
+
+        logger.info(f"Bulk upserted {sum(statuses)}/{len(memories)} memories in {len(chunks)} requests")
+        return statuses
+
+    def search_memories(
+            self,
+            query: MemoryQuery,
+            query_embedding: List[float],
+            limit: Optional[int] = None,
+            fusion: Optional[RankingWeights] = None
+            ) -> List[MemorySearchResult]:
+        """
+        Search for similar memories.
+
+        Args:
+            query: Filters, top_k and min_similarity
+            query_embedding: Query vector
+            limit: Number of candidates to fetch (default: query.top_k);
+                larger values over-fetch for re-ranking
+            fusion: Rank inside Qdrant with these weights: `limit` candidates
+                are prefetched by similarity and the top_k by final score are
+                returned, already ranked (needs Qdrant >= 1.14)
+        """
+        if fusion is not None:
+            now = datetime.now(timezone.utc).timestamp()
+            search_results = self.client.query_points(
+                collection_name=self.collection_name,
+                **_fused_search_request(query, query_embedding, limit, fusion, now)
             )
-        
-        
-        search_filter = Filter(must=filter_conditions) if filter_conditions else None
+            memories = _fused_points_to_results(search_results.points, fusion, now)
+            logger.info(f"Fused search returned {len(memories)} memories for query: {query.query_text}")
+            return memories
+
+        search_filter = _build_search_filter(query)
         
         search_results = self.client.query_points(
             collection_name=self.collection_name,
-            query=query_embedding,
-            limit=query.top_k,
-            query_filter=search_filter
+            query=_prepare_vector(query_embedding),
+            limit=limit or query.top_k,
+            query_filter=search_filter,
+            search_params=_search_params(),
+            with_payload=_MEMORY_PAYLOAD_FIELDS,
+            with_vectors=query.with_vectors
         )
         
-        memories = []
-        for result in search_results.points:
-            # Filter by minimum similarity threshold
-            if result.score < query.min_similarity:
-                continue
-                
-            payload = result.payload
-            memory = MemorySearchResult(
-                similarity_score=result.score,
-                final_score=result.score,  # Placeholder; apply weighting as needed
-                memory=Memory(
-                    id=result.id,
-                    content=payload["content"],
-                    embedding=None,  # Embedding is not returned in search results
-                    timestamp=datetime.fromisoformat(payload["timestamp"]),
-                    memory_type=MemoryType(payload["memory_type"]),
-                    importance_score=payload["importance_score"],
-                    user_id=payload["user_id"],
-                    tags=payload["tags"],
-                    last_accessed=datetime.fromisoformat(payload["last_accessed"]) if payload["last_accessed"] else None,
-                    access_count=payload["access_count"]    
-                )
-            )
-            memories.append(memory)
+        memories = _points_to_results(search_results.points, query)
         
         logger.info(f"Search returned {len(memories)} memories for query: {query.query_text}")
         return memories
@@ -165,21 +594,22 @@ class VectorStore:
             logger.warning(f"Memory {memory_id} not found")
             return None
         
-        payload = result[0].payload
-        memory = Memory(
-            id=result[0].id,
-            content=payload["content"],
-            embedding=None,  # Embedding is not returned in retrieve results
-            timestamp=datetime.fromisoformat(payload["timestamp"]),
-            memory_type=payload["memory_type"],
-            importance_score=payload["importance_score"],
-            user_id=payload["user_id"],
-            tags=payload["tags"],
-            last_accessed=datetime.fromisoformat(payload["last_accessed"]) if payload.get("last_accessed") else None,
-            access_count=payload["access_count"]
-        )
+        memory = _payload_to_memory(result[0].id, result[0].payload)
         logger.info(f"Memory {memory_id} retrieved successfully")
         return memory
+
+    def get_vectors(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Stored vectors for the given memories, in one request (missing ids are omitted)."""
+        if not memory_ids:
+            return {}
+        points = self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[str(memory_id) for memory_id in memory_ids],
+            with_payload=False,
+            with_vectors=True
+        )
+        return {str(point.id): point.vector for point in points if point.vector is not None}
+
     def update_memory_metadata(self, memory: Memory, new_metadata: dict) -> bool:
         """Update metadata fields of a memory."""
         existing_memory = self.get_memory_by_id(memory.id)
@@ -187,13 +617,7 @@ class VectorStore:
             logger.error(f"Memory {memory.id} not found for metadata update")
             return False
         
-        # Convert datetime objects to ISO format strings
-        processed_metadata = {}
-        for key, value in new_metadata.items():
-            if isinstance(value, datetime):
-                processed_metadata[key] = value.isoformat()
-            else:
-                processed_metadata[key] = value
+        processed_metadata = _serialize_metadata(new_metadata)
         
         self.client.set_payload(
             collection_name=self.collection_name,
@@ -203,6 +627,23 @@ class VectorStore:
         logger.info(f"Memory {memory.id} metadata updated successfully")
         return True
     
+    def update_access_stats(self, updates: Dict[str, dict]) -> bool:
+        """
+        Write payload updates for many memories in one request.
+        
+        Args:
+            updates: {memory_id: {field: value}}; datetimes are ISO-encoded
+        """
+        if not updates:
+            return True
+        self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=_set_payload_operations(updates),
+            wait=False
+        )
+        logger.info(f"Access stats updated for {len(updates)} memories")
+        return True
+    
     def count_memories_for_user(self, user_id: str) -> int:
         """Count total number of memories for a user."""
         result = self.client.scroll(
@@ -221,4 +662,417 @@ class VectorStore:
         )
         count = len(result[0]) if result else 0
         logger.info(f"User {user_id} has {count} memories")
-        return count
\ No newline at end of file
+        return count
+
+    def backfill_timestamp_epochs(self, batch_size: int = 256) -> int:
+        """
+        Migration: add `timestamp_epoch` to points stored before it existed.
+
+        Scrolls points missing the field and writes each page back with a
+        single batched payload update.
+
+        Returns:
+            Number of points updated
+        """
+        return self._backfill_payload_field(
+            field_name="timestamp_epoch",
+            with_payload=["timestamp"],
+            compute=lambda point: (
+                _to_epoch(datetime.fromisoformat(point.payload["timestamp"]))
+                if point.payload.get("timestamp") else None
+            ),
+            batch_size=batch_size
+        )
+
+    def backfill_static_scores(self, score: Callable[[Memory], float], batch_size: int = 256) -> int:
+        """
+        Migration: add `static_score` to points stored before it existed.
+
+        Args:
+            score: Computes the static score of a memory (MemoryScorer.calculate_importance)
+            batch_size: Points per scroll page
+
+        Returns:
+            Number of points updated
+        """
+        return self._backfill_payload_field(
+            field_name="static_score",
+            with_payload=_MEMORY_PAYLOAD_FIELDS,
+            compute=lambda point: score(_payload_to_memory(point.id, point.payload)),
+            batch_size=batch_size
+        )
+
+    def reembed_collection(
+            self,
+            embed_batch: Callable[[List[str]], List[List[float]]],
+            batch_size: int = 64
+            ) -> int:
+        """
+        Rebuild the collection with the configured vector size by re-embedding
+        every memory's content.
+
+        Points are re-embedded into a staging collection. The collection is
+        then recreated (unless it already has the configured vector size) and
+        refilled from staging by upsert. Staging is deleted only once the
+        collection holds at least as many points. A rerun after a crash keeps
+        a complete staging collection and resumes the copy-back; a partial
+        one (fewer points than the live collection) is rebuilt.
+
+        Args:
+            embed_batch: Embeds a list of texts (the current embedder)
+            batch_size: Points per scroll page and embedding batch
+
+        Returns:
+            Number of memories in the rebuilt collection
+        """
+        staging = f"{self.collection_name}_reembed"
+        if self._staging_complete(staging):
+            logger.info(f"Resuming re-embed from complete staging collection {staging}")
+        else:
+            if self.client.collection_exists(staging):
+                self.client.delete_collection(staging)
+            self.client.create_collection(collection_name=staging, **_collection_config())
+            self._copy_points(
+                self.collection_name,
+                staging,
+                batch_size,
+                lambda points: embed_batch([point.payload["content"] for point in points]),
+            )
+        if self._vector_size(self.collection_name) != settings.vector_dimension:
+            if self.client.collection_exists(self.collection_name):
+                self.client.delete_collection(self.collection_name)
+            self.client.create_collection(collection_name=self.collection_name, **_collection_config())
+        self._copy_points(staging, self.collection_name, batch_size)
+        staged = self._count_points(staging)
+        restored = self._count_points(self.collection_name)
+        if restored < staged:
+            raise RuntimeError(
+                f"Re-embed copied {restored}/{staged} memories back into {self.collection_name}; "
+                f"kept {staging}, run the migration again to finish"
+            )
+        self.client.delete_collection(staging)
+        self._ensure_payload_indexes()
+        return restored
+
+    def _staging_complete(self, staging: str) -> bool:
+        """
+        Whether a leftover staging collection holds every memory.
+
+        Staging is filled while the live collection is untouched, so it is
+        complete once it has as many points; after the live collection was
+        dropped or partly refilled it has fewer.
+        """
+        if not self.client.collection_exists(staging):
+            return False
+        if not self.client.collection_exists(self.collection_name):
+            return True
+        return self._count_points(self.collection_name) <= self._count_points(staging)
+
+    def _count_points(self, collection_name: str) -> int:
+        return self.client.count(collection_name, exact=True).count
+
+    def _vector_size(self, collection_name: str) -> Optional[int]:
+        """Vector size of a collection, or None when it does not exist."""
+        if not self.client.collection_exists(collection_name):
+            return None
+        return getattr(self.client.get_collection(collection_name).config.params.vectors, "size", None)
+
+    def _copy_points(
+            self,
+            source: str,
+            target: str,
+            batch_size: int,
+            vectors: Optional[Callable[[List[Any]], List[List[float]]]] = None
+            ) -> int:
+        """
+        Copy every point of `source` into `target`, with vectors computed by
+        `vectors(page)` or, when None, the stored ones.
+        """
+        copied = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source,
+                limit=batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=vectors is None
+            )
+            if points:
+                page_vectors = [point.vector for point in points] if vectors is None else vectors(points)
+                self.client.upsert(
+                    collection_name=target,
+                    points=[
+                        PointStruct(id=point.id, vector=_prepare_vector(vector), payload=point.payload)
+                        for point, vector in zip(points, page_vectors)
+                    ],
+                    wait=True
+                )
+                copied += len(points)
+                logger.info(f"Copied {copied} points into {target}")
+            if offset is None:
+                break
+        return copied
+
+    def _backfill_payload_field(
+            self,
+            field_name: str,
+            with_payload: List[str],
+            compute: Callable[[Any], Any],
+            batch_size: int
+            ) -> int:
+        """
+        Scroll points missing `field_name` and write `compute(point)` back,
+        one batched payload update per page. Points for which `compute`
+        returns None are skipped.
+        """
+        missing_filter = Filter(
+            must=[IsEmptyCondition(is_empty=PayloadField(key=field_name))]
+        )
+        updated = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=missing_filter,
+                limit=batch_size,
+                offset=offset,
+                with_payload=with_payload,
+                with_vectors=False
+            )
+            operations = []
+            for point in points:
+                value = compute(point)
+                if value is None:
+                    continue
+                operations.append(
+                    SetPayloadOperation(
+                        set_payload=SetPayload(
+                            payload={field_name: value},
+                            points=[point.id]
+                        )
+                    )
+                )
+            if operations:
+                self.client.batch_update_points(
+                    collection_name=self.collection_name,
+                    update_operations=operations,
+                    wait=True
+                )
+                updated += len(operations)
+                logger.info(f"Backfilled {field_name} on {updated} points")
+            if offset is None:
+                break
+        return updated
+
+
+class AsyncVectorStore:
+    """
+    Asyncio counterpart of VectorStore built on AsyncQdrantClient.
+
+    The collection is checked lazily on first use, so constructing the
+    store never blocks the event loop.
+
+    Example:
+        store = AsyncVectorStore()
+        await store.upsert_memory(memory)
+        results = await store.search_memories(query, embedding)
+    """
+    def __init__(self, client: Optional[AsyncQdrantClient] = None):
+        """
+        Initialize async connection to Qdrant.
+
+        Args:
+            client: Existing client to reuse (default: a new pooled client)
+        """
+        self.client = client or AsyncQdrantClient(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            api_key=settings.qdrant_api_key,
+            limits=_http_limits()
+        )
+        self.collection_name = settings.qdrant_collection_name
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+
+    async def _ensure_collection(self):
+        """Create collection if it doesn't exist (once per store)."""
+        if self._initialized:
+            return
+        async with self._init_lock:
+            if self._initialized:
+                return
+            if not await self.client.collection_exists(self.collection_name):
+                logger.info(f"Creating collection: {self.collection_name}")
+                await self.client.create_collection(
+                    collection_name=self.collection_name,
+                    **_collection_config()
+                )
+                logger.info(f"Collection {self.collection_name} created successfully")
+            info = await self.client.get_collection(self.collection_name)
+            _check_vector_size(info, self.collection_name)
+            quantization = _quantization_config()
+            if quantization is not None and info.config.quantization_config is None:
+                logger.info(f"Enabling {settings.qdrant_quantization} quantization on {self.collection_name}")
+                await self.client.update_collection(
+                    collection_name=self.collection_name,
+                    quantization_config=quantization
+                )
+            existing = info.payload_schema or {}
+            for field_name, schema in _payload_index_schemas().items():
+                if field_name not in existing:
+                    await self.client.create_payload_index(
+                        collection_name=self.collection_name,
+                        field_name=field_name,
+                        field_schema=schema
+                    )
+            self._initialized = True
+
+    async def upsert_memory(self, memory: Memory) -> bool:
+        """Store or update a memory in Qdrant."""
+        await self._ensure_collection()
+        await self.client.upsert(
+            collection_name=self.collection_name,
+            points=[_memory_to_point(memory)]
+        )
+        logger.info(f"Memory {memory.id} upserted successfully")
+        return True
+
+    async def upsert_memories(
+        self,
+        memories: List[Memory],
+        batch_size: Optional[int] = None,
+        parallel: Optional[int] = None,
+        wait: bool = True,
+    ) -> List[bool]:
+        """Async version of VectorStore.upsert_memories."""
+        if not memories:
+            return []
+        await self._ensure_collection()
+        batch_size = max(1, batch_size or settings.qdrant_upsert_batch_size)
+        semaphore = asyncio.Semaphore(max(1, parallel or settings.qdrant_upsert_parallel))
+        points = [_memory_to_point(memory) for memory in memories]
+        chunks = [
+            (start, points[start:start + batch_size])
+            for start in range(0, len(points), batch_size)
+        ]
+        statuses = [False] * len(points)
+
+        async def send(chunk, wait_flag: bool):
+            start, chunk_points = chunk
+            async with semaphore:
+                try:
+                    await self.client.upsert(
+                        collection_name=self.collection_name,
+                        points=chunk_points,
+                        wait=wait_flag
+                    )
+                    statuses[start:start + len(chunk_points)] = [True] * len(chunk_points)
+                except Exception as e:
+                    logger.error(f"Bulk upsert of {len(chunk_points)} points at offset {start} failed: {e}")
+
+        head, barrier = (chunks, None) if wait else (chunks[:-1], chunks[-1])
+        await asyncio.gather(*(send(chunk, wait) for chunk in head))
+        if barrier is not None:
+            await send(barrier, True)
+        logger.info(f"Bulk upserted {sum(statuses)}/{len(memories)} memories in {len(chunks)} requests")
+        return statuses
+
+    async def search_memories(
+            self,
+            query: MemoryQuery,
+            query_embedding: List[float],
+            limit: Optional[int] = None,
+            fusion: Optional[RankingWeights] = None
+            ) -> List[MemorySearchResult]:
+        """Search for similar memories (see VectorStore.search_memories)."""
+        await self._ensure_collection()
+        if fusion is not None:
+            now = datetime.now(timezone.utc).timestamp()
+            search_results = await self.client.query_points(
+                collection_name=self.collection_name,
+                **_fused_search_request(query, query_embedding, limit, fusion, now)
+            )
+            memories = _fused_points_to_results(search_results.points, fusion, now)
+            logger.info(f"Fused search returned {len(memories)} memories for query: {query.query_text}")
+            return memories
+        search_results = await self.client.query_points(
+            collection_name=self.collection_name,
+            query=_prepare_vector(query_embedding),
+            limit=limit or query.top_k,
+            query_filter=_build_search_filter(query),
+            search_params=_search_params(),
+            with_payload=_MEMORY_PAYLOAD_FIELDS,
+            with_vectors=query.with_vectors
+        )
+        memories = _points_to_results(search_results.points, query)
+        logger.info(f"Search returned {len(memories)} memories for query: {query.query_text}")
+        return memories
+
+    async def delete_memory(self, memory_id: str) -> bool:
+        """Delete a memory by ID."""
+        await self._ensure_collection()
+        await self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=PointIdsList(
+                points=[str(memory_id)]
+            )
+        )
+        logger.info(f"Memory {memory_id} deleted successfully")
+        return True
+
+    async def get_memory_by_id(self, memory_id: str) -> Optional[Memory]:
+        """Retrieve a memory by its ID."""
+        await self._ensure_collection()
+        result = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[str(memory_id)]
+        )
+        if not result or not result[0].payload:
+            logger.warning(f"Memory {memory_id} not found")
+            return None
+        return _payload_to_memory(result[0].id, result[0].payload)
+
+    async def get_vectors(self, memory_ids: List[str]) -> Dict[str, List[float]]:
+        """Async version of VectorStore.get_vectors."""
+        if not memory_ids:
+            return {}
+        await self._ensure_collection()
+        points = await self.client.retrieve(
+            collection_name=self.collection_name,
+            ids=[str(memory_id) for memory_id in memory_ids],
+            with_payload=False,
+            with_vectors=True
+        )
+        return {str(point.id): point.vector for point in points if point.vector is not None}
+
+    async def update_memory_metadata(self, memory: Memory, new_metadata: dict) -> bool:
+        """Update metadata fields of a memory."""
+        existing_memory = await self.get_memory_by_id(memory.id)
+        if not existing_memory:
+            logger.error(f"Memory {memory.id} not found for metadata update")
+            return False
+        await self.client.set_payload(
+            collection_name=self.collection_name,
+            payload=_serialize_metadata(new_metadata),
+            points=[str(memory.id)]
+        )
+        logger.info(f"Memory {memory.id} metadata updated successfully")
+        return True
+
+    async def update_access_stats(self, updates: Dict[str, dict]) -> bool:
+        """Async version of VectorStore.update_access_stats."""
+        if not updates:
+            return True
+        await self._ensure_collection()
+        await self.client.batch_update_points(
+            collection_name=self.collection_name,
+            update_operations=_set_payload_operations(updates),
+            wait=False
+        )
+        logger.info(f"Access stats updated for {len(updates)} memories")
+        return True
+
+    async def close(self):
+        """Close the underlying HTTP/gRPC connections."""
+        await self.client.close()
@@ -12,8 +12,8 @@ from models.memory import MemoryType
 class PerformanceEvaluator:
     
     def evaluate(self, user_id: str = "perf_eval", n: int = 50) -> dict:
-        """Benchmark store and search latency."""
-        brain = Brain(user_id=user_id)
+        """Benchmark store and search latency (uncached searches)."""
+        brain = Brain(user_id=user_id, recall_cache_enabled=False, semantic_cache_enabled=False)
         
         # Benchmark store
         store_times = []
@@ -4,11 +4,15 @@ Retrieval quality evaluation using ranx.
 
 import json
 import math
-from typing import Dict, List
+import time
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 from ranx import Qrels, Run, evaluate
 from core.brain import Brain
-from models.memory import MemoryType
+from intelligence.ranker import MemoryRanker
+from memory.candidates import CandidateMultiplier
+from models.memory import MemoryQuery, MemoryType
 
 
 def _dcg(relevances: List[int], k: int) -> float:
@@ -48,8 +52,10 @@ class RetrievalEvaluator:
         """
         Evaluate retrieval quality using ranx.
         Returns a dictionary of evaluation metrics.
+
+        Recall and semantic caches are off, so every query is a fresh search.
         """
-        brain = Brain(user_id="eval_user")
+        brain = Brain(user_id="eval_user", recall_cache_enabled=False, semantic_cache_enabled=False)
         qrels_dict = {}
         run_dict = {}
         query_diagnostics = []
@@ -113,6 +119,88 @@ class RetrievalEvaluator:
         )[:3]
         return metrics
 
+    def evaluate_candidate_multipliers(
+        self,
+        multipliers: Sequence[float] = (1.0, 2.0, 3.0, 5.0, 10.0),
+        ndcg_target: Optional[float] = None,
+        top_k: int = 10,
+        k: int = 5,
+    ) -> dict:
+        """
+        Sweep the candidate over-fetch multiplier.
+
+        Each query is embedded once; for every multiplier the store fetches
+        top_k * m candidates and the ranker trims them to top_k. Search +
+        rank latency and nDCG@k / MRR are reported per multiplier, along with
+        the cheapest multiplier that reaches `ndcg_target` (or the best nDCG
+        when no target is given).
+        """
+        brain = Brain(user_id="eval_user_candidates", recall_cache_enabled=False, semantic_cache_enabled=False)
+        ranker = MemoryRanker()
+        per_multiplier = {
+            m: {"latencies_ms": [], "ndcg": [], "rr": [], "candidates": []}
+            for m in multipliers
+        }
+
+        for case in self.test_cases:
+            memory_ids = [
+                brain.remember(content=content, memory_type=MemoryType.SEMANTIC).id
+                for content in case["memories"]
+            ]
+            for query in case["queries"]:
+                expected_relevance = {
+                    memory_ids[int(idx)]: score
+                    for idx, score in query["relevance"].items()
+                }
+                memory_query = MemoryQuery(
+                    query_text=query["query"],
+                    user_id=brain.user_id,
+                    top_k=top_k,
+                    min_similarity=0.5,
+                )
+                embedding = brain.embedder.embed_query(query["query"])
+                for m in multipliers:
+                    limit = CandidateMultiplier(multiplier=m, max_multiplier=m).limit(top_k)
+                    started = time.perf_counter()
+                    candidates = brain.vector_store.search_memories(memory_query, embedding, limit=limit)
+                    results = ranker.rank_memories(candidates, top_k=top_k)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+
+                    relevances = [expected_relevance.get(r.memory.id, 0) for r in results]
+                    stats = per_multiplier[m]
+                    stats["latencies_ms"].append(elapsed_ms)
+                    stats["ndcg"].append(_ndcg_at_k(relevances, list(expected_relevance.values()), k))
+                    stats["rr"].append(_reciprocal_rank(relevances))
+                    stats["candidates"].append(len(candidates))
+
+        rows = []
+        for m, stats in per_multiplier.items():
+            if not stats["ndcg"]:
+                continue
+            rows.append({
+                "multiplier": m,
+                f"ndcg@{k}": float(np.mean(stats["ndcg"])),
+                "mrr": float(np.mean(stats["rr"])),
+                "latency_mean_ms": float(np.mean(stats["latencies_ms"])),
+                "latency_p95_ms": float(np.percentile(stats["latencies_ms"], 95)),
+                "mean_candidates": float(np.mean(stats["candidates"])),
+            })
+        if not rows:
+            return {"multipliers": [], "recommended_multiplier": None}
+
+        baseline = rows[0][f"ndcg@{k}"]
+        for row in rows:
+            row[f"ndcg@{k}_gain"] = row[f"ndcg@{k}"] - baseline
+
+        target = ndcg_target if ndcg_target is not None else max(row[f"ndcg@{k}"] for row in rows)
+        reaching = [row for row in rows if row[f"ndcg@{k}"] >= target - 1e-9]
+        recommended = min(reaching, key=lambda row: row["latency_mean_ms"]) if reaching else None
+        return {
+            "multipliers": rows,
+            "ndcg_target": target,
+            "recommended_multiplier": recommended["multiplier"] if recommended else None,
+        }
+
     def _build_query_diagnostic(
         self,
         scenario: str,
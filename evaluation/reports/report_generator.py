@@ -24,6 +24,7 @@ class ReportGenerator:
         print(f"  Recall@5:    {r['recall@5']:.3f}  {'✅' if r['recall@5'] > 0.7 else '❌'}")
         print(f"  NDCG@3:      {r['ndcg@3']:.3f}  {'✅' if r['ndcg@3'] > 0.7 else '❌'}")
         print(f"  MRR:         {r['mrr']:.3f}  {'✅' if r['mrr'] > 0.7 else '❌'}")
+        self._print_candidate_sweep(r.get("candidate_sweep"))
         self._print_worst_retrieval_cases(r.get("worst_cases", []))
         
         # Deduplication
@@ -39,6 +40,23 @@ class ReportGenerator:
         
         print("\n" + "="*50)
 
+    def _print_candidate_sweep(self, sweep: dict):
+        """Print quality and latency per candidate over-fetch multiplier."""
+        if not sweep or not sweep.get("multipliers"):
+            return
+
+        print("\n  Candidate Over-fetch Sweep:")
+        for row in sweep["multipliers"]:
+            ndcg_key = next(key for key in row if key.startswith("ndcg@") and not key.endswith("_gain"))
+            marker = "  <- recommended" if row["multiplier"] == sweep["recommended_multiplier"] else ""
+            print(
+                f"    x{row['multiplier']:<4g} "
+                f"{ndcg_key}={row[ndcg_key]:.3f} ({row[ndcg_key + '_gain']:+.3f}) | "
+                f"MRR={row['mrr']:.3f} | "
+                f"mean={row['latency_mean_ms']:.1f}ms p95={row['latency_p95_ms']:.1f}ms | "
+                f"candidates={row['mean_candidates']:.1f}{marker}"
+            )
+
     def _print_worst_retrieval_cases(self, worst_cases: list):
         """Print retrieval queries with the weakest ranking quality."""
         if not worst_cases:
@@ -25,6 +25,7 @@ def run_all(test_cases_path: str = "evaluation/data/test_cases.json"):
     print("Running retrieval evaluation...")
     retrieval_eval = RetrievalEvaluator(test_cases_path)
     results["retrieval"] = retrieval_eval.evaluate()
+    results["retrieval"]["candidate_sweep"] = retrieval_eval.evaluate_candidate_multipliers()
     
     # 2. Deduplication evaluation
     print("Running deduplication evaluation...")
@@ -6,6 +6,10 @@ Recent memories have higher weight, old memories decay over time.
 
 from datetime import datetime, timezone
 import math
+from typing import Optional
+
+import numpy as np
+
 from models.memory import Memory
 from config.settings import settings
 
@@ -50,4 +54,23 @@ class TemporalDecay:
         return decay_factor 
     
 
-    
\ No newline at end of file
+    
+    def calculate_decay_array(
+            self,
+            timestamp_epochs: np.ndarray,
+            now: Optional[float] = None
+            ) -> np.ndarray:
+        """
+        Vectorized `calculate_decay` over many memories.
+        
+        Args:
+            timestamp_epochs: Memory creation times as UTC epoch seconds
+            now: Reference time as epoch seconds, captured once (default: now)
+            
+        Returns:
+            Decay factors between 0.0 and 1.0
+        """
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        days_elapsed = (now - timestamp_epochs) / 86400
+        return np.exp(-self.decay_rate * days_elapsed)
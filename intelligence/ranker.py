@@ -3,10 +3,13 @@ Memory ranking system.
 Combines similarity, importance, recency, and access patterns into a final score.
 """
 
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import numpy as np
 from loguru import logger
 
-from models.memory import MemorySearchResult
+from models.memory import Memory, MemorySearchResult, RankingWeights
 from intelligence.scorer import MemoryScorer
 from intelligence.decay import TemporalDecay
 class MemoryRanker:
@@ -21,6 +24,9 @@ class MemoryRanker:
     
     Weighted formula:
         final_score = (similarity * w1) + (importance * w2) + (recency * w3) + (access * w4)
+
+    Scoring is vectorized: the per-memory fields are pulled into NumPy
+    arrays once and all signals are computed against a single "now".
     """
     def __init__(
             self,
@@ -50,12 +56,28 @@ class MemoryRanker:
         self.scorer = MemoryScorer()
         self.decay = TemporalDecay()
 
-    def rank_memories(self, search_results: List[MemorySearchResult])->List[MemorySearchResult]:
+    @property
+    def weights(self) -> RankingWeights:
+        """Final-score weights, e.g. for server-side score fusion."""
+        return RankingWeights(
+            similarity=self.similarity_weight,
+            importance=self.importance_weight,
+            recency=self.recency_weight,
+            access=self.access_weight,
+            decay_rate=self.decay.decay_rate,
+        )
+
+    def rank_memories(
+            self,
+            search_results: List[MemorySearchResult],
+            top_k: Optional[int] = None
+            )->List[MemorySearchResult]:
         """
         Re-rank search results using all intelligence signals.
         
         Args:
             search_results: List of MemorySearchResult from vector search
+            top_k: Keep only the best top_k results (None = all)
             
         Returns:
             Re-ranked list sorted by final_score (highest first)
@@ -63,11 +85,83 @@ class MemoryRanker:
         if not search_results:
             return []
         
-        for result in search_results:
-            result.final_score = self._calculate_final_score(result)
-        ranked_results = sorted(search_results, key=lambda r: r.final_score, reverse=True)
+        scores = self.score_memories(search_results)
+        for result, score in zip(search_results, scores):
+            result.final_score = float(score)
+        ranked_results = [search_results[i] for i in _top_k_indices(scores, top_k)]
         logger.info(f"Re-ranked {len(ranked_results)} memories")
         return ranked_results
+
+    def score_memories(
+            self,
+            search_results: List[MemorySearchResult],
+            now: Optional[float] = None
+            ) -> np.ndarray:
+        """
+        Final scores for many search results in one vectorized pass.
+        
+        Args:
+            search_results: Results to score
+            now: Reference time as UTC epoch seconds (default: captured once now)
+        """
+        memories = [result.memory for result in search_results]
+        return self.score_arrays(
+            similarity_scores=np.fromiter((r.similarity_score for r in search_results), float, len(memories)),
+            static_scores=self.static_scores(memories),
+            timestamp_epochs=np.fromiter((_epoch(m.timestamp) for m in memories), float, len(memories)),
+            access_counts=np.fromiter((m.access_count for m in memories), float, len(memories)),
+            now=now,
+        )
+
+    def static_scores(self, memories: List[Memory]) -> np.ndarray:
+        """
+        Stored `static_score` per memory.
+        
+        Only memories written before the field existed are scored from
+        importance, type and content length.
+        """
+        scores = np.fromiter(
+            (np.nan if m.static_score is None else m.static_score for m in memories),
+            float,
+            len(memories),
+        )
+        missing = np.flatnonzero(np.isnan(scores))
+        if missing.size:
+            legacy = [memories[i] for i in missing]
+            scores[missing] = self.scorer.calculate_importance_array(
+                np.fromiter((m.importance_score for m in legacy), float, len(legacy)),
+                [m.memory_type.value for m in legacy],
+                np.fromiter((len(m.content.strip()) for m in legacy), float, len(legacy)),
+            )
+        return scores
+
+    def score_arrays(
+            self,
+            similarity_scores: np.ndarray,
+            static_scores: np.ndarray,
+            timestamp_epochs: np.ndarray,
+            access_counts: np.ndarray,
+            now: Optional[float] = None
+            ) -> np.ndarray:
+        """
+        Final scores from column arrays, e.g. for offline re-scoring of
+        payloads scrolled from a whole collection.
+        
+        All arrays are aligned per memory. `static_scores` is the stored
+        importance signal (MemoryScorer.calculate_importance); see
+        TemporalDecay and MemoryScorer for the others.
+        """
+        if now is None:
+            now = datetime.now(timezone.utc).timestamp()
+        recency = self.decay.calculate_decay_array(timestamp_epochs, now)
+        access_boost = self.scorer.calculate_access_boost_array(access_counts)
+        return (
+            similarity_scores * self.similarity_weight +
+            static_scores * self.importance_weight +
+            recency * self.recency_weight +
+            access_boost * self.access_weight
+        )
+
     def _calculate_final_score(self, result: MemorySearchResult)->float:
         """
         Calculate final score for a single search result.
@@ -80,7 +174,10 @@ class MemoryRanker:
         """
         memory = result.memory
         similarity_score = result.similarity_score
-        importance = self.scorer.calculate_importance(memory)
+        importance = (
+            memory.static_score if memory.static_score is not None
+            else self.scorer.calculate_importance(memory)
+        )
         recency = self.decay.calculate_decay(memory)
         access_boost = self.scorer.calculate_access_boost(memory)
         final_score = (
@@ -89,4 +186,20 @@ class MemoryRanker:
             recency * self.recency_weight + 
             access_boost * self.access_weight
         )
-        return final_score
\ No newline at end of file
+        return final_score
+
+def _epoch(value: datetime) -> float:
+    """Unix seconds for a datetime; naive values are treated as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _top_k_indices(scores: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+    """Indices of the top_k highest scores, best first (ties in input order)."""
+    if top_k is not None and 0 < top_k < len(scores):
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(scores))
+    # lexsort sorts by the last key first: score descending, then position
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
@@ -2,6 +2,10 @@
 Memory importance scoring.
 Determines how valuable a memory is based on content, type, and access patterns.
 """
+from typing import Sequence
+
+import numpy as np
+
 from models.memory import Memory, MemoryType
 import math
 class MemoryScorer:
@@ -56,6 +60,37 @@ class MemoryScorer:
         boost = 1.0 + math.log1p(memory.access_count) * 0.1
         return min(boost, 2.0)
     
+    def calculate_importance_array(
+            self,
+            importance_scores: np.ndarray,
+            memory_types: Sequence[str],
+            content_lengths: np.ndarray
+            ) -> np.ndarray:
+        """
+        Vectorized `calculate_importance` over many memories.
+        
+        Args:
+            importance_scores: Stored importance_score per memory
+            memory_types: MemoryType values ("semantic"/"episodic") per memory
+            content_lengths: len(content.strip()) per memory
+        """
+        types = np.asarray(memory_types)
+        type_multiplier = np.where(
+            types == MemoryType.SEMANTIC.value,
+            self.semantic_weight,
+            np.where(types == MemoryType.EPISODIC.value, self.episodic_weight, 1.0),
+        )
+        length_factor = np.where(
+            content_lengths >= self.min_content_length,
+            1.0,
+            np.maximum(0.5 + content_lengths / (2 * self.min_content_length), 0.5),
+        )
+        return np.clip(importance_scores * type_multiplier * length_factor, 0.0, 1.0)
+
+    def calculate_access_boost_array(self, access_counts: np.ndarray) -> np.ndarray:
+        """Vectorized `calculate_access_boost` over many memories."""
+        return np.minimum(1.0 + np.log1p(access_counts) * 0.1, 2.0)
+    
     def _get_type_multiplier(self, memory_type: MemoryType)->float:
         """
         Get importance multiplier based on memory type.
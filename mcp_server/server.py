@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+import anyio
 from loguru import logger
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
 import uvicorn
 
@@ -20,6 +22,8 @@ except ModuleNotFoundError:
         sys.path.insert(0, str(project_root))
     from config.settings import settings
 
+from core.container import get_container
+
 try:
     from .tools import (
         chat as run_chat,
@@ -78,7 +82,7 @@ mcp = build_server()
 
 
 @mcp.tool(name="store_memory")
-def store_memory_tool(
+async def store_memory_tool(
     user_id: str,
     content: str,
     memory_type: str = "episodic",
@@ -87,7 +91,7 @@ def store_memory_tool(
     deduplication_threshold: float = 0.70,
 ):
     """Store a memory for a user."""
-    return run_store_memory(
+    return await run_store_memory(
         user_id=user_id,
         content=content,
         memory_type=memory_type,
@@ -98,7 +102,7 @@ def store_memory_tool(
 
 
 @mcp.tool(name="retrieve_memories")
-def retrieve_memories_tool(
+async def retrieve_memories_tool(
     user_id: str,
     query: str,
     top_k: int = 5,
@@ -107,7 +111,7 @@ def retrieve_memories_tool(
     tags: list[str] | None = None,
 ):
     """Retrieve memories for a user."""
-    return run_retrieve_memories(
+    return await run_retrieve_memories(
         user_id=user_id,
         query=query,
         top_k=top_k,
@@ -118,49 +122,74 @@ def retrieve_memories_tool(
 
 
 @mcp.tool(name="get_context")
-def get_context_tool(
+async def get_context_tool(
     user_id: str,
     query: str,
     max_memories: int = 10,
+    max_tokens: int | None = None,
+    compact: bool | None = None,
 ):
-    """Build memory context for a query."""
-    return run_get_context(user_id=user_id, query=query, max_memories=max_memories)
+    """Build memory context for a query within a token budget."""
+    return await run_get_context(
+        user_id=user_id,
+        query=query,
+        max_memories=max_memories,
+        max_tokens=max_tokens,
+        compact=compact,
+    )
 
 
 @mcp.tool(name="delete_memory")
-def delete_memory_tool(
+async def delete_memory_tool(
     user_id: str,
     memory_id: str,
 ):
     """Delete a stored memory."""
-    return run_delete_memory(user_id=user_id, memory_id=memory_id)
+    return await run_delete_memory(user_id=user_id, memory_id=memory_id)
 
 
 @mcp.tool(name="chat")
-def chat_tool(
+async def chat_tool(
     user_id: str,
     user_message: str,
+    ctx: Context,
     system_instruction: str | None = None,
     auto_extract: bool = True,
     max_context_memories: int = 10,
 ):
-    """Run a memory-aware chat turn."""
-    return run_chat(
+    """
+    Run a memory-aware chat turn.
+
+    When the request carries a progress token, the response is streamed as
+    progress notifications whose message is the next piece of text; the
+    result still holds the full response.
+    """
+    on_chunk = None
+    if ctx.request_context.meta is not None and ctx.request_context.meta.progressToken is not None:
+        sent = 0
+
+        async def on_chunk(chunk: str) -> None:
+            nonlocal sent
+            sent += len(chunk)
+            await ctx.report_progress(progress=sent, message=chunk)
+
+    return await run_chat(
         user_id=user_id,
         user_message=user_message,
         system_instruction=system_instruction,
         auto_extract=auto_extract,
         max_context_memories=max_context_memories,
+        on_chunk=on_chunk,
     )
 
 
 @mcp.tool(name="extract_memories")
-def extract_memories_tool(
+async def extract_memories_tool(
     user_message: str,
     assistant_message: str,
 ):
     """Extract memories from a conversation turn."""
-    return run_extract_memories(user_message=user_message, assistant_message=assistant_message)
+    return await run_extract_memories(user_message=user_message, assistant_message=assistant_message)
 
 
 def main(
@@ -177,7 +206,35 @@ def main(
     server = mcp
 
     if transport in {"streamable-http", "http"}:
-        uvicorn.run(server.streamable_http_app(), host=host, port=port)
+        uvicorn.run(_closing_services(server.streamable_http_app()), host=host, port=port)
         return
 
-    server.run(transport="stdio")
+    anyio.run(_run_stdio, server)
+
+
+async def _run_stdio(server: FastMCP) -> None:
+    try:
+        await server.run_stdio_async()
+    finally:
+        await get_container().aclose()
+
+
+def _closing_services(app):
+    """
+    Close the shared services when the HTTP app shuts down.
+
+    Hooked into the Starlette app's lifespan rather than FastMCP's, which
+    runs once per MCP session.
+    """
+    inner = app.router.lifespan_context
+
+    @asynccontextmanager
+    async def lifespan(app):
+        try:
+            async with inner(app) as state:
+                yield state
+        finally:
+            await get_container().aclose()
+
+    app.router.lifespan_context = lifespan
+    return app
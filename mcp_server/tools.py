@@ -2,21 +2,25 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
 
 from core.brain import Brain
+from core.container import get_container
 from ai.chat import ChatManager
-from memory.extractor import MemoryExtractor
 from models.memory import Memory, MemoryDraft, MemorySearchResult, MemoryType
 
 from .schemas import serialize_drafts, serialize_memory, serialize_search_results
 
 
 def _build_brain(user_id: str) -> Brain:
-    return Brain(user_id=user_id)
+    # Per-user facade over the process-wide clients; no per-call setup.
+    return get_container().get_brain(user_id)
 
 
-def store_memory(
+async def store_memory(
     *,
     user_id: str,
     content: str,
@@ -27,7 +31,7 @@ def store_memory(
 ) -> Dict[str, Any]:
     brain = _build_brain(user_id)
     resolved_type = MemoryType.SEMANTIC if memory_type == "semantic" else MemoryType.EPISODIC
-    memory = brain.remember(
+    memory = await brain.aremember(
         content=content,
         memory_type=resolved_type,
         importance_score=importance_score,
@@ -37,7 +41,7 @@ def store_memory(
     return serialize_memory(memory)
 
 
-def retrieve_memories(
+async def retrieve_memories(
     *,
     user_id: str,
     query: str,
@@ -53,7 +57,7 @@ def retrieve_memories(
             MemoryType.SEMANTIC if memory_type == "semantic" else MemoryType.EPISODIC
             for memory_type in memory_types
         ]
-    results = brain.recall(
+    results = await brain.arecall(
         query=query,
         memory_types=resolved_types,
         top_k=top_k,
@@ -63,22 +67,43 @@ def retrieve_memories(
     return serialize_search_results(results)
 
 
-def get_context(
+async def get_context(
     *,
     user_id: str,
     query: str,
     max_memories: int = 10,
+    max_tokens: Optional[int] = None,
+    compact: Optional[bool] = None,
 ) -> Dict[str, Any]:
     brain = _build_brain(user_id)
-    return {"context": brain.get_context(query=query, max_memories=max_memories)}
+    context = await brain.abuild_context(
+        query=query, max_memories=max_memories, max_tokens=max_tokens, compact=compact
+    )
+    return {
+        "context": context.text,
+        "token_count": context.token_count,
+        "memory_ids": context.memory_ids,
+    }
 
 
-def delete_memory(*, user_id: str, memory_id: str) -> Dict[str, Any]:
+async def delete_memory(*, user_id: str, memory_id: str) -> Dict[str, Any]:
     brain = _build_brain(user_id)
-    return {"success": brain.forget(memory_id)}
+    return {"success": await brain.aforget(memory_id)}
+
+
+def _chat_manager(user_id: str, system_instruction: Optional[str]) -> ChatManager:
+    container = get_container()
+    return ChatManager(
+        user_id=user_id,
+        system_instruction=system_instruction,
+        brain=container.get_brain(user_id),
+        llm_client=container.llm_client,
+        memory_extractor=container.memory_extractor,
+        extraction_queue=container.extraction_queue,
+    )
 
 
-def chat(
+def _run_chat(
     *,
     user_id: str,
     user_message: str,
@@ -86,20 +111,102 @@ def chat(
     auto_extract: bool = True,
     max_context_memories: int = 10,
 ) -> Dict[str, Any]:
-    chat_manager = ChatManager(user_id=user_id, system_instruction=system_instruction)
+    chat_manager = _chat_manager(user_id, system_instruction)
     response = chat_manager.chat(
         user_message=user_message,
         auto_extract=auto_extract,
         max_context_memories=max_context_memories,
     )
+    # One-shot manager: queue its turn now instead of waiting for the idle timer
+    chat_manager.extraction_window.flush()
     return {"response": response}
 
 
-def extract_memories(
+def _run_chat_stream(
     *,
+    user_id: str,
     user_message: str,
-    assistant_message: str,
-) -> List[Dict[str, Any]]:
-    extractor = MemoryExtractor()
+    emit: Callable[[str], None],
+    system_instruction: Optional[str] = None,
+    auto_extract: bool = True,
+    max_context_memories: int = 10,
+) -> Dict[str, Any]:
+    chat_manager = _chat_manager(user_id, system_instruction)
+    chunks: List[str] = []
+    for chunk in chat_manager.chat_stream(
+        user_message=user_message,
+        auto_extract=auto_extract,
+        max_context_memories=max_context_memories,
+    ):
+        chunks.append(chunk)
+        emit(chunk)
+    chat_manager.extraction_window.flush()
+    return {"response": "".join(chunks)}
+
+
+async def chat(
+    *,
+    user_id: str,
+    user_message: str,
+    system_instruction: Optional[str] = None,
+    auto_extract: bool = True,
+    max_context_memories: int = 10,
+    on_chunk: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> Dict[str, Any]:
+    # The LLM client is synchronous; keep it off the event loop.
+    if on_chunk is None:
+        return await asyncio.to_thread(
+            _run_chat,
+            user_id=user_id,
+            user_message=user_message,
+            system_instruction=system_instruction,
+            auto_extract=auto_extract,
+            max_context_memories=max_context_memories,
+        )
+
+    # Streaming: the worker thread hands chunks to the loop, which forwards
+    # them; chunks that pile up while a send is in flight go out together.
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue[Optional[str]] = asyncio.Queue()
+    worker = asyncio.ensure_future(
+        asyncio.to_thread(
+            _run_chat_stream,
+            user_id=user_id,
+            user_message=user_message,
+            emit=lambda chunk: loop.call_soon_threadsafe(chunks.put_nowait, chunk),
+            system_instruction=system_instruction,
+            auto_extract=auto_extract,
+            max_context_memories=max_context_memories,
+        )
+    )
+    worker.add_done_callback(lambda _: chunks.put_nowait(None))
+    forwarding, done = True, False
+    while not done:
+        pending = [await chunks.get()]
+        while not chunks.empty():
+            pending.append(chunks.get_nowait())
+        if None in pending:
+            done = True
+            pending = pending[:pending.index(None)]
+        if pending and forwarding:
+            try:
+                await on_chunk("".join(pending))
+            except Exception as e:
+                # The client went away; still finish and record the turn
+                logger.warning(f"Failed to forward chat output: {e}")
+                forwarding = False
+    return await worker
+
+
+def _run_extract_memories(user_message: str, assistant_message: str) -> List[Dict[str, Any]]:
+    extractor = get_container().memory_extractor
     drafts = extractor.extract_memories(user_message, assistant_message)
     return serialize_drafts(drafts)
+
+
+async def extract_memories(
+    *,
+    user_message: str,
+    assistant_message: str,
+) -> List[Dict[str, Any]]:
+    return await asyncio.to_thread(_run_extract_memories, user_message, assistant_message)
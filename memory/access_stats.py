@@ -0,0 +1,198 @@
+"""
+Write-behind buffering of memory access statistics.
+Keeps access_count / last_accessed updates off the recall latency path.
+"""
+
+import atexit
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+from loguru import logger
+
+from models.memory import Memory
+
+
+def build_access_updates(memories: List[Memory]) -> Dict[str, dict]:
+    """Payload updates for one access of each memory (no buffering)."""
+    now = datetime.now(timezone.utc)
+    return {
+        str(memory.id): {"access_count": memory.access_count + 1, "last_accessed": now}
+        for memory in memories
+    }
+
+
+class AccessStatsBuffer:
+    """
+    In-process accumulator of access-count increments.
+
+    `record` only touches memory. A daemon thread flushes the pending
+    updates every `flush_interval` seconds, or as soon as `max_pending`
+    memories are waiting, through a single batched `writer` call. Pending
+    updates are also flushed at interpreter exit.
+
+    Counts are absolute: the next value is computed from the count seen in
+    the search result or the last count this buffer produced for the
+    memory, whichever is higher. The latter is kept across flushes (for up
+    to `max_tracked` memories), so accesses served from stale copies, e.g.
+    cached recall results, still add up.
+
+    A failed batch is split in halves until the failing updates are
+    isolated; the others are written. Failed updates are retried with the
+    next flush, and those that keep failing on their own (e.g. the memory
+    was deleted meanwhile) are dropped after `max_attempts`. When every
+    update fails (server down) nothing counts towards that limit.
+
+    Example:
+        buffer = AccessStatsBuffer(vector_store.update_access_stats)
+        buffer.record([r.memory for r in results])
+        buffer.flush()
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[Dict[str, dict]], bool],
+        flush_interval: float = 5.0,
+        max_pending: int = 500,
+        max_attempts: int = 3,
+        max_tracked: int = 100_000,
+    ):
+        """
+        Args:
+            writer: Persists {memory_id: payload} in one batched call
+            flush_interval: Seconds between periodic flushes
+            max_pending: Number of pending memories that triggers an early flush
+            max_attempts: Failed flushes after which an update is dropped
+            max_tracked: Memories whose last produced count is remembered
+        """
+        self.writer = writer
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_attempts = max(1, max_attempts)
+        self.max_tracked = max(1, max_tracked)
+        self._pending: Dict[str, dict] = {}
+        self._counts: "OrderedDict[str, int]" = OrderedDict()  # last count produced per memory
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="access-stats-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, memories: List[Memory]):
+        """Register one access for each memory."""
+        if not memories:
+            return
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for memory in memories:
+                memory_id = str(memory.id)
+                count = max(memory.access_count, self._counts.get(memory_id, 0)) + 1
+                self._counts[memory_id] = count
+                self._counts.move_to_end(memory_id)
+                self._pending[memory_id] = {"access_count": count, "last_accessed": now}
+            while len(self._counts) > self.max_tracked:
+                self._counts.popitem(last=False)
+            should_flush = len(self._pending) >= self.max_pending
+        if should_flush:
+            self._wake.set()
+
+    def flush(self) -> int:
+        """
+        Write all pending updates now.
+
+        Returns:
+            Number of memories flushed
+        """
+        with self._flush_lock:
+            with self._lock:
+                updates, self._pending = self._pending, {}
+            if not updates:
+                return 0
+            failed = self._write(updates)
+            with self._lock:
+                for memory_id in updates:
+                    if memory_id not in failed:
+                        self._failures.pop(memory_id, None)
+            if not failed:
+                logger.debug(f"Flushed access stats for {len(updates)} memories")
+                return len(updates)
+            logger.error(f"Failed to flush access stats for {len(failed)}/{len(updates)} memories")
+            # Everything failing at once is an outage, not bad updates
+            self._requeue(failed, count_attempt=len(failed) < len(updates) or len(updates) == 1)
+            return len(updates) - len(failed)
+
+    def _write(self, updates: Dict[str, dict]) -> Dict[str, dict]:
+        """
+        Write updates, splitting a failed batch in halves to isolate the
+        updates that fail (e.g. for deleted memories).
+
+        Returns:
+            The updates that could not be written
+        """
+        try:
+            self.writer(updates)
+            return {}
+        except Exception as e:
+            if len(updates) == 1:
+                logger.debug(f"Access stats update for {next(iter(updates))} failed: {e}")
+                return updates
+        items = list(updates.items())
+        middle = len(items) // 2
+        return {**self._write(dict(items[:middle])), **self._write(dict(items[middle:]))}
+
+    def discard(self, memory_ids: List[str]):
+        """Forget pending updates, e.g. for memories that were deleted."""
+        with self._lock:
+            for memory_id in memory_ids:
+                self._pending.pop(str(memory_id), None)
+                self._failures.pop(str(memory_id), None)
+                self._counts.pop(str(memory_id), None)
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def close(self):
+        """Stop the flusher thread and write any pending updates."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def _requeue(self, updates: Dict[str, dict], count_attempt: bool = True):
+        """Put failed updates back without losing newer increments."""
+        with self._lock:
+            dropped = 0
+            for memory_id, fields in updates.items():
+                if count_attempt:
+                    attempts = self._failures.get(memory_id, 0) + 1
+                    if attempts >= self.max_attempts:
+                        self._failures.pop(memory_id, None)
+                        self._pending.pop(memory_id, None)
+                        dropped += 1
+                        continue
+                    self._failures[memory_id] = attempts
+                current = self._pending.get(memory_id)
+                if current is None:
+                    self._pending[memory_id] = fields
+                    continue
+                self._pending[memory_id] = {
+                    "access_count": max(current["access_count"], fields["access_count"]),
+                    "last_accessed": max(current["last_accessed"], fields["last_accessed"]),
+                }
+        if dropped:
+            logger.warning(f"Dropped access stats for {dropped} memories after {self.max_attempts} failed flushes")
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            self.flush()
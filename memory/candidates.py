@@ -0,0 +1,84 @@
+"""
+Candidate over-fetch policy for re-ranking.
+Decides how many nearest neighbours to fetch so the ranker can promote
+important or recent memories just outside the top_k.
+"""
+
+import math
+import threading
+from typing import Optional
+
+from loguru import logger
+
+from config.settings import settings
+
+
+class CandidateMultiplier:
+    """
+    Chooses the vector-search limit as `top_k * multiplier`.
+
+    With a `latency_budget_ms`, the multiplier adapts to observed search
+    latency: it shrinks multiplicatively when a search exceeds the budget
+    and grows slowly while searches stay well under it, always staying in
+    [min_multiplier, max_multiplier]. Without a budget it is fixed.
+
+    Example:
+        candidates = CandidateMultiplier(multiplier=3.0, latency_budget_ms=50)
+        limit = candidates.limit(top_k=5)  # 15
+        ...search...
+        candidates.observe(elapsed_ms)
+    """
+
+    def __init__(
+        self,
+        multiplier: float = 1.0,
+        latency_budget_ms: Optional[float] = None,
+        min_multiplier: float = 1.0,
+        max_multiplier: float = 10.0,
+        max_candidates: int = 200,
+    ):
+        """
+        Args:
+            multiplier: Initial (or fixed) over-fetch factor
+            latency_budget_ms: Per-request search latency target; None disables adaptation
+            min_multiplier: Lower bound for the adaptive multiplier
+            max_multiplier: Upper bound for the adaptive multiplier
+            max_candidates: Hard cap on fetched candidates
+        """
+        self.min_multiplier = max(1.0, min_multiplier)
+        self.max_multiplier = max(self.min_multiplier, max_multiplier)
+        self.multiplier = min(max(multiplier, self.min_multiplier), self.max_multiplier)
+        self.latency_budget_ms = latency_budget_ms
+        self.max_candidates = max_candidates
+        self._lock = threading.Lock()
+
+    def limit(self, top_k: int) -> int:
+        """Number of candidates to fetch for a request of `top_k` results."""
+        limit = math.ceil(top_k * self.multiplier)
+        return max(top_k, min(limit, self.max_candidates))
+
+    def observe(self, latency_ms: float):
+        """Feed back the latency of one search (no-op without a budget)."""
+        if self.latency_budget_ms is None:
+            return
+        with self._lock:
+            previous = self.multiplier
+            if latency_ms > self.latency_budget_ms:
+                self.multiplier = max(self.min_multiplier, self.multiplier * 0.7)
+            elif latency_ms < 0.5 * self.latency_budget_ms:
+                self.multiplier = min(self.max_multiplier, self.multiplier * 1.1)
+            if self.multiplier != previous:
+                logger.debug(
+                    f"Candidate multiplier {previous:.2f} -> {self.multiplier:.2f} "
+                    f"(search took {latency_ms:.1f}ms, budget {self.latency_budget_ms:.1f}ms)"
+                )
+
+
+def candidate_multiplier_from_settings() -> CandidateMultiplier:
+    """CandidateMultiplier configured by the retrieval_* settings."""
+    return CandidateMultiplier(
+        multiplier=settings.retrieval_candidate_multiplier,
+        latency_budget_ms=settings.retrieval_latency_budget_ms,
+        max_multiplier=settings.retrieval_max_candidate_multiplier,
+        max_candidates=settings.retrieval_max_candidates,
+    )
@@ -0,0 +1,226 @@
+"""
+Token-budgeted context packing.
+Turns recalled memories into the smallest LLM context block that fits a budget.
+"""
+
+import math
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from config.settings import settings
+from models.memory import MemoryContext, MemorySearchResult
+
+Tokenizer = Callable[[str], int]
+
+CONTEXT_HEADER = "relevant memories about the user:\n"
+EMPTY_CONTEXT = "no relevent memories found."
+NO_NEW_CONTEXT = "no new memories; the ones listed earlier in this conversation still apply."
+
+_WORD_PIECES = re.compile(r"\w+|[^\w\s]")
+
+
+def approx_token_count(text: str) -> int:
+    """
+    Dependency-free token estimate.
+
+    The larger of "words + punctuation" and "characters / 4", which stays
+    at or slightly above BPE counts for English text.
+    """
+    if not text:
+        return 0
+    return max(len(_WORD_PIECES.findall(text)), math.ceil(len(text) / 4))
+
+
+class TiktokenCounter:
+    """Exact token counts with a local tiktoken encoding."""
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        import tiktoken
+
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def __call__(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+
+def get_tokenizer(name: Optional[str] = None) -> Tokenizer:
+    """
+    Token counter selected by settings.context_tokenizer.
+
+    "approx" needs nothing; "tiktoken" or "tiktoken:<encoding>" uses the
+    optional tiktoken package and falls back to "approx" if it is missing
+    or its encoding cannot be loaded.
+    """
+    name = (name or settings.context_tokenizer).strip()
+    if name == "approx":
+        return approx_token_count
+    if name.startswith("tiktoken"):
+        _, _, encoding_name = name.partition(":")
+        try:
+            return TiktokenCounter(encoding_name or "cl100k_base")
+        except Exception as e:
+            logger.warning(f"Falling back to approximate token counts, tiktoken unavailable: {e}")
+            return approx_token_count
+    raise ValueError(f"Unknown context_tokenizer: {name}")
+
+
+class ContextPacker:
+    """
+    Greedy packer of recalled memories under a token budget.
+
+    Memories are taken in descending final_score order. A memory is
+    skipped when it is a near-duplicate (cosine similarity of the stored
+    vectors >= `redundancy_threshold`) of one already packed, or when its
+    line no longer fits; smaller, lower-ranked memories can still fill the
+    remaining budget.
+
+    The compact format drops the type/importance/relevance annotations,
+    which are roughly a third of the tokens of a short memory.
+
+    With `shown` (memory id -> content already given to the LLM in this
+    conversation), unchanged memories are not repeated; a one-line
+    reference to them replaces their lines.
+
+    Example:
+        packer = ContextPacker(get_tokenizer(), compact=True)
+        context = packer.pack(results, max_tokens=400, vectors=vectors)
+        context.text, context.token_count
+    """
+
+    def __init__(
+        self,
+        tokenizer: Optional[Tokenizer] = None,
+        redundancy_threshold: float = 0.92,
+        compact: bool = False,
+    ):
+        """
+        Args:
+            tokenizer: Callable returning the token count of a string
+            redundancy_threshold: Min cosine similarity for a memory to count as redundant
+            compact: Default for the compact (unannotated) line format
+        """
+        self.tokenizer = tokenizer or approx_token_count
+        self.redundancy_threshold = redundancy_threshold
+        self.compact = compact
+
+    @staticmethod
+    def format_line(index: int, result: MemorySearchResult, compact: bool) -> str:
+        memory = result.memory
+        if compact:
+            return f"- {memory.content}"
+        return (
+            f"{index}. {memory.content} "
+            f"(type: {memory.memory_type.value}, "
+            f"importance: {memory.importance_score:.2f}, "
+            f"relevance: {result.final_score:.2f})"
+        )
+
+    def pack(
+        self,
+        results: List[MemorySearchResult],
+        max_tokens: Optional[int] = None,
+        max_memories: Optional[int] = None,
+        vectors: Optional[Dict[str, List[float]]] = None,
+        compact: Optional[bool] = None,
+        shown: Optional[Dict[str, str]] = None,
+    ) -> MemoryContext:
+        """
+        Build the context block.
+
+        Args:
+            results: Recalled memories
+            max_tokens: Token budget for the whole block (None = unbounded)
+            max_memories: Max memories to include
+            vectors: {memory_id: vector} used for redundancy checks (optional)
+            compact: Override the packer's default format
+            shown: {memory_id: content} already in the conversation; sent as a reference only
+
+        Returns:
+            MemoryContext with the text, its token count and the packed memory ids
+        """
+        compact = self.compact if compact is None else compact
+        ranked = sorted(results, key=lambda result: result.final_score, reverse=True)
+
+        used = self.tokenizer(CONTEXT_HEADER)
+        lines: List[str] = []
+        memory_ids: List[str] = []
+        contents: List[str] = []
+        referenced: List[str] = []
+        kept_vectors: List[np.ndarray] = []
+        redundant = 0
+        for result in ranked:
+            if max_memories is not None and len(lines) + len(referenced) >= max_memories:
+                break
+            memory_id = str(result.memory.id)
+            vector = self._unit_vector(vectors, memory_id)
+            if vector is not None and kept_vectors:
+                if float(np.max(np.stack(kept_vectors) @ vector)) >= self.redundancy_threshold:
+                    redundant += 1
+                    continue
+            if shown and shown.get(memory_id) == result.memory.content:
+                referenced.append(memory_id)
+                if vector is not None:
+                    kept_vectors.append(vector)
+                continue
+            line = self.format_line(len(lines) + 1, result, compact)
+            cost = self.tokenizer(line + "\n")
+            if max_tokens is not None and used + cost > max_tokens:
+                continue
+            used += cost
+            lines.append(line)
+            memory_ids.append(memory_id)
+            contents.append(result.memory.content)
+            if vector is not None:
+                kept_vectors.append(vector)
+
+        text = self._render(lines, len(referenced))
+        token_count = self.tokenizer(text)
+        # Per-line counts are an estimate of the joined text; trim if they undershot
+        while lines and max_tokens is not None and token_count > max_tokens:
+            lines.pop()
+            memory_ids.pop()
+            contents.pop()
+            text = self._render(lines, len(referenced))
+            token_count = self.tokenizer(text)
+
+        if redundant:
+            logger.debug(f"Dropped {redundant} near-duplicate memories from context")
+        return MemoryContext(
+            text=text,
+            token_count=token_count,
+            memory_ids=memory_ids,
+            contents=contents,
+            referenced_ids=referenced,
+            dropped_redundant=redundant,
+        )
+
+    def _unit_vector(self, vectors: Optional[Dict[str, List[float]]], memory_id: str) -> Optional[np.ndarray]:
+        if not vectors or self.redundancy_threshold >= 1.0:
+            return None
+        vector = vectors.get(str(memory_id))
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    @staticmethod
+    def _render(lines: List[str], referenced: int = 0) -> str:
+        if not lines:
+            return NO_NEW_CONTEXT if referenced else EMPTY_CONTEXT
+        text = CONTEXT_HEADER + "\n".join(lines)
+        if referenced:
+            text += f"\n(plus {referenced} listed earlier in this conversation)"
+        return text
+
+
+def context_packer_from_settings() -> ContextPacker:
+    """ContextPacker configured by the context_* settings."""
+    return ContextPacker(
+        tokenizer=get_tokenizer(),
+        redundancy_threshold=settings.context_redundancy_threshold,
+        compact=settings.context_compact,
+    )
@@ -3,6 +3,10 @@ from typing import List
 
 class BaseEmbedder(ABC):
     """Abstract base class for all embedding providers."""
+
+    # True when embed_batch packs texts into few requests and queries embed
+    # like documents, so concurrent single calls can be coalesced into batches
+    supports_coalescing = False
     
     @abstractmethod
     def embed_query(self, text: str) -> List[float]:
@@ -20,4 +24,28 @@ class BaseEmbedder(ABC):
     @abstractmethod
     def get_dimension(self) -> int:
         """Return the embedding dimension."""
-        pass
\ No newline at end of file
+        pass
+
+
+class AsyncBaseEmbedder(ABC):
+    """Abstract base class for asyncio embedding providers."""
+
+    supports_coalescing = False
+
+    @abstractmethod
+    async def embed_query(self, text: str) -> List[float]:
+        pass
+
+    @abstractmethod
+    async def embed(self, text: str) -> List[float]:
+        pass
+
+    @abstractmethod
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts."""
+        pass
+
+    @abstractmethod
+    async def get_dimension(self) -> int:
+        """Return the embedding dimension."""
+        pass
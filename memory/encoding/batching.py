@@ -0,0 +1,237 @@
+"""
+Dynamic micro-batching for embedding requests.
+Coalesces concurrent single-text calls into one batched provider call.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from core.scheduler import CallPriority, current_priority, model_priority
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+
+
+class CoalescingEmbedder(BaseEmbedder):
+    """
+    Thread-safe micro-batching wrapper around any BaseEmbedder.
+
+    Concurrent `embed` / `embed_query` calls are collected for up to
+    `max_batch_size` texts or `max_wait_ms` milliseconds, whichever comes
+    first, and sent as one `embed_batch` call. Identical texts in the same
+    window are embedded once and fanned out to every waiter.
+
+    Batches are dispatched through `embed_batch`, so this is meant for
+    providers whose query and document embeddings are the same
+    (`supports_coalescing`). A batch is sent with the most urgent model
+    call priority among its requests. Up to `max_in_flight` batches run at
+    once; while all of them are busy, new requests keep collecting into
+    the next window.
+
+    Example:
+        embedder = CoalescingEmbedder(OllamaEmbedder(), max_batch_size=32, max_wait_ms=5)
+        vec = embedder.embed_query("what food do I like?")  # from many threads
+    """
+
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_in_flight: int = 4,
+    ):
+        """
+        Args:
+            embedder: The embedder that receives the coalesced batches
+            max_batch_size: Max distinct texts per dispatched batch
+            max_wait_ms: Max time the first request in a window waits for company
+            max_in_flight: Max batches being embedded at once
+        """
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+        self._pending: List[Tuple[str, Future, CallPriority]] = []
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(self.max_in_flight)
+        self._dispatchers = ThreadPoolExecutor(
+            max_workers=self.max_in_flight, thread_name_prefix="embedding-batch"
+        )
+        self._worker = threading.Thread(target=self._run, name="embedding-coalescer", daemon=True)
+        self._worker.start()
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text as part of the next micro-batch."""
+        return self._submit(text, current_priority(CallPriority.CHAT)).result()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query as part of the next micro-batch."""
+        return self._submit(text, current_priority(CallPriority.INTERACTIVE_RECALL)).result()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Already batched; sent straight to the wrapped embedder."""
+        return self.embedder.embed_batch(texts)
+
+    def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return self.embedder.get_dimension()
+
+    def _submit(self, text: str, priority: CallPriority) -> Future:
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((text, future, priority))
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.max_wait
+                while len(self._distinct_pending()) < self.max_batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = self._take_batch()
+            self._dispatchers.submit(self._dispatch, batch)
+
+    def _distinct_pending(self) -> Dict[str, None]:
+        return dict.fromkeys(text for text, _, _ in self._pending)
+
+    def _take_batch(self) -> List[Tuple[str, Future, CallPriority]]:
+        """Pop up to max_batch_size distinct texts (caller holds the lock)."""
+        distinct = set()
+        batch, rest = [], []
+        for request in self._pending:
+            text = request[0]
+            if text in distinct or len(distinct) < self.max_batch_size:
+                distinct.add(text)
+                batch.append(request)
+            else:
+                rest.append(request)
+        self._pending = rest
+        return batch
+
+    def _dispatch(self, batch: List[Tuple[str, Future, CallPriority]]):
+        texts = list(dict.fromkeys(text for text, _, _ in batch))
+        try:
+            with model_priority(min(priority for _, _, priority in batch)):
+                vectors = dict(zip(texts, self.embedder.embed_batch(texts)))
+        except Exception as e:
+            logger.error(f"Coalesced embedding batch of {len(texts)} texts failed: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        logger.debug(f"Coalesced {len(batch)} embedding requests into {len(texts)} texts")
+        for text, future, _ in batch:
+            future.set_result(vectors[text])
+
+
+class AsyncCoalescingEmbedder(AsyncBaseEmbedder):
+    """
+    Asyncio micro-batching wrapper around any AsyncBaseEmbedder.
+
+    Same policy as CoalescingEmbedder, driven by the event loop instead of
+    a worker thread: the first request in a window arms a `max_wait_ms`
+    timer, and the window is flushed early once `max_batch_size` distinct
+    texts are waiting. At most `max_in_flight` batches are embedded at once.
+    """
+
+    def __init__(
+        self,
+        embedder: AsyncBaseEmbedder,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+        max_in_flight: int = 4,
+    ):
+        """
+        Args:
+            embedder: The async embedder that receives the coalesced batches
+            max_batch_size: Max distinct texts per dispatched batch
+            max_wait_ms: Max time the first request in a window waits for company
+            max_in_flight: Max batches being embedded at once
+        """
+        self.embedder = embedder
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_in_flight = max(1, max_in_flight)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._priority: Optional[CallPriority] = None  # most urgent request in the window
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text as part of the next micro-batch."""
+        return await self._submit(text, current_priority(CallPriority.CHAT))
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a query as part of the next micro-batch."""
+        return await self._submit(text, current_priority(CallPriority.INTERACTIVE_RECALL))
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Already batched; sent straight to the wrapped embedder."""
+        return await self.embedder.embed_batch(texts)
+
+    async def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return await self.embedder.get_dimension()
+
+    async def close(self):
+        """Embed the open window, then close the wrapped embedder's connections."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._pending:
+            batch, self._pending = self._pending, {}
+            priority, self._priority = self._priority, None
+            await self._dispatch(batch, priority)
+        close = getattr(self.embedder, "close", None)
+        if close is not None:
+            await close()
+
+    def _submit(self, text: str, priority: CallPriority) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(text, []).append(future)
+        self._priority = priority if self._priority is None else min(self._priority, priority)
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        priority, self._priority = self._priority, None
+        asyncio.get_running_loop().create_task(self._dispatch(batch, priority))
+
+    async def _dispatch(self, batch: Dict[str, List[asyncio.Future]], priority: CallPriority):
+        texts = list(batch)
+        try:
+            async with self._slots:
+                with model_priority(priority):
+                    vectors = await self.embedder.embed_batch(texts)
+        except Exception as e:
+            logger.error(f"Coalesced embedding batch of {len(texts)} texts failed: {e}")
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for text, vector in zip(texts, vectors):
+            for future in batch[text]:
+                if not future.done():
+                    future.set_result(vector)
@@ -0,0 +1,325 @@
+"""
+Persistent embedding cache.
+Content-addressed SQLite store that sits in front of any embedder.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing (NFC, trimmed, collapsed whitespace)."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    On-disk, size-bounded LRU store of embedding vectors.
+
+    Vectors are stored as float32 blobs keyed by a SHA-256 of
+    (provider, model, normalized text). When the store grows past
+    `max_entries`, the least recently used rows are evicted.
+
+    Example:
+        cache = EmbeddingCache(".neuromem/embedding_cache.sqlite3")
+        key = cache.make_key("ollama", "mxbai-embed-large", "Hello world")
+        vec = cache.get(key)
+    """
+
+    def __init__(self, path: str, max_entries: int = 100_000):
+        """
+        Args:
+            path: SQLite database file (":memory:" for a process-local cache)
+            max_entries: Maximum number of vectors kept before LRU eviction
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, "
+            "vector BLOB NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache opened at {path} ({self._size} entries)")
+
+    @staticmethod
+    def make_key(provider: str, model: str, text: str) -> str:
+        """Build the content address for a (provider, model, text) triple."""
+        raw = f"{provider}\x1f{model}\x1f{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """Return a cached vector, or None on a miss."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for `keys`, omitting misses."""
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return {}
+        placeholders = ",".join("?" for _ in unique_keys)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                unique_keys,
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows],
+                )
+                self._conn.commit()
+        return {
+            key: np.frombuffer(blob, dtype=np.float32).tolist()
+            for key, blob in rows
+        }
+
+    def put(self, key: str, vector: List[float]):
+        """Store a single vector."""
+        self.put_many({key: vector})
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """Store several vectors and evict LRU rows if over capacity."""
+        if not items:
+            return
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._size += self._conn.total_changes - before
+            if self._size > self.max_entries:
+                self._evict(self._size - self.max_entries)
+            self._conn.commit()
+
+    def _evict(self, count: int):
+        """Delete the `count` least recently used rows (caller holds the lock)."""
+        cursor = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN ("
+            "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+            (count,),
+        )
+        self._size -= cursor.rowcount
+        logger.debug(f"Evicted {count} embeddings from cache")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def clear(self):
+        """Remove every cached vector."""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._size = 0
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedder(BaseEmbedder):
+    """
+    Caching wrapper around any BaseEmbedder.
+
+    `embed`, `embed_query` and `embed_batch` all read through the same
+    cache, so a fact stored once is never re-embedded when it is queried
+    or re-stored later. Only misses reach the wrapped embedder, and batch
+    misses are sent in a single `embed_batch` call.
+
+    Example:
+        embedder = CachedEmbedder(
+            OllamaEmbedder(),
+            cache=EmbeddingCache(".neuromem/embedding_cache.sqlite3"),
+            provider="ollama",
+            model="mxbai-embed-large",
+        )
+        vec = embedder.embed("Hello world")
+        print(embedder.stats())
+    """
+
+    def __init__(self, embedder: BaseEmbedder, cache: EmbeddingCache, provider: str, model: str):
+        """
+        Args:
+            embedder: The embedder that computes vectors on a cache miss
+            cache: Persistent vector store
+            provider: Provider name, part of the cache key
+            model: Model name, part of the cache key
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def embed(self, text: str) -> List[float]:
+        """Embed a single text, using the cache when possible."""
+        return self._embed_one(text, self.embedder.embed)
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when possible."""
+        return self._embed_one(text, self.embedder.embed_query)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts, sending only cache misses to the wrapped embedder."""
+        keys = [self.cache.make_key(self.provider, self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self._record(hits=len(texts) - len(missing), misses=len(missing))
+
+        if missing:
+            computed = self.embedder.embed_batch(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(new_vectors)
+            found.update(new_vectors)
+
+        return [found[key] for key in keys]
+
+    def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return self.embedder.get_dimension()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for this process."""
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self.cache),
+            }
+
+    def _embed_one(self, text: str, compute) -> List[float]:
+        key = self.cache.make_key(self.provider, self.model, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(hits=1)
+            return cached
+        self._record(misses=1)
+        embedding = compute(text)
+        self.cache.put(key, embedding)
+        return embedding
+
+    def _record(self, hits: int = 0, misses: int = 0):
+        with self._stats_lock:
+            self.hits += hits
+            self.misses += misses
+
+
+class AsyncCachedEmbedder(AsyncBaseEmbedder):
+    """
+    Asyncio counterpart of CachedEmbedder.
+
+    Shares the same EmbeddingCache format, so sync and async embedders in
+    one process read and fill the same on-disk store. SQLite lookups are
+    local and sub-millisecond, so they run inline on the event loop.
+    """
+
+    def __init__(self, embedder: AsyncBaseEmbedder, cache: EmbeddingCache, provider: str, model: str):
+        """
+        Args:
+            embedder: The async embedder that computes vectors on a cache miss
+            cache: Persistent vector store
+            provider: Provider name, part of the cache key
+            model: Model name, part of the cache key
+        """
+        self.embedder = embedder
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text, using the cache when possible."""
+        return await self._embed_one(text, self.embedder.embed)
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when possible."""
+        return await self._embed_one(text, self.embedder.embed_query)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts, sending only cache misses to the wrapped embedder."""
+        keys = [self.cache.make_key(self.provider, self.model, text) for text in texts]
+        found = self.cache.get_many(keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            computed = await self.embedder.embed_batch(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), computed))
+            self.cache.put_many(new_vectors)
+            found.update(new_vectors)
+
+        return [found[key] for key in keys]
+
+    async def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return await self.embedder.get_dimension()
+
+    async def close(self):
+        """Close the wrapped embedder's connections."""
+        close = getattr(self.embedder, "close", None)
+        if close is not None:
+            await close()
+
+    def stats(self) -> Dict[str, float]:
+        """Return hit/miss counters for this process."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self.cache),
+        }
+
+    async def _embed_one(self, text: str, compute) -> List[float]:
+        key = self.cache.make_key(self.provider, self.model, text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        embedding = await compute(text)
+        self.cache.put(key, embedding)
+        return embedding
@@ -4,89 +4,249 @@ Google Gemini embedding utilities.
 Uses text-embedding-004 (current recommended model as of 2025–2026).
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from google import genai
-from google.genai import types
-from google.api_core import retry
+from google.genai import errors, types
+from google.api_core import retry, retry_async
+from loguru import logger
 
-from memory.encoding.base import BaseEmbedder
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+from memory.encoding.rate_limit import TokenBucket
 from config.settings import settings
 
+
+def _is_transient_error(exc: Exception) -> bool:
+    """Retry on api_core transient errors and genai 429/5xx responses."""
+    if retry.if_transient_error(exc):
+        return True
+    return isinstance(exc, errors.APIError) and exc.code in (429, 500, 503, 504)
+
+
+def _estimate_tokens(texts: List[str]) -> int:
+    """Rough token estimate: ~4 characters per token."""
+    return sum(len(text) // 4 + 1 for text in texts)
+
+
 class GeminiEmbedder(BaseEmbedder):
     """
     Thread-safe, reusable Gemini text embedder.
-    
+
+    `embed_batch` packs up to `batch_size` texts into each `embed_content`
+    request and sends chunks concurrently from a bounded worker pool. Every
+    request first draws from client-side RPM/TPM token buckets, and only a
+    failing chunk is retried.
+
     Example:
         embedder = GeminiEmbedder()
         vec = embedder.embed("Hello world")
     """
-    
-    MODEL_NAME = settings.embedding_model  
-    
+
+    MODEL_NAME = settings.embedding_model
+    supports_coalescing = True
+
     def __init__(
         self,
         api_key: str | None = None,
         configure_once: bool = True,
+        batch_size: int | None = None,
+        max_workers: int | None = None,
     ):
         """
         Args:
             api_key: Gemini API key. If None, reads from GEMINI_API_KEY env var.
             configure_once: Whether to call genai.configure() only once (recommended).
+            batch_size: Max texts per embed_content request (default from settings)
+            max_workers: Max concurrent batch requests (default from settings)
         """
-        self.api_key = api_key or settings.gemini_api_key  
+        self.api_key = api_key or settings.gemini_api_key
         if not self.api_key:
             raise ValueError(
                 "No Gemini API key provided. "
                 "Set GEMINI_API_KEY environment variable "
                 "or pass api_key=... when creating the embedder."
             )
-        
+
         self.client = genai.Client(api_key=self.api_key)
         self._configured = True
 
-    @retry.Retry(predicate=retry.if_transient_error, initial=2, maximum=30, multiplier=1.5)
+        self.batch_size = max(1, batch_size or settings.gemini_embed_batch_size)
+        self.max_workers = max(1, max_workers or settings.gemini_embed_max_workers)
+        self._request_bucket = TokenBucket(settings.gemini_embed_rpm)
+        self._token_bucket = TokenBucket(settings.gemini_embed_tpm)
+
+    @retry.Retry(predicate=_is_transient_error, initial=2, maximum=30, multiplier=1.5)
     def embed(self, text: str) -> List[float]:
         """
         Embed a single text string.
-        
+
         Returns:
             List of floats (768-dimensional vector for text-embedding-004)
         """
         if not text.strip():
             raise ValueError("Cannot embed empty or whitespace-only text")
-        
+
+        self._throttle([text])
         response = self.client.models.embed_content(
             model=self.MODEL_NAME,
             contents=text,
         )
-        
+
         return response.embeddings[0].values
 
-    @retry.Retry(predicate=retry.if_transient_error, initial=2, maximum=30, multiplier=1.5)
+    @retry.Retry(predicate=_is_transient_error, initial=2, maximum=30, multiplier=1.5)
     def embed_query(self, text: str) -> List[float]:
         """
         Embed a single text string.
-        
+
         Returns:
             List of floats (768-dimensional vector for text-embedding-004)
         """
         if not text.strip():
             raise ValueError("Cannot embed empty or whitespace-only text")
-        
+
+        self._throttle([text])
         response = self.client.models.embed_content(
             model=self.MODEL_NAME,
             contents=text,
         )
-        
+
         return response.embeddings[0].values
-    
+
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Embed multiple texts sequentially."""
-        return [self.embed(text) for text in texts]
+        """
+        Embed multiple texts with packed, concurrent requests.
+
+        Output order matches input order.
+        """
+        if any(not text.strip() for text in texts):
+            raise ValueError("Cannot embed empty or whitespace-only text")
+
+        chunks = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        if len(chunks) <= 1 or self.max_workers == 1:
+            results = [self._embed_chunk(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+                results = list(pool.map(self._embed_chunk, chunks))
+
+        embeddings = [vector for chunk_vectors in results for vector in chunk_vectors]
+        logger.debug(f"Embedded {len(texts)} texts in {len(chunks)} Gemini requests")
+        return embeddings
+
+    @retry.Retry(predicate=_is_transient_error, initial=2, maximum=30, multiplier=1.5)
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        """Embed one packed chunk; retried on its own when throttled."""
+        self._throttle(texts)
+        response = self.client.models.embed_content(
+            model=self.MODEL_NAME,
+            contents=texts,
+        )
+        if len(response.embeddings) != len(texts):
+            raise ValueError(
+                f"Gemini returned {len(response.embeddings)} embeddings for {len(texts)} inputs"
+            )
+        return [embedding.values for embedding in response.embeddings]
+
+    def _throttle(self, texts: List[str]):
+        """Block until the RPM and TPM buckets allow this request."""
+        self._request_bucket.acquire(1)
+        self._token_bucket.acquire(_estimate_tokens(texts))
 
     def get_dimension(self) -> int:
         """Return embedding dimension."""
         return settings.embedding_dimension
-    
\ No newline at end of file
+
+
+class AsyncGeminiEmbedder(AsyncBaseEmbedder):
+    """
+    Asyncio Gemini embedder using the genai `client.aio` surface.
+
+    Batches are packed and run concurrently like GeminiEmbedder, with an
+    asyncio semaphore bounding in-flight requests.
+
+    Example:
+        embedder = AsyncGeminiEmbedder()
+        vec = await embedder.embed("Hello world")
+    """
+
+    MODEL_NAME = settings.embedding_model
+    supports_coalescing = True
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        batch_size: int | None = None,
+        max_workers: int | None = None,
+    ):
+        """
+        Args:
+            api_key: Gemini API key. If None, reads from GEMINI_API_KEY env var.
+            batch_size: Max texts per embed_content request (default from settings)
+            max_workers: Max concurrent batch requests (default from settings)
+        """
+        self.api_key = api_key or settings.gemini_api_key
+        if not self.api_key:
+            raise ValueError(
+                "No Gemini API key provided. "
+                "Set GEMINI_API_KEY environment variable "
+                "or pass api_key=... when creating the embedder."
+            )
+
+        self.client = genai.Client(api_key=self.api_key)
+        self.batch_size = max(1, batch_size or settings.gemini_embed_batch_size)
+        self.max_workers = max(1, max_workers or settings.gemini_embed_max_workers)
+        self._request_bucket = TokenBucket(settings.gemini_embed_rpm)
+        self._token_bucket = TokenBucket(settings.gemini_embed_tpm)
+
+    async def embed(self, text: str) -> List[float]:
+        """Embed a single text string."""
+        if not text.strip():
+            raise ValueError("Cannot embed empty or whitespace-only text")
+        return (await self._embed_chunk([text]))[0]
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string."""
+        return await self.embed(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed multiple texts with packed, concurrent requests (input order preserved)."""
+        if any(not text.strip() for text in texts):
+            raise ValueError("Cannot embed empty or whitespace-only text")
+
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run(chunk: List[str]) -> List[List[float]]:
+            async with semaphore:
+                return await self._embed_chunk(chunk)
+
+        chunks = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return [vector for chunk_vectors in results for vector in chunk_vectors]
+
+    @retry_async.AsyncRetry(predicate=_is_transient_error, initial=2, maximum=30, multiplier=1.5)
+    async def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        """Embed one packed chunk; retried on its own when throttled."""
+        await self._request_bucket.aacquire(1)
+        await self._token_bucket.aacquire(_estimate_tokens(texts))
+        response = await self.client.aio.models.embed_content(
+            model=self.MODEL_NAME,
+            contents=texts,
+        )
+        if len(response.embeddings) != len(texts):
+            raise ValueError(
+                f"Gemini returned {len(response.embeddings)} embeddings for {len(texts)} inputs"
+            )
+        return [embedding.values for embedding in response.embeddings]
+
+    async def get_dimension(self) -> int:
+        """Return embedding dimension."""
+        return settings.embedding_dimension
@@ -3,43 +3,71 @@ Ollama embedding utilities.
 Self-hosted embeddings using Ollama.
 """
 
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
 from typing import List
-from memory.encoding.base import BaseEmbedder
+from loguru import logger
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
 from config.settings import settings
 
 
 class OllamaEmbedder(BaseEmbedder):
     """
     Self-hosted Ollama embedder.
-    
+
     Popular models:
     - nomic-embed-text (768 dims) - recommended
     - mxbai-embed-large (1024 dims)
     - all-minilm (384 dims)
-    
+
+    All requests go through one keep-alive `requests.Session` and use
+    `/api/embed`, so single and batched texts get identical vectors;
+    `embed_batch` sends up to `batch_size` texts per call. Servers without
+    `/api/embed` fall back to per-text `/api/embeddings` calls.
+
     Example:
         embedder = OllamaEmbedder()
         vec = embedder.embed("Hello world")
+        vecs = embedder.embed_batch(["first", "second"])
     """
-    
+
+    supports_coalescing = True
+
     def __init__(
         self,
         base_url: str | None = None,
         model: str | None = None,
+        batch_size: int | None = None,
+        pool_size: int | None = None,
     ):
         """
         Args:
             base_url: Ollama API base URL (default from settings)
             model: Embedding model name (default from settings)
+            batch_size: Max texts per /api/embed request (default from settings)
+            pool_size: Max pooled keep-alive connections (default from settings)
         """
         self.base_url = (base_url or settings.ollama_base_url).rstrip("/v1").rstrip("/")
-        self.model =  settings.ollama_embedding_model
+        self.model = model or settings.ollama_embedding_model
+        self.batch_size = max(1, batch_size or settings.ollama_embed_batch_size)
         self._dimension = None
-    
+        # Ollama servers older than 0.3 only expose /api/embeddings
+        self._supports_batch_endpoint = True
+
+        pool_size = pool_size or settings.ollama_http_pool_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def embed(self, text: str) -> List[float]:
         """Generate embedding for a single text."""
-        response = requests.post(
+        return self._embed_chunk([text])[0]
+
+    def _embed_legacy(self, text: str) -> List[float]:
+        """Embed one text through /api/embeddings (servers without /api/embed)."""
+        response = self.session.post(
             f"{self.base_url}/api/embeddings",
             json={
                 "model": self.model,
@@ -49,23 +77,175 @@ class OllamaEmbedder(BaseEmbedder):
         )
         response.raise_for_status()
         embedding = response.json()["embedding"]
-        
+
         if self._dimension is None:
             self._dimension = len(embedding)
-        
+
         return embedding
-    
+
     def embed_query(self, text: str) -> List[float]:
         """Generate embedding for a query (same as embed for Ollama)."""
         return self.embed(text)
-    
+
     def embed_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts."""
-        return [self.embed(text) for text in texts]
-    
+        """
+        Generate embeddings for multiple texts.
+
+        Texts are chunked by `batch_size` and each chunk is sent as one
+        `/api/embed` request. Output order matches input order.
+        """
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
+            embeddings.extend(self._embed_chunk(chunk))
+        return embeddings
+
+    def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        """Embed one chunk through /api/embed, falling back to per-text calls."""
+        if not self._supports_batch_endpoint:
+            return [self._embed_legacy(text) for text in texts]
+
+        response = self.session.post(
+            f"{self.base_url}/api/embed",
+            json={
+                "model": self.model,
+                "input": texts
+            },
+            timeout=30 + len(texts)
+        )
+        if response.status_code == 404 and "model" not in response.text:
+            logger.warning("Ollama /api/embed not available, falling back to /api/embeddings")
+            self._supports_batch_endpoint = False
+            return [self._embed_legacy(text) for text in texts]
+        response.raise_for_status()
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs"
+            )
+
+        if self._dimension is None and embeddings:
+            self._dimension = len(embeddings[0])
+
+        return embeddings
+
     def get_dimension(self) -> int:
         """Return the embedding dimension."""
         if self._dimension is None:
             # Get dimension by embedding a test string
             self.embed("test")
         return self._dimension
+
+
+class AsyncOllamaEmbedder(AsyncBaseEmbedder):
+    """
+    Asyncio Ollama embedder backed by a pooled `httpx.AsyncClient`.
+
+    Mirrors OllamaEmbedder: single texts and batch chunks all go through
+    /api/embed.
+
+    Example:
+        embedder = AsyncOllamaEmbedder()
+        vec = await embedder.embed("Hello world")
+    """
+
+    supports_coalescing = True
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        model: str | None = None,
+        batch_size: int | None = None,
+        pool_size: int | None = None,
+    ):
+        """
+        Args:
+            base_url: Ollama API base URL (default from settings)
+            model: Embedding model name (default from settings)
+            batch_size: Max texts per /api/embed request (default from settings)
+            pool_size: Max pooled keep-alive connections (default from settings)
+        """
+        self.base_url = (base_url or settings.ollama_base_url).rstrip("/v1").rstrip("/")
+        self.model = model or settings.ollama_embedding_model
+        self.batch_size = max(1, batch_size or settings.ollama_embed_batch_size)
+        self._dimension = None
+        self._supports_batch_endpoint = True
+
+        pool_size = pool_size or settings.ollama_http_pool_size
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            timeout=30,
+        )
+
+    async def embed(self, text: str) -> List[float]:
+        """Generate embedding for a single text."""
+        return (await self._embed_chunk([text]))[0]
+
+    async def _embed_legacy(self, text: str) -> List[float]:
+        """Embed one text through /api/embeddings (servers without /api/embed)."""
+        response = await self.client.post(
+            "/api/embeddings",
+            json={
+                "model": self.model,
+                "prompt": text
+            },
+        )
+        response.raise_for_status()
+        embedding = response.json()["embedding"]
+
+        if self._dimension is None:
+            self._dimension = len(embedding)
+
+        return embedding
+
+    async def embed_query(self, text: str) -> List[float]:
+        """Generate embedding for a query (same as embed for Ollama)."""
+        return await self.embed(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for multiple texts, preserving input order."""
+        embeddings: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
+            embeddings.extend(await self._embed_chunk(chunk))
+        return embeddings
+
+    async def _embed_chunk(self, texts: List[str]) -> List[List[float]]:
+        """Embed one chunk through /api/embed, falling back to per-text calls."""
+        if not self._supports_batch_endpoint:
+            return [await self._embed_legacy(text) for text in texts]
+
+        response = await self.client.post(
+            "/api/embed",
+            json={
+                "model": self.model,
+                "input": texts
+            },
+            timeout=30 + len(texts),
+        )
+        if response.status_code == 404 and "model" not in response.text:
+            logger.warning("Ollama /api/embed not available, falling back to /api/embeddings")
+            self._supports_batch_endpoint = False
+            return [await self._embed_legacy(text) for text in texts]
+        response.raise_for_status()
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(texts):
+            raise ValueError(
+                f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs"
+            )
+
+        if self._dimension is None and embeddings:
+            self._dimension = len(embeddings[0])
+
+        return embeddings
+
+    async def get_dimension(self) -> int:
+        """Return the embedding dimension."""
+        if self._dimension is None:
+            await self.embed("test")
+        return self._dimension
+
+    async def close(self):
+        """Close pooled connections."""
+        await self.client.aclose()
@@ -0,0 +1,69 @@
+"""
+Client-side rate limiting for embedding providers.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens refill continuously at `rate_per_minute / 60` per second up to
+    `capacity`. `acquire` blocks until enough tokens are available.
+
+    Example:
+        rpm = TokenBucket(rate_per_minute=100)
+        rpm.acquire()  # one request
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        """
+        Args:
+            rate_per_minute: Sustained refill rate (e.g. an RPM or TPM quota)
+            capacity: Maximum burst size (default: one minute of quota)
+        """
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Take `amount` tokens, sleeping until they are available.
+
+        Requests larger than the bucket capacity are clamped to it so a
+        single oversized call can still proceed once the bucket is full.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+    async def aacquire(self, amount: float = 1.0):
+        """Asyncio variant of `acquire` that yields to the event loop while waiting."""
+        amount = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                wait = (amount - self._tokens) / self.rate_per_second
+            await asyncio.sleep(wait)
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
@@ -0,0 +1,115 @@
+"""
+Scheduled embedding calls.
+Routes provider requests through the shared ModelCallScheduler.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from core.scheduler import CallPriority, ModelCallScheduler, current_priority
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+
+
+def _chunks(texts: List[str], batch_size: Optional[int]) -> List[List[str]]:
+    """Split texts into the provider's per-request chunks (one chunk if it has no limit)."""
+    if not batch_size or len(texts) <= batch_size:
+        return [texts]
+    return [texts[start:start + batch_size] for start in range(0, len(texts), batch_size)]
+
+
+class ScheduledEmbedder(BaseEmbedder):
+    """
+    Wrapper that takes a scheduler slot for every provider call.
+
+    Queries run as INTERACTIVE_RECALL and document embeddings as CHAT,
+    unless an enclosing `model_priority` says otherwise (background
+    extraction, backfills). Meant to sit directly around the provider, so
+    one slot is one request to the model server: `embed_batch` splits texts
+    by the provider's `batch_size` and takes a slot per chunk, sending
+    chunks concurrently up to the provider's `max_workers`.
+
+    Example:
+        embedder = ScheduledEmbedder(OllamaEmbedder(), get_model_scheduler())
+        vec = embedder.embed_query("what food do I like?")
+    """
+
+    def __init__(self, embedder: BaseEmbedder, scheduler: ModelCallScheduler):
+        """
+        Args:
+            embedder: The provider embedder
+            scheduler: Shared model call scheduler
+        """
+        self.embedder = embedder
+        self.scheduler = scheduler
+
+    def embed(self, text: str) -> List[float]:
+        with self.scheduler.slot(current_priority(CallPriority.CHAT)):
+            return self.embedder.embed(text)
+
+    def embed_query(self, text: str) -> List[float]:
+        with self.scheduler.slot(current_priority(CallPriority.INTERACTIVE_RECALL)):
+            return self.embedder.embed_query(text)
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        priority = current_priority(CallPriority.CHAT)
+        chunks = _chunks(texts, getattr(self.embedder, "batch_size", None))
+
+        def run(chunk: List[str]) -> List[List[float]]:
+            with self.scheduler.slot(priority):
+                return self.embedder.embed_batch(chunk)
+
+        workers = min(getattr(self.embedder, "max_workers", 1), len(chunks))
+        if workers <= 1:
+            results = [run(chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(run, chunks))
+        return [vector for chunk_vectors in results for vector in chunk_vectors]
+
+    def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return self.embedder.get_dimension()
+
+
+class AsyncScheduledEmbedder(AsyncBaseEmbedder):
+    """Asyncio variant of ScheduledEmbedder."""
+
+    def __init__(self, embedder: AsyncBaseEmbedder, scheduler: ModelCallScheduler):
+        """
+        Args:
+            embedder: The async provider embedder
+            scheduler: Shared model call scheduler
+        """
+        self.embedder = embedder
+        self.scheduler = scheduler
+
+    async def embed(self, text: str) -> List[float]:
+        async with self.scheduler.aslot(current_priority(CallPriority.CHAT)):
+            return await self.embedder.embed(text)
+
+    async def embed_query(self, text: str) -> List[float]:
+        async with self.scheduler.aslot(current_priority(CallPriority.INTERACTIVE_RECALL)):
+            return await self.embedder.embed_query(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        priority = current_priority(CallPriority.CHAT)
+        semaphore = asyncio.Semaphore(getattr(self.embedder, "max_workers", 1))
+
+        async def run(chunk: List[str]) -> List[List[float]]:
+            async with semaphore, self.scheduler.aslot(priority):
+                return await self.embedder.embed_batch(chunk)
+
+        chunks = _chunks(texts, getattr(self.embedder, "batch_size", None))
+        results = await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return [vector for chunk_vectors in results for vector in chunk_vectors]
+
+    async def get_dimension(self) -> int:
+        """Return the wrapped embedder's dimension."""
+        return await self.embedder.get_dimension()
+
+    async def close(self):
+        """Close the wrapped embedder's connections."""
+        close = getattr(self.embedder, "close", None)
+        if close is not None:
+            await close()
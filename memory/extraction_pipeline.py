@@ -0,0 +1,142 @@
+"""
+Streaming extraction-to-storage pipeline.
+Embeds and stores drafts in micro-batches while the extraction LLM is still generating.
+"""
+
+import contextvars
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from core.scheduler import CallPriority, current_priority, model_priority
+from memory.extractor import MemoryExtractor
+from models.memory import MemoryDraft
+
+# Stores one micro-batch of drafts; returns the stored (or merged) memories
+BatchWriter = Callable[[List[MemoryDraft]], List[Any]]
+
+
+class DraftBatcher:
+    """
+    Groups streamed drafts into micro-batches written on a writer thread.
+
+    A batch is handed to `write_batch` once it holds `batch_size` drafts,
+    or when a draft arrives more than `max_wait_seconds` after the batch
+    was started; `close` writes the rest. Writes run one at a time, in
+    order, on a dedicated thread, so the producer (the LLM stream) never
+    waits for embedding or upserts. Each write runs in the context of the
+    `add` that submitted it (e.g. its model call priority).
+
+    Example:
+        batcher = DraftBatcher(lambda drafts: brain.remember_batch(...), batch_size=8)
+        for draft in extractor.stream_memories_from_turns(turns):
+            batcher.add(draft)
+        stored = batcher.close()
+    """
+
+    def __init__(
+        self,
+        write_batch: BatchWriter,
+        batch_size: int = 8,
+        max_wait_seconds: float = 0.25,
+    ):
+        """
+        Args:
+            write_batch: Embeds and stores one batch of drafts
+            batch_size: Drafts per batch
+            max_wait_seconds: Max age of a partial batch before the next draft flushes it
+        """
+        self.write_batch = write_batch
+        self.batch_size = max(1, batch_size)
+        self.max_wait_seconds = max_wait_seconds
+        self._batch: List[MemoryDraft] = []
+        self._batch_started = 0.0
+        self._writes: List[Tuple[Future, int]] = []
+        self.failed_drafts = 0
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="draft-writer")
+
+    def add(self, draft: MemoryDraft):
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(draft)
+        if (
+            len(self._batch) >= self.batch_size
+            or time.monotonic() - self._batch_started >= self.max_wait_seconds
+        ):
+            self._submit()
+
+    def close(self) -> int:
+        """
+        Write the last partial batch and wait for all writes.
+
+        Failed batches are logged and counted in `failed_drafts`.
+
+        Returns:
+            Number of drafts written
+        """
+        self._submit()
+        written = 0
+        try:
+            for future, size in self._writes:
+                try:
+                    written += len(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to store a batch of {size} extracted memories: {e}")
+                    self.failed_drafts += size
+        finally:
+            self._writer.shutdown(wait=True)
+        return written
+
+    def _submit(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        context = contextvars.copy_context()
+        self._writes.append((self._writer.submit(context.run, self.write_batch, batch), len(batch)))
+
+
+def extract_and_store_streaming(
+    extractor: MemoryExtractor,
+    turns: Sequence[Tuple[str, str]],
+    write_batch: BatchWriter,
+    batch_size: int = 8,
+    max_wait_seconds: float = 0.25,
+    raise_errors: bool = False,
+) -> Tuple[int, int]:
+    """
+    Stream drafts out of the extraction LLM straight into micro-batched storage.
+
+    If the stream fails after some drafts were produced, those drafts are
+    still written and the error is only logged: retrying would extract
+    (and merge) them again. A failure before the first draft is raised
+    when `raise_errors` is set, so callers can retry it safely.
+
+    Writes run as EXTRACTION_WRITE (or the caller's priority if it is more
+    urgent): the stream holds its EXTRACTION slot until generation ends,
+    so writes queued behind it in that class would lose the overlap.
+
+    Returns:
+        (drafts extracted, drafts written)
+    """
+    def write(drafts: List[MemoryDraft]) -> List[Any]:
+        priority = min(current_priority(CallPriority.EXTRACTION), CallPriority.EXTRACTION_WRITE)
+        with model_priority(priority):
+            return write_batch(drafts)
+
+    batcher = DraftBatcher(write, batch_size=batch_size, max_wait_seconds=max_wait_seconds)
+    extracted = 0
+    stream_error: Optional[Exception] = None
+    try:
+        for draft in extractor.stream_memories_from_turns(turns, raise_errors=True):
+            batcher.add(draft)
+            extracted += 1
+    except Exception as e:
+        stream_error = e
+    written = batcher.close()
+    if stream_error is not None:
+        if extracted == 0 and raise_errors:
+            raise stream_error
+        logger.warning(f"Extraction stream failed after {extracted} memories: {stream_error}")
+    return extracted, written
@@ -0,0 +1,318 @@
+"""
+Background memory extraction.
+Runs the extraction LLM call and the resulting writes off the chat response path.
+"""
+
+import atexit
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from config.settings import settings
+from core.scheduler import CallPriority, model_priority
+from memory.extraction_pipeline import extract_and_store_streaming
+from memory.extractor import MemoryExtractor
+from models.memory import MemoryDraft
+
+
+class ExtractionQueue:
+    """
+    Bounded worker pool for extract-and-store jobs.
+
+    `submit` returns immediately; a worker extracts drafts from the turn
+    and hands each one to `store_draft` (typically `Brain.remember`).
+    Extraction and each store are retried up to `max_attempts` times with
+    exponential backoff; a draft that keeps failing is logged and skipped.
+
+    Pending jobs are counted per user so callers can get read-your-writes:
+    `wait_for_user` blocks until that user's queued writes have landed,
+    which ChatManager does before the next recall. `flush` waits for every
+    job (tests, CLI exit); pending jobs are also flushed at interpreter exit.
+
+    When `max_pending` jobs are queued, `submit` blocks until one finishes.
+
+    With `streaming=True` and a `store_batch` callable, jobs use the
+    streaming pipeline instead: drafts are parsed while the LLM generates
+    and stored in micro-batches (one embedding call and one upsert each).
+
+    Example:
+        queue = ExtractionQueue(MemoryExtractor())
+        queue.submit(user_id, user_message, response, store_draft=store)
+        queue.wait_for_user(user_id, timeout=10)
+    """
+
+    def __init__(
+        self,
+        extractor: MemoryExtractor,
+        max_workers: int = 2,
+        max_attempts: int = 3,
+        retry_backoff: float = 0.5,
+        max_pending: int = 100,
+        streaming: bool = False,
+        batch_size: int = 8,
+        batch_wait_seconds: float = 0.25,
+    ):
+        """
+        Args:
+            extractor: Extracts memory drafts from a conversation turn
+            max_workers: Jobs processed concurrently
+            max_attempts: Tries per extraction and per stored draft
+            retry_backoff: Delay before the first retry in seconds (doubles each time)
+            max_pending: Queued jobs before `submit` applies backpressure
+            streaming: Pipeline extraction into micro-batched storage when possible
+            batch_size: Drafts per storage batch in streaming mode
+            batch_wait_seconds: Max age of a partial storage batch in streaming mode
+        """
+        self.extractor = extractor
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.streaming = streaming
+        self.batch_size = batch_size
+        self.batch_wait_seconds = batch_wait_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="memory-extraction")
+        self._slots = threading.BoundedSemaphore(max(1, max_pending))
+        self._pending: Dict[str, int] = {}
+        self._changed = threading.Condition()
+        self._failed = 0
+        self._closed = False
+        atexit.register(self.close)
+
+    def submit(
+        self,
+        user_id: str,
+        user_message: str,
+        assistant_message: str,
+        store_draft: Callable[[MemoryDraft], Any],
+    ) -> Future:
+        """
+        Queue extraction of one conversation turn.
+
+        Returns:
+            Future resolving to the number of drafts stored
+        """
+        return self.submit_turns(user_id, [(user_message, assistant_message)], store_draft)
+
+    def submit_turns(
+        self,
+        user_id: str,
+        turns: Sequence[Tuple[str, str]],
+        store_draft: Callable[[MemoryDraft], Any],
+        store_batch: Optional[Callable[[List[MemoryDraft]], List[Any]]] = None,
+    ) -> Future:
+        """Queue extraction of several turns with a single LLM call."""
+        if self._closed:
+            raise RuntimeError("ExtractionQueue is closed")
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Extraction queue full, waiting for a free slot")
+            self._slots.acquire()
+        with self._changed:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        try:
+            return self._executor.submit(self._run, user_id, list(turns), store_draft, store_batch)
+        except Exception:
+            self._done(user_id)
+            raise
+
+    def pending_count(self, user_id: Optional[str] = None) -> int:
+        """Queued or running jobs, for one user or in total."""
+        with self._changed:
+            if user_id is not None:
+                return self._pending.get(user_id, 0)
+            return sum(self._pending.values())
+
+    def wait_for_user(self, user_id: str, timeout: Optional[float] = None) -> bool:
+        """Block until the user's pending writes have landed; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._pending.get(user_id), timeout=timeout)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until every pending job has finished; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: not self._pending, timeout=timeout)
+
+    def stats(self) -> Dict[str, int]:
+        with self._changed:
+            return {"pending": sum(self._pending.values()), "failed": self._failed}
+
+    def close(self, timeout: Optional[float] = None):
+        """Finish pending jobs and stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        self.flush(timeout=timeout)
+        self._executor.shutdown(wait=False)
+
+    def _run(
+        self,
+        user_id: str,
+        turns: List[Tuple[str, str]],
+        store_draft: Callable[[MemoryDraft], Any],
+        store_batch: Optional[Callable[[List[MemoryDraft]], List[Any]]] = None,
+    ) -> int:
+        try:
+            # Extraction calls and the embeddings of their writes yield to interactive calls
+            with model_priority(CallPriority.EXTRACTION):
+                if self.streaming and store_batch is not None:
+                    return self._run_streaming(user_id, turns, store_batch)
+                drafts: List[MemoryDraft] = self._with_retries(
+                    "extract memories",
+                    lambda: self.extractor.extract_memories_from_turns(turns, raise_errors=True),
+                )
+                stored = 0
+                for draft in drafts or []:
+                    try:
+                        self._with_retries("store memory", lambda: store_draft(draft))
+                        stored += 1
+                    except Exception:
+                        self._record_failure()
+                logger.info(f"Background extraction stored {stored}/{len(drafts or [])} memories for user {user_id}")
+                return stored
+        except Exception:
+            self._record_failure()
+            return 0
+        finally:
+            self._done(user_id)
+
+    def _run_streaming(
+        self,
+        user_id: str,
+        turns: List[Tuple[str, str]],
+        store_batch: Callable[[List[MemoryDraft]], List[Any]],
+    ) -> int:
+        extracted, stored = self._with_retries(
+            "extract memories",
+            lambda: extract_and_store_streaming(
+                self.extractor,
+                turns,
+                lambda drafts: self._with_retries("store memories", lambda: store_batch(drafts)),
+                batch_size=self.batch_size,
+                max_wait_seconds=self.batch_wait_seconds,
+                raise_errors=True,
+            ),
+        )
+        if stored < extracted:
+            self._record_failure()
+        logger.info(f"Background extraction streamed {stored}/{extracted} memories for user {user_id}")
+        return stored
+
+    def _with_retries(self, action: str, operation: Callable[[], Any]) -> Any:
+        delay = self.retry_backoff
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return operation()
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    logger.error(f"Failed to {action} after {attempt} attempts: {e}")
+                    raise
+                logger.warning(f"Failed to {action} (attempt {attempt}/{self.max_attempts}), retrying: {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def _record_failure(self):
+        with self._changed:
+            self._failed += 1
+
+    def _done(self, user_id: str):
+        with self._changed:
+            remaining = self._pending.get(user_id, 0) - 1
+            if remaining > 0:
+                self._pending[user_id] = remaining
+            else:
+                self._pending.pop(user_id, None)
+            self._changed.notify_all()
+        self._slots.release()
+
+
+def extraction_queue_from_settings(extractor: MemoryExtractor) -> ExtractionQueue:
+    """ExtractionQueue configured by the extraction_* settings."""
+    return ExtractionQueue(
+        extractor,
+        max_workers=settings.extraction_workers,
+        max_attempts=settings.extraction_max_attempts,
+        streaming=settings.extraction_streaming,
+        batch_size=settings.extraction_store_batch_size,
+        batch_wait_seconds=settings.extraction_store_batch_wait_ms / 1000,
+    )
+
+
+class ExtractionWindow:
+    """
+    Per-session accumulator of conversation turns for batched extraction.
+
+    Turns are handed to `flush_turns` as one batch once `max_turns` have
+    accumulated, or after `idle_seconds` without a new turn, so a chat
+    session costs one extraction call per window instead of per turn.
+    With `max_turns=1` every turn is flushed immediately.
+
+    Example:
+        window = ExtractionWindow(lambda turns: queue.submit_turns(user_id, turns, store), max_turns=5)
+        window.add(user_message, response)
+        window.flush()  # e.g. when the session ends
+    """
+
+    def __init__(
+        self,
+        flush_turns: Callable[[List[Tuple[str, str]]], Any],
+        max_turns: int = 5,
+        idle_seconds: Optional[float] = 60.0,
+    ):
+        """
+        Args:
+            flush_turns: Receives each batch of (user_message, assistant_message) turns
+            max_turns: Turns per extraction batch
+            idle_seconds: Flush a partial batch after this long without a new turn (None = never)
+        """
+        self.flush_turns = flush_turns
+        self.max_turns = max(1, max_turns)
+        self.idle_seconds = idle_seconds
+        self._turns: List[Tuple[str, str]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def add(self, user_message: str, assistant_message: str):
+        """Add a completed turn, flushing the window when it is full."""
+        with self._lock:
+            self._turns.append((user_message, assistant_message))
+            full = len(self._turns) >= self.max_turns
+            if not full:
+                self._restart_timer()
+        if full:
+            self.flush()
+
+    def pending_turns(self) -> int:
+        with self._lock:
+            return len(self._turns)
+
+    def flush(self) -> int:
+        """
+        Hand the accumulated turns to `flush_turns` now.
+
+        Returns:
+            Number of turns flushed
+        """
+        with self._lock:
+            turns, self._turns = self._turns, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not turns:
+            return 0
+        try:
+            self.flush_turns(turns)
+        except Exception as e:
+            logger.error(f"Failed to flush {len(turns)} turns for extraction: {e}")
+        return len(turns)
+
+    def _restart_timer(self):
+        """(Re)arm the idle flush (lock held)."""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self.idle_seconds is None:
+            self._timer = None
+            return
+        self._timer = threading.Timer(self.idle_seconds, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
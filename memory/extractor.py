@@ -2,13 +2,60 @@
 Extract memories from conversations using LLM.
 Identifies facts, preferences, and important information to store.
 """
-from typing import List
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
 
 from loguru import logger
 from openai import OpenAI
 
 from models.memory import MemoryDraft, MemoryType
+from memory.encoding.cache import normalize_text
 from config.settings import settings
+from core.scheduler import CallPriority, current_priority, get_model_scheduler
+
+_WORDS = re.compile(r"\w+")
+
+
+def deduplicate_drafts(drafts: List[MemoryDraft], threshold: float = 0.8) -> List[MemoryDraft]:
+    """
+    Collapse near-identical drafts (word-set Jaccard >= threshold).
+
+    The first occurrence is kept, with the highest importance and the
+    union of tags of its duplicates. Meant for drafts extracted from one
+    window of turns, before they are stored one by one.
+    """
+    kept: List[Tuple[MemoryDraft, set]] = []
+    for draft in drafts:
+        words = set(_WORDS.findall(normalize_text(draft.content).lower()))
+        for i, (existing, existing_words) in enumerate(kept):
+            union = words | existing_words
+            if union and len(words & existing_words) / len(union) >= threshold:
+                kept[i] = (
+                    existing.model_copy(update={
+                        "importance_score": max(existing.importance_score, draft.importance_score),
+                        "tags": list(dict.fromkeys(existing.tags + draft.tags)),
+                    }),
+                    existing_words,
+                )
+                break
+        else:
+            kept.append((draft, words))
+    return [draft for draft, _ in kept]
+
+
+def _completed_lines(stream) -> Iterator[str]:
+    """Lines of a streamed chat completion, each yielded once its newline arrives."""
+    buffer = ""
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        buffer += chunk.choices[0].delta.content or ""
+        while "\n" in buffer:
+            line, buffer = buffer.split("\n", 1)
+            yield line
+    if buffer:
+        yield buffer
+
 
 class MemoryExtractor:
     """
@@ -24,12 +71,14 @@ class MemoryExtractor:
         )
         self.model_name = settings.ollama_model
         self.client_type = "openai"
+        self.scheduler = get_model_scheduler()
         logger.info(f"MemoryExtractor initialized with Ollama model: {self.model_name}")
 
     def extract_memories(
             self,
             user_message: str,
-            assistant_message: str
+            assistant_message: str,
+            raise_errors: bool = False
             ) -> List[MemoryDraft]:
         """
         Extract memories from a conversation turn.
@@ -37,35 +86,104 @@ class MemoryExtractor:
         Args:
             user_message: What the user said
             assistant_message: What the assistant responded
+            raise_errors: Re-raise LLM errors instead of returning [] (for retrying callers)
             
         Returns:
             List of MemoryDraft objects with content, memory_type, importance_score, and tags
         """
+        return self.extract_memories_from_turns([(user_message, assistant_message)], raise_errors)
+
+    def extract_memories_from_turns(
+            self,
+            turns: Sequence[Tuple[str, str]],
+            raise_errors: bool = False
+            ) -> List[MemoryDraft]:
+        """
+        Extract memories from several conversation turns with one LLM call.
+        
+        Args:
+            turns: (user_message, assistant_message) pairs, oldest first
+            raise_errors: Re-raise LLM errors instead of returning []
+            
+        Returns:
+            De-duplicated list of MemoryDraft objects
+        """
+        if not turns:
+            return []
         try: 
 
-            prompt = self._build_extraction_prompt(user_message, assistant_message)
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            prompt = self._build_extraction_prompt(turns)
+            with self.scheduler.slot(current_priority(CallPriority.EXTRACTION)):
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
             memories = self._parse_response(response.choices[0].message.content)
-            logger.info(f"Extracted {len(memories)} memories from conversation")
+            if len(turns) > 1:
+                memories = deduplicate_drafts(memories)
+            logger.info(f"Extracted {len(memories)} memories from {len(turns)} conversation turns")
             return memories
         except Exception as e:
             logger.error(f"Error extracting memories: {e}")
+            if raise_errors:
+                raise
             return []
     
-    def _build_extraction_prompt(self, user_message: str, assistant_message: str) -> str:
+    def stream_memories_from_turns(
+            self,
+            turns: Sequence[Tuple[str, str]],
+            raise_errors: bool = False
+            ) -> Iterator[MemoryDraft]:
+        """
+        Streaming version of `extract_memories_from_turns`.
+
+        The completion is streamed and each TYPE|SCORE|TAGS|CONTENT line is
+        parsed as soon as its newline arrives, so callers can embed and
+        store early drafts while the LLM is still generating. Drafts that
+        duplicate an earlier one in the same stream are skipped.
+        
+        Yields:
+            MemoryDraft objects in generation order
+        """
+        if not turns:
+            return
+        emitted: List[MemoryDraft] = []
+        try:
+            with self.scheduler.slot(current_priority(CallPriority.EXTRACTION)):
+                stream = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[
+                        {"role": "user", "content": self._build_extraction_prompt(turns)}
+                    ],
+                    stream=True
+                )
+                for line in _completed_lines(stream):
+                    draft = self._parse_line(line)
+                    # A draft that collapses into an earlier one is a duplicate
+                    if draft is None or len(deduplicate_drafts(emitted + [draft])) == len(emitted):
+                        continue
+                    emitted.append(draft)
+                    yield draft
+            logger.info(f"Streamed {len(emitted)} memories from {len(turns)} conversation turns")
+        except Exception as e:
+            logger.error(f"Error streaming memory extraction: {e}")
+            if raise_errors:
+                raise
+
+    def _build_extraction_prompt(self, turns: Sequence[Tuple[str, str]]) -> str:
         """Construct a prompt to extract memories from the conversation."""
+        conversation = "\n\n".join(
+            f"USER: {user_message}\nASSISTANT: {assistant_message}"
+            for user_message, assistant_message in turns
+        )
         return f"""You are a memory extraction system for a personal AI assistant.
 
 Analyze this conversation and extract ONLY facts worth remembering long-term.
 
 Conversation:
-USER: {user_message}
-ASSISTANT: {assistant_message}
+{conversation}
 
 EXTRACTION RULES:
 
@@ -87,6 +205,7 @@ WHAT TO SKIP:
 ✗ Temporary states (e.g., "user is tired today")
 ✗ Questions without answers
 ✗ Information already extracted in previous turns
+✗ The same fact twice (extract each fact once, even if it comes up in several turns)
 
 IMPORTANCE SCORING:
 - 0.9-1.0: Critical information (allergies, core identity, strong preferences)
@@ -115,45 +234,52 @@ Extracted memories:"""
         memories = []
         lines = response_text.strip().split("\n")
         for line in lines:
-            line = line.strip()
-            if not line or line.upper() == "NONE":
-                continue
+            memory = self._parse_line(line)
+            if memory is not None:
+                memories.append(memory)
+        return memories
+
+    def _parse_line(self, line: str) -> Optional[MemoryDraft]:
+        """Parse one TYPE|SCORE|TAGS|CONTENT line; None for blank, NONE or invalid lines."""
+        line = line.strip()
+        if not line or line.upper() == "NONE":
+            return None
+        
+        # Skip template/example lines
+        if "importance_score" in line.lower() or "TYPE|SCORE|TAGS|CONTENT" in line:
+            return None
             
-            # Skip template/example lines
-            if "importance_score" in line.lower() or "TYPE|SCORE|TAGS|CONTENT" in line:
-                continue
-                
-            try:
-                parts = line.split("|", 3)
-                if len(parts) != 4:
-                    logger.warning(f"Skipping malformed memory line: {line}")
-                    continue
-                mem_type, importance, tags, content = parts
-
-                mem_type = (
-                MemoryType.SEMANTIC 
-                    if mem_type.strip().upper() == "SEMANTIC" 
-                    else MemoryType.EPISODIC
-                )
+        try:
+            parts = line.split("|", 3)
+            if len(parts) != 4:
+                logger.warning(f"Skipping malformed memory line: {line}")
+                return None
+            mem_type, importance, tags, content = parts
 
-                importance = float(importance.strip())
-                importance = max(0.0, min(1.0, importance))
+            mem_type = (
+            MemoryType.SEMANTIC 
+                if mem_type.strip().upper() == "SEMANTIC" 
+                else MemoryType.EPISODIC
+            )
 
-                tags = [t.strip() for t in tags.split(',') if t.strip()]
+            importance = float(importance.strip())
+            importance = max(0.0, min(1.0, importance))
 
-                memory = MemoryDraft(
-                    content=content.strip(),
-                    memory_type=mem_type,
-                    importance_score=importance,
-                    tags=tags
-                )
-                memories.append(memory)
-                logger.debug(f"Extracted memory: {memory.content[:50]}...")
-            except ValueError as e:
-                logger.warning(f"Skipping invalid memory line (value error): {line}")
-            except Exception as e:
-                logger.error(f"Error parsing memory line: {line} - {e}")
-        return memories
+            tags = [t.strip() for t in tags.split(',') if t.strip()]
+
+            memory = MemoryDraft(
+                content=content.strip(),
+                memory_type=mem_type,
+                importance_score=importance,
+                tags=tags
+            )
+            logger.debug(f"Extracted memory: {memory.content[:50]}...")
+            return memory
+        except ValueError as e:
+            logger.warning(f"Skipping invalid memory line (value error): {line}")
+        except Exception as e:
+            logger.error(f"Error parsing memory line: {line} - {e}")
+        return None
 
 
 
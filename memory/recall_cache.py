@@ -0,0 +1,125 @@
+"""
+In-process cache of recall results.
+Entries are invalidated by a per-user generation counter and a TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from models.memory import MemorySearchResult, MemoryType
+from memory.encoding.cache import normalize_text
+
+
+class UserGenerations:
+    """
+    Thread-safe per-user write counters.
+
+    Every write that can change a user's recall results (remember, forget,
+    merges, metadata updates) calls `bump`; cached results stamped with an
+    older generation are ignored.
+    """
+
+    def __init__(self):
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+    def bump(self, user_id: str) -> int:
+        with self._lock:
+            generation = self._generations.get(user_id, 0) + 1
+            self._generations[user_id] = generation
+            return generation
+
+
+class RecallCache:
+    """
+    Bounded LRU of recall results with TTL and generation checks.
+
+    A hit requires the entry's generation to match the user's current one
+    and its age to be below `ttl_seconds`, so writes are visible at once
+    and recency/decay scores never go staler than the TTL.
+
+    Example:
+        cache = RecallCache(max_entries=2048, ttl_seconds=30)
+        key = RecallCache.make_key(user_id, query, None, None, 5, 0.5)
+        results = cache.get(key, generation)
+    """
+
+    def __init__(self, max_entries: int = 2048, ttl_seconds: float = 30.0):
+        """
+        Args:
+            max_entries: Max cached queries across all users
+            ttl_seconds: Max age of a cached result
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[int, float, List[MemorySearchResult]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def make_key(
+        user_id: str,
+        query: str,
+        memory_types: Optional[List[MemoryType]],
+        tags: Optional[List[str]],
+        top_k: int,
+        min_similarity: float,
+        with_vectors: bool = False,
+    ) -> Hashable:
+        """Cache key; filters are order-insensitive, query text is normalized."""
+        types = tuple(sorted(str(getattr(t, "value", t)) for t in memory_types)) if memory_types else None
+        return (
+            user_id,
+            normalize_text(query).lower(),
+            types,
+            tuple(sorted(tags)) if tags else None,
+            top_k,
+            min_similarity,
+            with_vectors,
+        )
+
+    def get(self, key: Hashable, generation: int) -> Optional[List[MemorySearchResult]]:
+        """Cached results for `key`, or None if missing, stale or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            entry_generation, stored_at, results = entry
+            if entry_generation != generation or now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return list(results)
+
+    def put(self, key: Hashable, generation: int, results: List[MemorySearchResult]):
+        """Store results computed under `generation`."""
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, hit rate and current size."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": len(self._entries),
+            }
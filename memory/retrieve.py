@@ -1,20 +1,66 @@
-from db.vectore_store import VectorStore
+import time
+
+from qdrant_client.http.exceptions import UnexpectedResponse
+
+from config.settings import settings
+from db.vectore_store import AsyncVectorStore, VectorStore
 from intelligence.ranker import MemoryRanker
-from memory.encoding.base import BaseEmbedder
-from typing import List
+from memory.candidates import CandidateMultiplier, candidate_multiplier_from_settings
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+from memory.recall_cache import UserGenerations
+from memory.semantic_cache import SemanticQueryCache
+from typing import List, Optional
 
 from models.memory import Memory, MemoryQuery, MemorySearchResult
 from loguru import logger
+
+
+def _is_unsupported_query(error: Exception) -> bool:
+    """
+    True when formula queries cannot work at all: the server rejected the
+    query (Qdrant < 1.14) or the installed qdrant-client (1.11-1.13) lacks
+    the models.
+    """
+    if isinstance(error, ImportError):
+        return True
+    return isinstance(error, UnexpectedResponse) and error.status_code in (400, 404, 422)
+
+
 class MemoryRetriever:
 
     """
     High-level interface for retrieving memories.
     Handles query embedding and vector DB search.
+
+    Vector search over-fetches `top_k * multiplier` candidates (see
+    CandidateMultiplier) and the ranker trims them back to top_k.
+
+    `retrieval_mode` selects where the final score is computed:
+    "python" (MemoryRanker), "server" (Qdrant formula query with the
+    ranker's weights) or "auto" (server, falling back to Python for the
+    rest of the process if the server rejects formula queries).
+
+    With a `semantic_cache`, paraphrased queries reuse the candidates of a
+    recent near-identical query and only re-run ranking. `generations`
+    invalidates those candidates when the user's memories change.
     """
     
-    def __init__(self, embedder: BaseEmbedder, vector_store: VectorStore):
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        vector_store: VectorStore,
+        semantic_cache: Optional[SemanticQueryCache] = None,
+        generations: Optional[UserGenerations] = None,
+        candidates: Optional[CandidateMultiplier] = None,
+        retrieval_mode: Optional[str] = None,
+    ):
         self.embedder = embedder
         self.vector_store = vector_store
+        self.semantic_cache = semantic_cache
+        self.generations = generations or UserGenerations()
+        self.candidates = candidates or candidate_multiplier_from_settings()
+        self.retrieval_mode = (retrieval_mode or settings.retrieval_mode).lower()
+        self._server_fusion = self.retrieval_mode in ("server", "auto")
         self.ranker = MemoryRanker()
         logger.info("MemoryRetriever initialized")
 
@@ -32,15 +78,55 @@ class MemoryRetriever:
         try:
             logger.info(f"Retrieving memories for query: '{query.query_text}' with top_k={query.top_k}")
             search_embedding = self.embedder.embed_query(query.query_text)
-            raw_memories = self.vector_store.search_memories(query, search_embedding)
-            logger.info(f"Vector search returned {len(raw_memories)} memories")
-            ranked_memories = self.ranker.rank_memories(raw_memories)
+            generation = self.generations.get(query.user_id)
+            raw_memories = None
+            if self.semantic_cache is not None:
+                raw_memories = self.semantic_cache.get(query, search_embedding, generation)
+            if raw_memories is not None:
+                logger.info(f"Reused {len(raw_memories)} cached candidates for a similar query")
+                ranked_memories = self.ranker.rank_memories(raw_memories, top_k=query.top_k)
+            else:
+                limit = self.candidates.limit(query.top_k)
+                started = time.perf_counter()
+                ranked_memories = self._fused_search(query, search_embedding, limit)
+                if ranked_memories is None:
+                    raw_memories = self.vector_store.search_memories(query, search_embedding, limit=limit)
+                    logger.info(f"Vector search returned {len(raw_memories)} memories")
+                    ranked_memories = self.ranker.rank_memories(raw_memories, top_k=query.top_k)
+                else:
+                    raw_memories = ranked_memories
+                self.candidates.observe((time.perf_counter() - started) * 1000)
+                if self.semantic_cache is not None:
+                    self.semantic_cache.put(query, search_embedding, generation, raw_memories)
             logger.info(f"Returned {len(ranked_memories)} ranked memories for query: '{query.query_text}'")
             return ranked_memories
         except Exception as e:
             logger.error(f"Error retrieving memories: {e}")
             return []
         
+    def _fused_search(
+        self,
+        query: MemoryQuery,
+        search_embedding: List[float],
+        limit: int,
+    ) -> Optional[List[MemorySearchResult]]:
+        """Server-side ranked search, or None to rank in Python."""
+        if not self._server_fusion:
+            return None
+        try:
+            return self.vector_store.search_memories(
+                query, search_embedding, limit=limit, fusion=self.ranker.weights
+            )
+        except Exception as e:
+            if self.retrieval_mode == "server":
+                raise
+            if _is_unsupported_query(e):
+                logger.warning(f"Score-fusion queries unavailable, ranking in Python from now on: {e}")
+                self._server_fusion = False
+            else:
+                logger.warning(f"Fused search failed, ranking this query in Python: {e}")
+            return None
+
     def retrieve_memories_without_ranking(
         self,
         query:MemoryQuery,
@@ -60,4 +146,90 @@ class MemoryRetriever:
             return raw_memories
         except Exception as e:
             logger.error(f"Error retrieving memories without ranking: {e}")
-            return []
\ No newline at end of file
+            return []
+
+
+class AsyncMemoryRetriever:
+    """
+    Asyncio counterpart of MemoryRetriever.
+    Embedding and vector search are awaited; ranking stays in-process.
+    """
+
+    def __init__(
+        self,
+        embedder: AsyncBaseEmbedder,
+        vector_store: AsyncVectorStore,
+        semantic_cache: Optional[SemanticQueryCache] = None,
+        generations: Optional[UserGenerations] = None,
+        candidates: Optional[CandidateMultiplier] = None,
+        retrieval_mode: Optional[str] = None,
+    ):
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.semantic_cache = semantic_cache
+        self.generations = generations or UserGenerations()
+        self.candidates = candidates or candidate_multiplier_from_settings()
+        self.retrieval_mode = (retrieval_mode or settings.retrieval_mode).lower()
+        self._server_fusion = self.retrieval_mode in ("server", "auto")
+        self.ranker = MemoryRanker()
+        logger.info("AsyncMemoryRetriever initialized")
+
+    async def retrieve_memories(
+        self,
+        query: MemoryQuery,
+    ) -> List[MemorySearchResult]:
+        """
+        Retrieve relevant memories based on the query.
+        Args:
+            query: MemoryQuery object with search parameters
+        Returns:
+            List of MemorySearchResult objects sorted by final_score
+        """
+        try:
+            search_embedding = await self.embedder.embed_query(query.query_text)
+            generation = self.generations.get(query.user_id)
+            raw_memories = None
+            if self.semantic_cache is not None:
+                raw_memories = self.semantic_cache.get(query, search_embedding, generation)
+            if raw_memories is not None:
+                ranked_memories = self.ranker.rank_memories(raw_memories, top_k=query.top_k)
+            else:
+                limit = self.candidates.limit(query.top_k)
+                started = time.perf_counter()
+                ranked_memories = await self._fused_search(query, search_embedding, limit)
+                if ranked_memories is None:
+                    raw_memories = await self.vector_store.search_memories(query, search_embedding, limit=limit)
+                    ranked_memories = self.ranker.rank_memories(raw_memories, top_k=query.top_k)
+                else:
+                    raw_memories = ranked_memories
+                self.candidates.observe((time.perf_counter() - started) * 1000)
+                if self.semantic_cache is not None:
+                    self.semantic_cache.put(query, search_embedding, generation, raw_memories)
+            logger.info(f"Returned {len(ranked_memories)} ranked memories for query: '{query.query_text}'")
+            return ranked_memories
+        except Exception as e:
+            logger.error(f"Error retrieving memories: {e}")
+            return []
+
+    async def _fused_search(
+        self,
+        query: MemoryQuery,
+        search_embedding: List[float],
+        limit: int,
+    ) -> Optional[List[MemorySearchResult]]:
+        """Server-side ranked search, or None to rank in Python."""
+        if not self._server_fusion:
+            return None
+        try:
+            return await self.vector_store.search_memories(
+                query, search_embedding, limit=limit, fusion=self.ranker.weights
+            )
+        except Exception as e:
+            if self.retrieval_mode == "server":
+                raise
+            if _is_unsupported_query(e):
+                logger.warning(f"Score-fusion queries unavailable, ranking in Python from now on: {e}")
+                self._server_fusion = False
+            else:
+                logger.warning(f"Fused search failed, ranking this query in Python: {e}")
+            return None
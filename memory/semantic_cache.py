@@ -0,0 +1,154 @@
+"""
+Semantic query cache.
+Reuses vector-search candidates for near-duplicate (paraphrased) queries.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+
+from models.memory import MemoryQuery, MemorySearchResult
+
+
+class _QuerySlot:
+    """Recent query embeddings and their candidates for one (user, filters) pair."""
+
+    def __init__(self, dimension: int):
+        self.matrix = np.empty((0, dimension), dtype=np.float32)
+        self.entries: List[tuple] = []  # (generation, stored_at, candidates)
+
+
+class SemanticQueryCache:
+    """
+    Per-user cache of search candidates, looked up by query embedding.
+
+    Recent query embeddings are kept as rows of a small unit-normalized
+    NumPy matrix per (user, filters). A new query whose cosine similarity
+    to a cached one is at least `threshold` reuses that query's candidate
+    set; only the ranking step is re-run. Entries are invalidated by the
+    user's write generation and a TTL.
+
+    Example:
+        cache = SemanticQueryCache(threshold=0.98)
+        candidates = cache.get(query, embedding, generation)
+        if candidates is None:
+            candidates = vector_store.search_memories(query, embedding)
+            cache.put(query, embedding, generation, candidates)
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.98,
+        max_queries_per_user: int = 64,
+        max_slots: int = 4096,
+        ttl_seconds: float = 300.0,
+    ):
+        """
+        Args:
+            threshold: Min cosine similarity between queries to reuse candidates
+            max_queries_per_user: Query embeddings kept per (user, filters)
+            max_slots: Max (user, filters) pairs kept before LRU eviction
+            ttl_seconds: Max age of reused candidates
+        """
+        self.threshold = threshold
+        self.max_queries_per_user = max(1, max_queries_per_user)
+        self.max_slots = max(1, max_slots)
+        self.ttl_seconds = ttl_seconds
+        self._slots: "OrderedDict[Hashable, _QuerySlot]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _slot_key(query: MemoryQuery) -> Hashable:
+        types = tuple(sorted(t.value for t in query.memory_types)) if query.memory_types else None
+        return (
+            query.user_id,
+            types,
+            tuple(sorted(query.tags)) if query.tags else None,
+            query.top_k,
+            query.min_similarity,
+            query.with_vectors,
+        )
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def get(
+        self,
+        query: MemoryQuery,
+        embedding: List[float],
+        generation: int,
+    ) -> Optional[List[MemorySearchResult]]:
+        """
+        Candidates of the most similar cached query, or None.
+
+        Returned results are copies, so the caller may re-rank them freely.
+        """
+        vector = self._normalize(embedding)
+        now = time.monotonic()
+        with self._lock:
+            slot = self._slots.get(self._slot_key(query))
+            if slot is None or not slot.entries or slot.matrix.shape[1] != vector.shape[0]:
+                self._misses += 1
+                return None
+            similarities = slot.matrix @ vector
+            best = int(np.argmax(similarities))
+            entry_generation, stored_at, candidates = slot.entries[best]
+            if (
+                similarities[best] < self.threshold
+                or entry_generation != generation
+                or now - stored_at > self.ttl_seconds
+            ):
+                self._misses += 1
+                return None
+            self._slots.move_to_end(self._slot_key(query))
+            self._hits += 1
+        return [result.model_copy() for result in candidates]
+
+    def put(
+        self,
+        query: MemoryQuery,
+        embedding: List[float],
+        generation: int,
+        candidates: List[MemorySearchResult],
+    ):
+        """Remember the candidates returned by vector search for this query."""
+        vector = self._normalize(embedding)
+        entry = (generation, time.monotonic(), [result.model_copy() for result in candidates])
+        key = self._slot_key(query)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None or slot.matrix.shape[1] != vector.shape[0]:
+                slot = _QuerySlot(vector.shape[0])
+                self._slots[key] = slot
+            # Drop entries from older generations; they can never hit again
+            keep = [i for i, (entry_generation, _, _) in enumerate(slot.entries) if entry_generation == generation]
+            keep = keep[-(self.max_queries_per_user - 1):] if self.max_queries_per_user > 1 else []
+            slot.matrix = np.vstack([slot.matrix[keep], vector[np.newaxis, :]])
+            slot.entries = [slot.entries[i] for i in keep] + [entry]
+            self._slots.move_to_end(key)
+            while len(self._slots) > self.max_slots:
+                self._slots.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters, hit rate and number of cached queries."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "size": sum(len(slot.entries) for slot in self._slots.values()),
+            }
+
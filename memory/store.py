@@ -2,9 +2,10 @@
 
 from datetime import datetime, timezone
 from loguru import logger
-from db.vectore_store import VectorStore
-from memory.encoding.base import BaseEmbedder
-from typing import List, Optional
+from db.vectore_store import AsyncVectorStore, VectorStore
+from intelligence.scorer import MemoryScorer
+from memory.encoding.base import AsyncBaseEmbedder, BaseEmbedder
+from typing import Callable, List, Optional, Tuple
 
 from models.memory import Memory, MemoryQuery
 
@@ -13,10 +14,23 @@ class MemoryStore:
     """
     High-level interface for storing memories.
     Handles embedding generation and vector DB storage.
+
+    Every write also stores `static_score` (MemoryScorer importance), so
+    ranking never has to recompute it from content.
+
+    `on_delete` is called with the ids of duplicates removed by a merge,
+    e.g. to drop their buffered access stats.
     """
-    def __init__(self, embedder: BaseEmbedder, vector_store: VectorStore):
+    def __init__(
+        self,
+        embedder: BaseEmbedder,
+        vector_store: VectorStore,
+        on_delete: Optional[Callable[[List[str]], None]] = None,
+    ):
         self.embedder = embedder
         self.vector_store = vector_store
+        self.on_delete = on_delete
+        self.scorer = MemoryScorer()
     
     def store_memory(
             self, 
@@ -68,6 +82,7 @@ class MemoryStore:
             
             logger.info(f"No duplicates found, creating new memory")
             memory = Memory(content=content, embedding=embedding, **metadata)
+            memory.static_score = self.scorer.calculate_importance(memory)
             logger.debug(f"Memory object created with id: {memory.id}")
             self.vector_store.upsert_memory(memory)
             logger.info(f"Memory stored successfully: {memory.id}")
@@ -78,27 +93,61 @@ class MemoryStore:
     
     def store_memory_batch(
         self,
-        memories_data: List[dict]
+        memories_data: List[dict],
+        deduplication_threshold: Optional[float] = None
     ) -> List[Memory]:
         """
-        Store multiple memories efficiently (batch embedding).
+        Store multiple memories efficiently (batch embedding + bulk upsert).
         
         Args:
             memories_data: List of dicts with keys: content, user_id, memory_type, etc.
+            deduplication_threshold: Merge items into similar stored memories, as
+                `store_memory` does (None = no deduplication)
             
         Returns:
-            List of stored Memory objects
+            List of stored Memory objects (items whose upsert failed are omitted;
+            merged items are returned as their canonical memory)
         """
         contents = [data["content"] for data in memories_data]
         embeddings = self.embedder.embed_batch(contents)
         
-        stored_memories = []
-        for data, embedding in zip(memories_data, embeddings):
-            memory = Memory(content=data["content"], embedding=embedding, **{k: v for k, v in data.items() if k != "content"})
-            self.vector_store.upsert_memory(memory)
-            stored_memories.append(memory)
+        merged = []
+        if deduplication_threshold is not None:
+            new_items = []
+            for data, embedding in zip(memories_data, embeddings):
+                duplicates = self._find_duplicates(
+                    content=data["content"],
+                    embedding=embedding,
+                    user_id=data.get("user_id"),
+                    memory_type=data.get("memory_type"),
+                    threshold=deduplication_threshold
+                )
+                if duplicates:
+                    merged.append(self._merge_duplicates(
+                        duplicates=duplicates,
+                        new_content=data["content"],
+                        new_importance=data.get("importance_score"),
+                        new_tags=data.get("tags")
+                    ))
+                else:
+                    new_items.append((data, embedding))
+            if merged:
+                logger.info(f"Merged {len(merged)} batch items into existing memories")
+            memories_data = [data for data, _ in new_items]
+            embeddings = [embedding for _, embedding in new_items]
         
-        return stored_memories
+        memories = [
+            Memory(content=data["content"], embedding=embedding, **{k: v for k, v in data.items() if k != "content"})
+            for data, embedding in zip(memories_data, embeddings)
+        ]
+        for memory in memories:
+            memory.static_score = self.scorer.calculate_importance(memory)
+        statuses = self.vector_store.upsert_memories(memories)
+        stored_memories = [memory for memory, ok in zip(memories, statuses) if ok]
+        if len(stored_memories) < len(memories):
+            logger.warning(f"{len(memories) - len(stored_memories)} memories failed to store in batch")
+        
+        return merged + stored_memories
     
     def update_memory(
         self,
@@ -125,6 +174,7 @@ class MemoryStore:
         if tags is not None:
             existing_memory.tags = tags
         
+        existing_memory.static_score = self.scorer.calculate_importance(existing_memory)
         self.vector_store.upsert_memory(existing_memory)
         return True
     
@@ -180,35 +230,129 @@ class MemoryStore:
         - Delete the others
         - Boost importance
         """
-        canonical = max(
+        canonical, duplicate_ids, metadata = _plan_merge(duplicates)
+        canonical.static_score = self.scorer.calculate_importance(canonical)
+        metadata["static_score"] = canonical.static_score
+        for memory_id in duplicate_ids:
+            self.vector_store.delete_memory(memory_id)
+            logger.debug(f"Deleted duplicate: {memory_id[:8]}")
+        if duplicate_ids and self.on_delete is not None:
+            self.on_delete(duplicate_ids)
+        # Use update_memory_metadata since canonical doesn't have embedding
+        self.vector_store.update_memory_metadata(canonical, metadata)
+        logger.info(f"Merged {len(duplicates)} duplicates into canonical memory {canonical.id[:8]}")
+        return canonical
+
+
+def _plan_merge(duplicates: List[Memory]) -> Tuple[Memory, List[str], dict]:
+    """
+    Decide how to merge duplicates, without touching the database.
+
+    Returns:
+        (canonical memory with merged fields, ids to delete, metadata to write)
+    """
+    canonical = max(
         duplicates,
         key=lambda m: (m.importance_score, len(m.content))
-        )
-        logger.info(
+    )
+    logger.info(
         f"Merging {len(duplicates)} memories into canonical: {canonical.id[:8]}"
+    )
+    total_access_count = sum(m.access_count for m in duplicates)
+    all_tags = set(canonical.tags)
+    duplicate_ids = []
+    for memory in duplicates:
+        if memory.id != canonical.id:
+            all_tags.update(memory.tags)
+            duplicate_ids.append(memory.id)
+    canonical.access_count = total_access_count + 1
+    canonical.tags = list(all_tags)
+    canonical.last_accessed = datetime.now(timezone.utc)
+    boost = 0.05 * len(duplicates)  
+    canonical.importance_score = min(
+        canonical.importance_score + boost,
+        1.0
+    )
+    metadata = {
+        "access_count": canonical.access_count,
+        "tags": canonical.tags,
+        "last_accessed": canonical.last_accessed,
+        "importance_score": canonical.importance_score
+    }
+    return canonical, duplicate_ids, metadata
+
+
+class AsyncMemoryStore:
+    """
+    Asyncio counterpart of MemoryStore.
+    Uses an AsyncBaseEmbedder and AsyncVectorStore end to end.
+    """
+    def __init__(
+        self,
+        embedder: AsyncBaseEmbedder,
+        vector_store: AsyncVectorStore,
+        on_delete: Optional[Callable[[List[str]], None]] = None,
+    ):
+        self.embedder = embedder
+        self.vector_store = vector_store
+        self.on_delete = on_delete
+        self.scorer = MemoryScorer()
+
+    async def store_memory(
+            self,
+            content: str,
+            deduplication_threshold: float = 0.70,
+            **metadata,
+            ) -> Memory:
+        """Store a memory with automatic deduplication (see MemoryStore.store_memory)."""
+        try:
+            logger.info(f"Storing memory for user: {metadata.get('user_id')}")
+            embedding = await self.embedder.embed(content)
+
+            similar_memories = await self._find_duplicates(
+                content=content,
+                embedding=embedding,
+                user_id=metadata.get("user_id"),
+                threshold=deduplication_threshold
+                )
+
+            if similar_memories:
+                logger.info(f"Found {len(similar_memories)} similar memories, merging...")
+                canonical, duplicate_ids, merged_metadata = _plan_merge(similar_memories)
+                canonical.static_score = self.scorer.calculate_importance(canonical)
+                merged_metadata["static_score"] = canonical.static_score
+                for memory_id in duplicate_ids:
+                    await self.vector_store.delete_memory(memory_id)
+                if duplicate_ids and self.on_delete is not None:
+                    self.on_delete(duplicate_ids)
+                await self.vector_store.update_memory_metadata(canonical, merged_metadata)
+                return canonical
+
+            memory = Memory(content=content, embedding=embedding, **metadata)
+            memory.static_score = self.scorer.calculate_importance(memory)
+            await self.vector_store.upsert_memory(memory)
+            logger.info(f"Memory stored successfully: {memory.id}")
+            return memory
+        except Exception as e:
+            logger.error(f"Error storing memory: {e}")
+            raise e
+
+    async def _find_duplicates(
+        self,
+        content: str,
+        embedding: List[float],
+        user_id: str,
+        threshold: float
+    ) -> List[Memory]:
+        """Find similar memories for deduplication."""
+        if threshold >= 1.0:
+            logger.info(f"Dedup disabled (threshold={threshold} >= 1.0), skipping duplicate search")
+            return []
+        query = MemoryQuery(
+            query_text=content,
+            user_id=user_id,
+            top_k=5,
+            min_similarity=threshold
         )
-        total_access_count = sum(m.access_count for m in duplicates)
-        all_tags = set(canonical.tags)
-        for memory in duplicates:
-            if memory.id != canonical.id:
-                all_tags.update(memory.tags)
-                
-                self.vector_store.delete_memory(memory.id)
-                logger.debug(f"Deleted duplicate: {memory.id[:8]}")
-        canonical.access_count = total_access_count + 1
-        canonical.tags = list(all_tags)
-        canonical.last_accessed = datetime.now(timezone.utc)
-        boost = 0.05 * len(duplicates)  
-        canonical.importance_score = min(
-            canonical.importance_score + boost,
-            1.0
-        )
-        # Use update_memory_metadata since canonical doesn't have embedding
-        self.vector_store.update_memory_metadata(canonical, {
-            "access_count": canonical.access_count,
-            "tags": canonical.tags,
-            "last_accessed": canonical.last_accessed,
-            "importance_score": canonical.importance_score
-        })
-        logger.info(f"Merged {len(duplicates)} duplicates into canonical memory {canonical.id[:8]}")
-        return canonical
\ No newline at end of file
+        results = await self.vector_store.search_memories(query, query_embedding=embedding)
+        return [r.memory for r in results]
@@ -19,6 +19,7 @@ class Memory(BaseModel):
     tags: List[str] = Field(default_factory=list)
     last_accessed : Optional[datetime] = None
     access_count: int = 0
+    static_score: Optional[float] = None  # importance x type x length, precomputed at write time
 
 
 class MemoryQuery(BaseModel):
@@ -31,6 +32,16 @@ class MemoryQuery(BaseModel):
     time_window_days: Optional[int] = None  # Only memories from last N days
     tags: Optional[List[str]] = None
     allow_cross_user: bool = False  
+    with_vectors: bool = False  # return stored vectors as Memory.embedding
+
+
+class RankingWeights(BaseModel):
+    """Final-score weights of MemoryRanker, shared with server-side score fusion."""
+    similarity: float
+    importance: float
+    recency: float
+    access: float
+    decay_rate: float  # per day
 
 
 class MemorySearchResult(BaseModel):
@@ -39,6 +50,16 @@ class MemorySearchResult(BaseModel):
     similarity_score: float  # Raw cosine similarity from Qdrant
     final_score: float  # After applying importance + recency weighting
 
+
+class MemoryContext(BaseModel):
+    """LLM context block built from recalled memories."""
+    text: str
+    token_count: int
+    memory_ids: List[str] = Field(default_factory=list)  # Memories included, in order
+    contents: List[str] = Field(default_factory=list)  # Their content, parallel to memory_ids
+    referenced_ids: List[str] = Field(default_factory=list)  # Already shown, only referenced
+    dropped_redundant: int = 0  # Near-duplicates left out
+
 class MemoryDraft(BaseModel):
     """
     Draft memory before being stored.